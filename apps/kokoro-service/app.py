@@ -1,28 +1,80 @@
 from __future__ import annotations
 
+import asyncio
+import base64
+import importlib.metadata
 import io
+import json
+import math
 import os
-from typing import Optional, Tuple
+import sys
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
 import logging
 from logging.handlers import RotatingFileHandler
-from threading import Lock
+import threading
 
 import numpy as np
-import soundfile as sf
 from fastapi import FastAPI, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
+from audio import (
+    MP3_PRESETS,
+    NORM_TARGET,
+    PcmAssembler,
+    RunningPeakNormalizer,
+    WavStreamEncoder,
+    as_float32,
+    encode_mp3,
+    encode_ogg,
+    mp3_encoder,
+    ogg_encoder,
+    resample_linear,
+    sndfile_supports,
+)
+from artifact_dump import DumpWriter
+import metrics
+from profiler import SamplingProfiler
+from synthesis_cache import SynthesisCache, make_cache_key
+from text_chunking import split_text
+from voice_catalog import VoiceCatalog, etag_matches
+from process_pool import ProcessWorkerPool, WorkerUnavailableError
+from readiness import ProviderReadiness
+from single_flight import SingleFlight
+from inference_queue import (
+    InferenceJob,
+    InferencePool,
+    QueueFullError,
+    workers_for,
+)
 from providers.kokoro_adapter import KokoroProvider
+from providers.g2p_cache import G2PCache
+from providers.kokoro_pipelines import (
+    KOKORO_LANGUAGES,
+    KokoroPipelinePool,
+    kokoro_lang_code,
+)
+from providers.kokoro_engine import KokoroEngine
+from providers.kokoro_voices import KokoroVoiceManager
 from providers.apple_say import AppleSayProvider
+from providers.synthetic import SyntheticProvider
+from providers import timing
 from providers.xtts import XTTSProvider
 
-try:
-    # Kokoro pipeline loads models/voices and keeps them in memory
-    from kokoro import KPipeline  # type: ignore
-except Exception as e:  # pragma: no cover
-    raise RuntimeError(
-        f"Failed to import kokoro. Ensure 'kokoro' is installed in this environment. Error: {e}"
-    )
+# Providers to load; "synthetic" is a model-free stand-in for benchmarks
+ENABLED_PROVIDERS = {
+    p.strip()
+    for p in os.environ.get("KOKORO_PROVIDERS", "kokoro,apple_say,xtts").split(",")
+    if p.strip()
+}
+
+# Providers load in the background; requests wait for or route around them
+_readiness = ProviderReadiness()
+for _key in sorted(ENABLED_PROVIDERS):
+    _readiness.expect(_key)
 
 
 class SpeechIn(BaseModel):
@@ -30,7 +82,9 @@ class SpeechIn(BaseModel):
     input: str = Field(description="Text to synthesize")
     voice: str = Field(default="af_heart", description="Kokoro voice id")
     format: str = Field(
-        default="wav", pattern="^(mp3|ogg|wav)$", description="Output format"
+        default="wav",
+        pattern="^(mp3|ogg|opus|wav)$",
+        description="Output format (ogg uses KOKORO_OGG_CODEC, opus is Ogg/Opus)",
     )
     # Keep these fields for API compatibility, but they are ignored in the minimal path
     speed: float = Field(default=1.0, description="Playback speed multiplier (ignored)")
@@ -42,6 +96,14 @@ class SpeechIn(BaseModel):
     languageCode: Optional[str] = Field(
         default=None, description="ja-JP, sv-SE, en-US, …"
     )
+    stream: bool = Field(
+        default=False,
+        description="Send audio chunked as each segment is synthesized (wav only)",
+    )
+    phonemes: Optional[str] = Field(
+        default=None,
+        description="Pre-computed misaki phonemes; skips G2P (kokoro, kokoro_onnx)",
+    )
 
 
 LOG_FILE = os.environ.get("KOKORO_LOG_FILE") or os.path.join(
@@ -67,6 +129,7 @@ if app_logger.level == logging.NOTSET:
     app_logger.setLevel(logging.INFO)
 
 APP_TOKEN = os.environ.get("APP_TOKEN") or os.environ.get("KOKORO_BEARER")
+ADMIN_TOKEN = os.environ.get("KOKORO_ADMIN_TOKEN") or APP_TOKEN
 LANG_CODE = os.environ.get("KOKORO_LANG", "en-us")
 MAX_CONCURRENT_REQUESTS = int(os.environ.get("KOKORO_MAX_CONCURRENT", "8"))
 app_logger.info(
@@ -76,11 +139,79 @@ app_logger.info(
     MAX_CONCURRENT_REQUESTS,
 )
 
-# Track concurrent requests for rate limiting
-_tts_concurrent_count = 0
-_tts_lock = Lock()
+# Content-addressed cache of encoded responses (memory LRU + optional disk tier)
+_cache = SynthesisCache(
+    max_bytes=int(float(os.environ.get("KOKORO_CACHE_MAX_MB", "128")) * 1024 * 1024),
+    disk_dir=os.environ.get("KOKORO_CACHE_DIR") or None,
+    disk_max_bytes=int(
+        float(os.environ.get("KOKORO_CACHE_DISK_MAX_MB", "1024")) * 1024 * 1024
+    ),
+    ttl_seconds=float(os.environ.get("KOKORO_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+)
+app_logger.info(
+    "cache: memory_bytes=%s disk_dir=%s disk_max_bytes=%s ttl=%s",
+    _cache.max_bytes,
+    _cache.disk_dir or "",
+    _cache.disk_max_bytes,
+    _cache.ttl_seconds,
+)
+
+# G2P results per (language, sentence), shared by the Kokoro providers;
+# KOKORO_G2P_CACHE_PATH also keeps them in SQLite across restarts
+_g2p_cache: Optional[G2PCache] = None
+if float(os.environ.get("KOKORO_G2P_CACHE_MB", "32")) > 0:
+    _g2p_cache = G2PCache(
+        int(float(os.environ.get("KOKORO_G2P_CACHE_MB", "32")) * 1024 * 1024),
+        path=os.environ.get("KOKORO_G2P_CACHE_PATH") or None,
+        max_rows=int(os.environ.get("KOKORO_G2P_CACHE_ROWS", "200000")),
+    )
+
+# Part of every cache key: the model each provider loaded, plus
+# KOKORO_CACHE_VERSION to invalidate entries by hand
+_model_versions: Dict[str, str] = {}
+CACHE_VERSION = os.environ.get("KOKORO_CACHE_VERSION", "")
+
+# Identical non-streaming requests in flight at the same time run once
+COALESCE = os.environ.get("KOKORO_COALESCE", "1") != "0"
+_inflight: SingleFlight[Tuple[bytes | memoryview, str]] = SingleFlight()
 
-# Detect MP3 capability (pydub + ffmpeg available)
+# Sampled debug dumps of rendered audio, written off the request path
+_dumper = DumpWriter(
+    os.environ.get("KOKORO_DUMP_DIR") or os.path.dirname(__file__),
+    sample_rate=float(os.environ.get("KOKORO_DUMP_SAMPLE_RATE", "0.01")),
+    max_queue=int(os.environ.get("KOKORO_DUMP_QUEUE", "64")),
+    max_bytes=int(float(os.environ.get("KOKORO_DUMP_MAX_MB", "512")) * 1024 * 1024),
+    max_age_seconds=float(os.environ.get("KOKORO_DUMP_MAX_AGE_HOURS", "72")) * 3600,
+    on_write=lambda provider_key, seconds: metrics.STAGE_SECONDS.labels(
+        provider_key, "dump"
+    ).observe(seconds),
+)
+app_logger.info(
+    "dumps: dir=%s sample_rate=%s max_bytes=%s max_age=%ss",
+    _dumper.root,
+    _dumper.sample_rate,
+    _dumper.max_bytes,
+    _dumper.max_age_seconds,
+)
+
+# MP3 is encoded in-process by libsndfile when it was built with LAME/mpg123;
+# pydub + ffmpeg is kept as a fallback for older libsndfile builds.
+SNDFILE_MP3 = sndfile_supports("MP3", "MPEG_LAYER_III")
+MP3_PRESET = os.environ.get("KOKORO_MP3_PRESET", "speech")
+if MP3_PRESET not in MP3_PRESETS:
+    app_logger.warning("unknown KOKORO_MP3_PRESET=%s, using speech", MP3_PRESET)
+    MP3_PRESET = "speech"
+
+# Ogg/Opus and Ogg/Vorbis are encoded in-process by libsndfile
+OGG_CODECS = {
+    codec
+    for codec, subtype in (("opus", "OPUS"), ("vorbis", "VORBIS"))
+    if sndfile_supports("OGG", subtype)
+}
+OGG_CODEC = os.environ.get("KOKORO_OGG_CODEC", "opus").lower()
+OGG_PRESET = os.environ.get("KOKORO_OGG_PRESET", "speech")
+
+# Detect MP3 capability (libsndfile, or pydub + ffmpeg available)
 try:
     from pydub import AudioSegment  # type: ignore
 
@@ -89,121 +220,742 @@ try:
     except Exception:  # pragma: no cover
         which = None  # type: ignore
     _ffmpeg_path = None if which is None else which("ffmpeg")
-    MP3_CAPABLE = _ffmpeg_path is not None
+    MP3_CAPABLE = SNDFILE_MP3 or _ffmpeg_path is not None
 except Exception:  # pragma: no cover
     AudioSegment = None  # type: ignore
-    MP3_CAPABLE = False
+    MP3_CAPABLE = SNDFILE_MP3
 
-# Preload on startup to avoid cold starts and repeated downloads
-pipe = KPipeline(lang_code=LANG_CODE)
+# Local voice packs (default to app folder assets/kokoro-voices/)
+VOICES_DIR = Path(
+    os.environ.get(
+        "KOKORO_VOICES_DIR", str(Path(__file__).parent / "assets" / "kokoro-voices")
+    )
+)
 
-# Provider registry
-_providers: dict[str, object] = {
-    "kokoro": KokoroProvider(pipe),
-}
+# Resident Kokoro voices: a preloaded, pinned hot set plus a bounded LRU
+PRELOAD_VOICES = [
+    v.strip()
+    for v in os.environ.get("KOKORO_PRELOAD_VOICES", "af_heart").split(",")
+    if v.strip()
+]
 
-# Instantiate optional providers defensively
-try:
-    _apple = AppleSayProvider()
-    if _apple.is_available():
-        _providers["apple_say"] = _apple
-except Exception:
-    pass
-try:
-    _xtts = XTTSProvider(
-        speakers_dir=str(Path(__file__).parent / "assets" / "xtts-speakers")
+# One KPipeline per language, created on demand and sharing pipe's model
+_kokoro_langs = [
+    c
+    for c in (
+        kokoro_lang_code(t) for t in os.environ.get("KOKORO_LANGS", "").split(",")
     )
-    _providers["xtts"] = _xtts
-    # Warm up XTTS briefly (lazy-loads torch/TTS internally)
+    if c
+]
+_kokoro_default_lang = kokoro_lang_code(LANG_CODE) or LANG_CODE
+
+# Optional multi-process mode: fork Kokoro workers that share the loaded
+# weights and voice packs copy-on-write. Must run before any thread starts,
+# so Kokoro then loads eagerly instead of in the background.
+PROCESS_WORKERS = int(os.environ.get("KOKORO_PROCESS_WORKERS", "0"))
+
+# Optional micro-batching of concurrent Kokoro forward passes
+BATCH_MAX = int(os.environ.get("KOKORO_BATCH_MAX", "1"))
+
+# Set by _load_kokoro once the model is in memory
+KPipeline = None
+pipe = None
+_voices: Optional[KokoroVoiceManager] = None
+_pipelines: Optional[KokoroPipelinePool] = None
+_kokoro: Optional[KokoroProvider] = None
+_process_pool: Optional[ProcessWorkerPool] = None
+_batcher = None
+_engine: Optional[KokoroEngine] = None
+# Probed once torch is imported by a loader; /healthz never imports it
+_mps_ok = False
+
+
+def _pool_workers(key: str) -> int:
+    """Worker threads of the provider's inference pool."""
+    # In process mode each worker thread drives one child process
+    return workers_for(
+        key,
+        default=PROCESS_WORKERS if key == "kokoro" and PROCESS_WORKERS > 0 else None,
+    )
+
+
+def _build_pipeline(code: str):
+    with metrics.timed_load(f"kokoro_pipeline_{code}"):
+        return KPipeline(lang_code=code, model=pipe.model)
+
+
+def _probe_mps() -> None:
+    global _mps_ok
+    torch = sys.modules.get("torch")
     try:
-        _xtts.warmup()
+        _mps_ok = bool(
+            torch is not None
+            and getattr(torch.backends, "mps", None)
+            and torch.backends.mps.is_available()
+        )
     except Exception:
-        pass
+        _mps_ok = False
+
+
+def _make_batcher():
+    if BATCH_MAX <= 1:
+        return None
+    if _process_pool is not None:
+        app_logger.warning(
+            "batching disabled: not supported with KOKORO_PROCESS_WORKERS"
+        )
+        return None
     try:
-        spk_path = Path(_xtts.speakers_dir)
+        import inspect
+
+        if "model" not in inspect.signature(pipe.__call__).parameters:
+            raise RuntimeError("KPipeline.__call__ does not accept model=")
+        from providers.kokoro_batching import KokoroBatcher
+
+        batcher = KokoroBatcher(
+            pipe.model,
+            max_batch=BATCH_MAX,
+            max_wait_ms=float(os.environ.get("KOKORO_BATCH_WAIT_MS", "5")),
+            pad_tolerance=float(os.environ.get("KOKORO_BATCH_PAD_TOLERANCE", "0.15")),
+            on_batch=metrics.BATCH_SIZE.labels("kokoro").observe,
+        )
+        app_logger.info(
+            "batching: max_batch=%s max_wait_ms=%s",
+            batcher.max_batch,
+            batcher.max_wait_s * 1000.0,
+        )
+        return batcher
+    except Exception as ex:
+        app_logger.warning("batching disabled: %s", repr(ex))
+        return None
+
+
+def _load_kokoro() -> object:
+    """Import Kokoro, load the model and preload voices.
+
+    Returns the object serving "kokoro" requests (the process pool in
+    multi-process mode).
+    """
+    global KPipeline, pipe, _voices, _pipelines, _kokoro, _process_pool, _batcher
+    global _engine
+    with metrics.timed_load("kokoro"):
+        try:
+            # Kokoro pipeline loads models/voices and keeps them in memory
+            from kokoro import KPipeline as _KPipeline  # type: ignore
+        except Exception as e:
+            raise RuntimeError(
+                f"Failed to import kokoro. Ensure 'kokoro' is installed in this environment. Error: {e}"
+            )
+        KPipeline = _KPipeline
+        pipe = KPipeline(lang_code=LANG_CODE)
+    _probe_mps()
+
+    # One forward pass per kokoro pool worker may run at once
+    engine = KokoroEngine.from_env(_pool_workers("kokoro"))
+    if PROCESS_WORKERS > 0:
+        # Children size their own pools; compiled graphs do not survive fork
+        engine.threads = engine.interop_threads = 0
+        engine.compile = False
+    engine.configure_threads()
+
+    voices = KokoroVoiceManager(
+        pipe,
+        voices_dir=str(VOICES_DIR),
+        max_bytes=int(
+            float(os.environ.get("KOKORO_VOICE_CACHE_MB", "256")) * 1024 * 1024
+        ),
+    )
+    with metrics.timed_load("kokoro_voices"):
+        for v in PRELOAD_VOICES:
+            try:
+                voices.prewarm([v], pin=True)
+            except Exception as ex:
+                app_logger.warning("preload voice %s failed: %s", v, repr(ex))
+    app_logger.info(
+        "voices: preloaded=%s max_bytes=%s",
+        [v["id"] for v in voices.stats()["resident"]],
+        voices.max_bytes,
+    )
+    try:
+        with metrics.timed_load("kokoro_engine"):
+            engine.apply(
+                pipe.model, voices.get(PRELOAD_VOICES[0]) if PRELOAD_VOICES else None
+            )
+    except Exception as ex:
+        app_logger.warning("engine: optimizations not applied: %s", repr(ex))
+    _engine = engine
+
+    pipelines = KokoroPipelinePool(
+        pipe,
+        _build_pipeline,
+        default_lang=_kokoro_default_lang,
+        languages=_kokoro_langs or None,
+        max_pipelines=int(os.environ.get("KOKORO_MAX_PIPELINES", "4")),
+    )
+    app_logger.info(
+        "kokoro languages: %s max_pipelines=%s",
+        pipelines.available_languages(),
+        pipelines.max_pipelines,
+    )
+    kokoro = KokoroProvider(
+        pipe, voices=voices, pipelines=pipelines, g2p_cache=_g2p_cache
+    )
+
+    if PROCESS_WORKERS > 0:
+        _process_pool = ProcessWorkerPool(
+            kokoro,
+            workers=PROCESS_WORKERS,
+            torch_threads=int(
+                os.environ.get(
+                    "KOKORO_PROCESS_TORCH_THREADS",
+                    str(max(1, (os.cpu_count() or 1) // PROCESS_WORKERS)),
+                )
+            ),
+            acquire_timeout=QUEUE_TIMEOUT_SECONDS,
+        )
+        app_logger.info(
+            "process pool: workers=%s preloaded_voices=%s",
+            PROCESS_WORKERS,
+            PRELOAD_VOICES,
+        )
+    _batcher = _make_batcher()
+    kokoro.batcher = _batcher
+    _voices, _pipelines, _kokoro = voices, pipelines, kokoro
+    return _process_pool if _process_pool is not None else kokoro
+
+
+def _load_apple_say() -> object:
+    apple = AppleSayProvider()
+    if not apple.is_available():
+        raise RuntimeError("'say' is not available on this system")
+    # Prime the voice list used by routing and the catalog
+    apple.voices()
+    return apple
+
+
+XTTS_SPEAKERS_DIR = Path(__file__).parent / "assets" / "xtts-speakers"
+
+
+def _load_xtts() -> object:
+    xtts = XTTSProvider(
+        speakers_dir=str(XTTS_SPEAKERS_DIR),
+        latents_dir=os.environ.get("KOKORO_XTTS_LATENTS_DIR") or None,
+    )
+    # Warm up XTTS briefly (lazy-loads torch/TTS internally)
+    try:
+        with metrics.timed_load("xtts"):
+            xtts.warmup()
+    except Exception as ex:
+        app_logger.warning("xtts warmup failed: %s", repr(ex))
+    _probe_mps()
+    try:
+        spk_path = Path(xtts.speakers_dir)
         spk_count = len(list(spk_path.glob("*.wav"))) if spk_path.exists() else 0
         app_logger.info(
             "xtts init: speakers_dir=%s wav_files=%s", str(spk_path), spk_count
         )
     except Exception as _ex:
         app_logger.warning("xtts init: failed to inspect speakers dir: %s", repr(_ex))
-except Exception:
-    pass
+    return xtts
+
+
+# Kokoro exported to ONNX (scripts/export_kokoro_onnx.py), run on CPU
+KOKORO_ONNX_DIR = Path(
+    os.environ.get(
+        "KOKORO_ONNX_DIR", str(Path(__file__).parent / "assets" / "kokoro-onnx")
+    )
+)
+
+
+def _load_kokoro_onnx() -> object:
+    from providers.kokoro_onnx import KokoroOnnxProvider
+
+    with metrics.timed_load("kokoro_onnx"):
+        provider = KokoroOnnxProvider(
+            str(KOKORO_ONNX_DIR),
+            model_file=os.environ.get("KOKORO_ONNX_MODEL") or None,
+            threads=int(os.environ.get("KOKORO_ONNX_THREADS", "0")),
+            default_lang=_kokoro_default_lang,
+            languages=_kokoro_langs or None,
+            g2p_cache=_g2p_cache,
+        )
+    app_logger.info(
+        "kokoro_onnx: model=%s voices=%s",
+        provider.model_path,
+        len(provider.voices()),
+    )
+    return provider
+
+
+def _load_synthetic() -> object:
+    return SyntheticProvider(
+        ms_per_char=float(os.environ.get("KOKORO_SYNTHETIC_MS_PER_CHAR", "2")),
+        seconds_per_char=float(
+            os.environ.get("KOKORO_SYNTHETIC_SECONDS_PER_CHAR", "0.06")
+        ),
+        busy=os.environ.get("KOKORO_SYNTHETIC_BUSY", "0") == "1",
+    )
+
+
+_LOADERS = {
+    "kokoro": _load_kokoro,
+    "apple_say": _load_apple_say,
+    "xtts": _load_xtts,
+    "kokoro_onnx": _load_kokoro_onnx,
+    "synthetic": _load_synthetic,
+}
+
+# Provider registry, filled as loaders finish
+_providers: dict[str, object] = {}
+
+# Dedicated inference workers per provider, fed by bounded queues
+QUEUE_DEPTH = int(
+    os.environ.get("KOKORO_QUEUE_DEPTH", str(MAX_CONCURRENT_REQUESTS * 8))
+)
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("KOKORO_QUEUE_TIMEOUT_SECONDS", "30"))
+# How long a request waits for its provider to finish loading
+READY_TIMEOUT_SECONDS = float(
+    os.environ.get("KOKORO_READY_TIMEOUT_SECONDS", str(QUEUE_TIMEOUT_SECONDS))
+)
+_pools: dict[str, InferencePool] = {}
+app_logger.info(
+    "inference queues: queue_depth=%s queue_timeout=%ss ready_timeout=%ss",
+    QUEUE_DEPTH,
+    QUEUE_TIMEOUT_SECONDS,
+    READY_TIMEOUT_SECONDS,
+)
+
+
+# (provider, load seconds) for providers loaded before the server starts
+_preloaded: dict[str, Tuple[object, float]] = {}
+if "kokoro" in ENABLED_PROVIDERS and PROCESS_WORKERS > 0:
+    _readiness.loading("kokoro")
+    _t0 = time.perf_counter()
+    try:
+        _preloaded["kokoro"] = (_load_kokoro(), time.perf_counter() - _t0)
+    except Exception as ex:
+        _readiness.failed("kokoro", repr(ex))
+        app_logger.error("kokoro load failed: %s", repr(ex))
+
+
+# Server-side chunking: input above a provider's maxCharsPerRequest is split
+# on paragraph/sentence boundaries, synthesized in parallel and stitched
+MAX_INPUT_CHARS = int(os.environ.get("KOKORO_MAX_INPUT_CHARS", "100000"))
+STITCH_MODE = os.environ.get("KOKORO_STITCH_MODE", "silence").lower()
+if STITCH_MODE not in ("silence", "crossfade"):
+    app_logger.warning("unknown KOKORO_STITCH_MODE=%s, using silence", STITCH_MODE)
+    STITCH_MODE = "silence"
+STITCH_MS = int(
+    os.environ.get("KOKORO_STITCH_MS", "150" if STITCH_MODE == "silence" else "30")
+)
+# Pieces of one request in flight at once; 0 means half the provider's
+# workers, so one long request cannot occupy the whole pool
+CHUNK_PARALLEL = max(0, int(os.environ.get("KOKORO_CHUNK_PARALLEL", "0")))
+
+
+def _register_provider(key: str, provider: object) -> None:
+    """Create the provider's inference pool, then make it routable."""
+    pool = InferencePool(key, workers=_pool_workers(key), max_queue=QUEUE_DEPTH)
+    _pools[key] = pool
+    _model_versions[key] = _describe_model(key, provider)
+    _providers[key] = provider
+    app_logger.info("inference pool: provider=%s workers=%s", key, pool.workers)
+
+
+# Requests run once per provider before it is marked ready, so the first real
+# request does not pay for lazy initialization (G2P models, kernels, caches).
+# KOKORO_WARMUP_CORPUS: JSON file with a list of
+# {"provider", "text", "voice"?, "languageCode"?, "speed"?}.
+_WARMUP_SHORT = "Hello there."
+_WARMUP_LONG = (
+    "This is a longer warmup sentence, so that the model sees an input of "
+    "realistic length before the first request arrives."
+)
+
+
+def _load_warmup_corpus() -> List[dict]:
+    if os.environ.get("KOKORO_WARMUP", "1") == "0":
+        return []
+    path = os.environ.get("KOKORO_WARMUP_CORPUS")
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+            return [i for i in items if isinstance(i, dict) and i.get("text")]
+        except Exception as ex:
+            app_logger.warning("warmup corpus %s unreadable: %s", path, repr(ex))
+            return []
+    corpus = []
+    for key in ("kokoro", "kokoro_onnx"):
+        corpus += [
+            {"provider": key, "text": _WARMUP_SHORT, "voice": v} for v in PRELOAD_VOICES
+        ]
+        corpus.append({"provider": key, "text": _WARMUP_LONG})
+    corpus.append({"provider": "synthetic", "text": _WARMUP_SHORT})
+    return corpus
+
+
+WARMUP_CORPUS = _load_warmup_corpus()
+
+
+def _warm_up(key: str, provider: object) -> None:
+    items = [i for i in WARMUP_CORPUS if i.get("provider") == key]
+    if not items:
+        return
+    with metrics.timed_load(f"warmup_{key}"):
+        for item in items:
+            try:
+                provider.synthesize(  # type: ignore[attr-defined]
+                    text=item["text"],
+                    voiceId=item.get("voice"),
+                    speed=item.get("speed"),
+                    languageCode=item.get("languageCode"),
+                )
+            except Exception as ex:
+                app_logger.warning("warmup %s failed: %s", key, repr(ex))
+    app_logger.info("warmup: provider=%s requests=%s", key, len(items))
+
+
+def _load_provider(key: str) -> None:
+    """Load, warm up and register one provider (runs on its own thread)."""
+    t0 = time.perf_counter()
+    try:
+        if key in _preloaded:
+            provider, _ = _preloaded.pop(key)
+        else:
+            _readiness.loading(key)
+            provider = _LOADERS[key]()
+        _warm_up(key, provider)
+        _register_provider(key, provider)
+    except Exception as ex:
+        _readiness.failed(key, repr(ex))
+        app_logger.error("provider %s failed to load: %s", key, repr(ex))
+        return
+    _readiness.ready(key, time.perf_counter() - t0)
+    app_logger.info("provider ready: %s in %.2fs", key, time.perf_counter() - t0)
+    _catalog.refresh()
+
+
+def _start_loaders() -> None:
+    """Load every enabled provider in the background; the app serves meanwhile."""
+    for key in sorted(ENABLED_PROVIDERS):
+        if key not in _LOADERS:
+            _readiness.failed(key, "unknown provider")
+            app_logger.warning("unknown provider in KOKORO_PROVIDERS: %s", key)
+            continue
+        if not _readiness.is_pending(key):
+            continue
+        threading.Thread(
+            target=_load_provider, args=(key,), name=f"load-{key}", daemon=True
+        ).start()
 
 
 def _choose_provider(requested: Optional[str], language_code: Optional[str]) -> str:
-    """Select provider by explicit request or language hint (non-EN -> xtts/apple)."""
-    if requested and requested in _providers:
+    """Select provider by explicit request or language hint.
+
+    Languages Kokoro covers stay on Kokoro; others go to apple_say (ja/sv) or xtts.
+    Providers still loading count as available (requests wait for them);
+    providers that failed to load are routed around.
+    """
+    if requested and _usable(requested):
         return requested
+    if _kokoro_supports(language_code):
+        return "kokoro"
+    if not _usable("kokoro") and _kokoro_onnx_supports(language_code):
+        return "kokoro_onnx"
     if language_code and not language_code.lower().startswith("en"):
-        if "apple_say" in _providers and language_code.lower().startswith(("ja", "sv")):
+        if _usable("apple_say") and language_code.lower().startswith(("ja", "sv")):
             return "apple_say"
-        if "xtts" in _providers:
+        if _usable("xtts"):
             return "xtts"
+    if not _usable("kokoro") and _providers:
+        # Kokoro disabled or failed: fall back to the first loaded provider
+        return next(iter(_providers))
     return "kokoro"
 
 
+def _usable(key: str) -> bool:
+    return key in _providers or _readiness.is_pending(key)
+
+
+def _configured_kokoro_lang(language_code: Optional[str]) -> bool:
+    code = kokoro_lang_code(language_code)
+    langs = set(_kokoro_langs or KOKORO_LANGUAGES) | {_kokoro_default_lang}
+    return code is not None and code in langs
+
+
+def _kokoro_supports(language_code: Optional[str]) -> bool:
+    if _pipelines is not None:
+        return _pipelines.supports(language_code)
+    # Still loading: decide from configuration alone
+    return _readiness.is_pending("kokoro") and _configured_kokoro_lang(language_code)
+
+
+def _kokoro_onnx_supports(language_code: Optional[str]) -> bool:
+    """Kokoro-on-ONNX stands in for Kokoro when the torch backend is off."""
+    onnx = _providers.get("kokoro_onnx")
+    if onnx is not None:
+        return onnx.supports(language_code or LANG_CODE)  # type: ignore[attr-defined]
+    return _readiness.is_pending("kokoro_onnx") and _configured_kokoro_lang(
+        language_code or LANG_CODE
+    )
+
+
 app = FastAPI(title="Kokoro TTS Sidecar", version="0.1.0")
 
 
-@app.get("/healthz")
-def healthz():
-    try:
-        import torch  # type: ignore
+@app.exception_handler(WorkerUnavailableError)
+async def _worker_unavailable(_request, ex: WorkerUnavailableError):
+    metrics.REJECTED.labels(ex.provider, "worker_unavailable").inc()
+    app_logger.warning("worker unavailable: %s", ex)
+    return Response(
+        content=json.dumps({"detail": str(ex)}),
+        media_type="application/json",
+        status_code=503,
+        headers={"Retry-After": _retry_after(QUEUE_TIMEOUT_SECONDS)},
+    )
+
 
-        mps_ok = bool(
-            getattr(torch.backends, "mps", None) and torch.backends.mps.is_available()
+@app.get("/metrics")
+def metrics_endpoint():
+    if not metrics.AVAILABLE:
+        raise HTTPException(
+            status_code=501, detail="prometheus_client is not installed"
         )
-    except Exception:
-        mps_ok = False
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
+@app.get("/livez")
+def livez():
+    """Process is up and serving; says nothing about models."""
+    return {"ok": True}
+
+
+def _readiness_response(keys: List[str]) -> Response:
+    states = _readiness.snapshot()
+    body = {
+        "ready": bool(keys) and all(k in _providers for k in keys),
+        "providers": states,
+    }
+    return Response(
+        content=json.dumps(body),
+        media_type="application/json",
+        status_code=200 if body["ready"] else 503,
+    )
+
+
+@app.get("/readyz")
+def readyz():
+    """200 once the default provider (Kokoro unless disabled) can serve."""
+    if "kokoro" in ENABLED_PROVIDERS:
+        return _readiness_response(["kokoro"])
+    return _readiness_response(list(_providers)[:1])
+
+
+@app.get("/readyz/{provider}")
+def readyz_provider(provider: str):
+    return _readiness_response([provider])
+
+
+@app.get("/healthz")
+def healthz():
     apple_ok = "apple_say" in _providers
     return {
         "ok": True,
         "lang": LANG_CODE,
         "mp3": bool(MP3_CAPABLE),
         "apple_say": apple_ok,
-        "mps": mps_ok,
+        "mps": _mps_ok,
+        "providers": _readiness.snapshot(),
+        "cache": _cache.stats(),
+        "coalescing": _inflight.stats() if COALESCE else None,
+        "g2p_cache": _g2p_cache.stats() if _g2p_cache is not None else None,
+        "voices": _voices.stats() if _voices is not None else None,
+        "pipelines": _pipelines.stats() if _pipelines is not None else None,
+        "xtts": (
+            _providers["xtts"].stats()  # type: ignore[attr-defined]
+            if "xtts" in _providers
+            else None
+        ),
+        "kokoro_onnx": (
+            _providers["kokoro_onnx"].stats()  # type: ignore[attr-defined]
+            if "kokoro_onnx" in _providers
+            else None
+        ),
+        "say": (
+            _providers["apple_say"].stats()  # type: ignore[attr-defined]
+            if "apple_say" in _providers
+            else None
+        ),
+        "catalog": _catalog.stats(),
+        "dumps": _dumper.stats(),
+        "queues": {k: p.stats() for k, p in list(_pools.items())},
+        "batching": _batcher.stats() if _batcher is not None else None,
+        "engine": _engine.stats() if _engine is not None else None,
+        "process_pool": (_process_pool.stats() if _process_pool is not None else None),
     }
 
 
-# Dynamic voice discovery from local checkpoints (default to app folder assets/kokoro-voices/)
-VOICES_DIR = Path(
-    os.environ.get(
-        "KOKORO_VOICES_DIR", str(Path(__file__).parent / "assets" / "kokoro-voices")
+def _require_admin(authorization: Optional[str]) -> None:
+    if ADMIN_TOKEN and authorization != f"Bearer {ADMIN_TOKEN}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+class VoicesAdminIn(BaseModel):
+    voices: List[str] = Field(min_length=1, description="Kokoro voice ids")
+    pin: bool = Field(
+        default=False, description="Keep prewarmed voices resident (prewarm only)"
     )
-)
 
 
-@app.get("/v1/voices")
-def list_voices(rich: bool = False):
-    # Back-compat: default returns Kokoro voice ids (string[])
-    if not rich:
+def _voices_admin_check() -> None:
+    if _voices is None:
+        raise HTTPException(status_code=409, detail="Kokoro is not loaded")
+    if _process_pool is not None:
+        # Each worker process owns its own copy; the parent's cache is moot
+        raise HTTPException(
+            status_code=409,
+            detail="Voice admin is unavailable with KOKORO_PROCESS_WORKERS",
+        )
+
+
+@app.post("/admin/voices/prewarm")
+def admin_voices_prewarm(
+    req: VoicesAdminIn, authorization: Optional[str] = Header(default=None)
+):
+    _require_admin(authorization)
+    _voices_admin_check()
+    loaded: list[str] = []
+    failed: dict[str, str] = {}
+    for vid in req.voices:
         try:
-            if VOICES_DIR.is_dir():
-                names = {p.stem for p in VOICES_DIR.glob("*.pt")}
-                names.update({p.stem for p in VOICES_DIR.glob("*.pth")})
-                if names:
-                    return {"voices": sorted(names)}
+            loaded += _voices.prewarm([vid], pin=req.pin)
         except Exception as ex:
-            app_logger.warning("voices scan failed: %s", repr(ex))
-        # Fallback
-        app_logger.warning("voices scan failed, falling back to default voice")
-        return {"voices": ["af_heart"]}
+            app_logger.warning("prewarm voice %s failed: %s", vid, repr(ex))
+            failed[vid] = repr(ex)
+    return {"loaded": loaded, "failed": failed, "voices": _voices.stats()}
 
-    # rich=true: merge across providers with metadata
-    voices: list[dict[str, str]] = []
-    # Kokoro
+
+@app.post("/admin/voices/evict")
+def admin_voices_evict(
+    req: VoicesAdminIn, authorization: Optional[str] = Header(default=None)
+):
+    _require_admin(authorization)
+    _voices_admin_check()
+    return {"evicted": _voices.evict(req.voices), "voices": _voices.stats()}
+
+
+# On-demand sampling profiler for the next N synthesis requests
+_profiler = SamplingProfiler()
+
+
+class ProfileAdminIn(BaseModel):
+    requests: int = Field(default=10, ge=1, le=1000, description="Requests to profile")
+    interval_ms: float = Field(
+        default=5.0, ge=1.0, le=1000.0, description="Sampling interval"
+    )
+    timeout_seconds: float = Field(
+        default=60.0,
+        gt=0,
+        le=3600,
+        description="Return what was sampled if fewer requests arrive in time",
+    )
+    memory: bool = Field(default=True, description="Capture tracemalloc peak")
+
+
+@app.post("/admin/profile")
+async def admin_profile(
+    req: ProfileAdminIn, authorization: Optional[str] = Header(default=None)
+):
+    """Profile the next ``requests`` synthesis requests.
+
+    Returns collapsed stacks (one ``frame;frame;... count`` line per stack),
+    ready for flamegraph.pl or speedscope.
+    """
+    _require_admin(authorization)
+    try:
+        session = _profiler.start(
+            req.requests, req.interval_ms / 1000.0, memory=req.memory
+        )
+    except RuntimeError as ex:
+        raise HTTPException(status_code=409, detail=str(ex))
+    app_logger.info(
+        "profiling next %s requests interval=%sms memory=%s",
+        req.requests,
+        req.interval_ms,
+        req.memory,
+    )
+    try:
+        await asyncio.wait_for(
+            asyncio.wrap_future(session.done), timeout=req.timeout_seconds
+        )
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        await asyncio.to_thread(_profiler.finish, session)
+    headers = {
+        "Content-Disposition": f'attachment; filename="profile-{int(time.time())}.folded"',
+        "X-Profile-Requests": str(session.completed),
+        "X-Profile-Samples": str(sum(session.samples.values())),
+        "X-Profile-Seconds": f"{session.elapsed_s:.3f}",
+    }
+    if session.peak_bytes is not None:
+        headers["X-Tracemalloc-Peak-Bytes"] = str(session.peak_bytes)
+    return Response(content=session.folded(), media_type="text/plain", headers=headers)
+
+
+# Dynamic voice discovery from local checkpoints in VOICES_DIR
+def _kokoro_voice_names() -> list[str]:
+    if "kokoro" not in _providers:
+        return []
     try:
         if VOICES_DIR.is_dir():
             names = {p.stem for p in VOICES_DIR.glob("*.pt")} | {
                 p.stem for p in VOICES_DIR.glob("*.pth")
             }
-            voices += [
-                {"id": n, "provider": "kokoro", "lang": LANG_CODE}
-                for n in sorted(names)
-            ]
+            return sorted(names)
     except Exception as ex:
         app_logger.warning("voices scan failed: %s", repr(ex))
+    return []
+
+
+def _kokoro_voice_lang(name: str) -> str:
+    """Language of a Kokoro voice from its lang_code prefix (af_ -> default)."""
+    code = name[:1]
+    if _pipelines is None or code not in KOKORO_LANGUAGES:
+        return LANG_CODE
+    if code == _pipelines.default_lang:
+        return LANG_CODE
+    return KOKORO_LANGUAGES[code]
+
+
+def _kokoro_languages() -> list[str]:
+    if _pipelines is None:
+        return []
+    default_tag = KOKORO_LANGUAGES.get(_pipelines.default_lang)
+    return [LANG_CODE] + [
+        t for t in _pipelines.available_languages() if t != default_tag
+    ]
+
+
+def _voices_doc(kokoro_names: list[str]) -> dict:
+    # Back-compat: default returns Kokoro voice ids (string[])
+    if kokoro_names:
+        return {"voices": kokoro_names}
+    # Fallback
+    app_logger.warning("voices scan failed, falling back to default voice")
+    return {"voices": ["af_heart"]}
+
+
+def _voices_rich_doc(kokoro_names: list[str]) -> dict:
+    # rich=true: merge across providers with metadata
+    voices: list[dict[str, str]] = []
+    # Kokoro
+    voices += [
+        {"id": n, "provider": "kokoro", "lang": _kokoro_voice_lang(n)}
+        for n in kokoro_names
+    ]
     # Apple say
     if "apple_say" in _providers:
         try:
@@ -226,13 +978,24 @@ def list_voices(rich: bool = False):
                 voices.append({"id": spk.get("id", ""), "provider": "xtts", "lang": ""})
         except Exception:
             pass
+    # Kokoro on ONNX Runtime
+    if "kokoro_onnx" in _providers:
+        voices += [
+            {**v, "provider": "kokoro_onnx"}
+            for v in _providers["kokoro_onnx"].voices()  # type: ignore[attr-defined]
+        ]
+    # Synthetic
+    if "synthetic" in _providers:
+        voices += [
+            {**v, "provider": "synthetic"}
+            for v in _providers["synthetic"].voices()  # type: ignore[attr-defined]
+        ]
     if not voices:
         return {"voices": ["af_heart"]}
     return {"voices": voices}
 
 
-@app.get("/v1/tts-config")
-def tts_config():
+def _tts_config_doc(kokoro_names: list[str]) -> dict:
     """Aggregate providers, languages, families and voices for UI config.
 
     Providers included only when available on this instance.
@@ -242,41 +1005,37 @@ def tts_config():
     families_set: set[str] = set()
     voices: list[dict] = []
 
-    # Kokoro (always present)
-    providers.append(
-        {
-            "id": "kokoro",
-            "label": "Kokoro",
-            "formats": ["wav", "mp3" if MP3_CAPABLE else "wav"],
-            "languages": [LANG_CODE],
-            "capabilities": {"ssml": False, "needsSpeakerWav": False},
-        }
-    )
-    try:
-        if VOICES_DIR.is_dir():
-            names = {p.stem for p in VOICES_DIR.glob("*.pt")} | {
-                p.stem for p in VOICES_DIR.glob("*.pth")
+    # Kokoro (unless disabled via KOKORO_PROVIDERS)
+    if "kokoro" in _providers:
+        kokoro_langs = _kokoro_languages()
+        providers.append(
+            {
+                "id": "kokoro",
+                "label": "Kokoro",
+                "formats": _output_formats(),
+                "languages": kokoro_langs,
+                "capabilities": {"ssml": False, "needsSpeakerWav": False},
             }
-            for n in sorted(names):
-                # Heuristic gender from second char like existing TS mapping
-                fam = (
-                    "female"
-                    if len(n) > 1 and n[1] == "f"
-                    else ("male" if len(n) > 1 and n[1] == "m" else "unknown")
-                )
-                voices.append(
-                    {
-                        "id": n,
-                        "provider": "kokoro",
-                        "label": n,
-                        "languageCodes": [LANG_CODE],
-                        "family": fam,
-                    }
-                )
-                families_set.add(fam)
-            languages_set.add(LANG_CODE)
-    except Exception as ex:
-        app_logger.warning("tts-config kokoro voices failed: %s", repr(ex))
+        )
+        for n in kokoro_names:
+            # Heuristic gender from second char like existing TS mapping
+            fam = (
+                "female"
+                if len(n) > 1 and n[1] == "f"
+                else ("male" if len(n) > 1 and n[1] == "m" else "unknown")
+            )
+            voices.append(
+                {
+                    "id": n,
+                    "provider": "kokoro",
+                    "label": n,
+                    "languageCodes": [_kokoro_voice_lang(n)],
+                    "family": fam,
+                }
+            )
+            families_set.add(fam)
+        if VOICES_DIR.is_dir():
+            languages_set.update(kokoro_langs)
 
     # Apple say (optional)
     if "apple_say" in _providers:
@@ -284,7 +1043,7 @@ def tts_config():
             {
                 "id": "apple_say",
                 "label": "Apple say",
-                "formats": ["wav", "mp3" if MP3_CAPABLE else "wav"],
+                "formats": _output_formats(),
                 "languages": [],  # filled below
                 "capabilities": {"ssml": False, "needsSpeakerWav": False},
             }
@@ -315,16 +1074,13 @@ def tts_config():
     if "xtts" in _providers:
         try:
             xtts = _providers["xtts"]
-            langs = []
-            try:
-                langs = xtts.languages()  # type: ignore[attr-defined]
-            except Exception:
-                langs = ["en-US", "ja-JP"]
+            # Captured when the model loaded; does not trigger a load
+            langs = xtts.languages()  # type: ignore[attr-defined]
             providers.append(
                 {
                     "id": "xtts",
                     "label": "Coqui XTTS-v2",
-                    "formats": ["wav", "mp3" if MP3_CAPABLE else "wav"],
+                    "formats": _output_formats(),
                     "languages": langs,
                     "capabilities": {"ssml": False, "needsSpeakerWav": True},
                 }
@@ -366,202 +1122,992 @@ def tts_config():
         except Exception as ex:
             app_logger.warning("xtts config error: %s", repr(ex))
 
-    data = {
+    # Kokoro on ONNX Runtime (optional)
+    if "kokoro_onnx" in _providers:
+        onnx = _providers["kokoro_onnx"]
+        onnx_langs = onnx.available_languages()  # type: ignore[attr-defined]
+        providers.append(
+            {
+                "id": "kokoro_onnx",
+                "label": "Kokoro (ONNX)",
+                "formats": _output_formats(),
+                "languages": onnx_langs,
+                "capabilities": {"ssml": False, "needsSpeakerWav": False},
+            }
+        )
+        for v in onnx.voices():  # type: ignore[attr-defined]
+            n = v["id"]
+            fam = (
+                "female"
+                if len(n) > 1 and n[1] == "f"
+                else ("male" if len(n) > 1 and n[1] == "m" else "unknown")
+            )
+            voices.append(
+                {
+                    "id": n,
+                    "provider": "kokoro_onnx",
+                    "label": n,
+                    "languageCodes": [v["lang"]],
+                    "family": fam,
+                }
+            )
+            families_set.add(fam)
+        languages_set.update(onnx_langs)
+
+    # Synthetic (benchmarks only)
+    if "synthetic" in _providers:
+        synth_voices = _providers["synthetic"].voices()  # type: ignore[attr-defined]
+        providers.append(
+            {
+                "id": "synthetic",
+                "label": "Synthetic",
+                "formats": _output_formats(),
+                "languages": sorted({v["lang"] for v in synth_voices}),
+                "capabilities": {"ssml": False, "needsSpeakerWav": False},
+            }
+        )
+        for v in synth_voices:
+            voices.append(
+                {
+                    "id": v["id"],
+                    "provider": "synthetic",
+                    "label": v["id"],
+                    "languageCodes": [v["lang"]],
+                    "family": "unknown",
+                }
+            )
+            languages_set.add(v["lang"])
+
+    return {
         "providers": providers,
         "languages": sorted(languages_set) if languages_set else [LANG_CODE],
         "families": sorted(families_set) if families_set else ["unknown"],
         "voices": voices,
     }
-    return data
 
 
-def synth_kokoro(text: str, voice: str) -> tuple[np.ndarray, int]:
-    """Iterate Kokoro generator and concatenate audio chunks to a single array."""
-    chunks: list[np.ndarray] = []
-    for _, _, audio in pipe(text, voice=voice):
-        if hasattr(audio, "detach") and hasattr(audio, "cpu"):
-            audio = audio.detach().cpu().numpy()
-        chunks.append(np.asarray(audio, dtype=np.float32).ravel())
-    if not chunks:
-        raise HTTPException(status_code=422, detail="Kokoro returned no audio")
-    return np.concatenate(chunks), 24000
+def _build_catalog() -> dict:
+    names = _kokoro_voice_names()
+    return {
+        "voices": _voices_doc(names),
+        "voices_rich": _voices_rich_doc(names),
+        "tts_config": _tts_config_doc(names),
+    }
 
 
-@app.post("/v1/audio/speech")
-def tts(req: SpeechIn, authorization: Optional[str] = Header(default=None)):
-    global _tts_concurrent_count
+def _catalog_inputs():
+    """Non-filesystem inputs of the catalog (checked by the refresh thread)."""
+    xtts = _providers.get("xtts")
+    return (
+        tuple(sorted(_providers)),
+        tuple(_pipelines.available_languages()) if _pipelines is not None else None,
+        tuple(xtts.languages()) if xtts is not None else None,  # type: ignore[attr-defined]
+    )
 
-    if APP_TOKEN and authorization != f"Bearer {APP_TOKEN}":
-        raise HTTPException(status_code=401, detail="Unauthorized")
 
-    # Check if we're at capacity (non-blocking check)
-    with _tts_lock:
-        if _tts_concurrent_count >= MAX_CONCURRENT_REQUESTS:
-            app_logger.warning(
-                "rate limit: max_concurrent=%s current=%s, rejecting request",
-                MAX_CONCURRENT_REQUESTS,
-                _tts_concurrent_count,
+def _catalog_response(name: str, if_none_match: Optional[str]) -> Response:
+    body, etag = _catalog.document(name)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/v1/voices")
+def list_voices(
+    rich: bool = False, if_none_match: Optional[str] = Header(default=None)
+):
+    return _catalog_response("voices_rich" if rich else "voices", if_none_match)
+
+
+@app.get("/v1/tts-config")
+def tts_config(if_none_match: Optional[str] = Header(default=None)):
+    """Providers, languages, families and voices for UI config (cached, ETag)."""
+    return _catalog_response("tts_config", if_none_match)
+
+
+_MEDIA_TYPES = {
+    "wav": "audio/wav",
+    "mp3": "audio/mpeg",
+    "ogg": "audio/ogg",
+    "opus": "audio/ogg",
+}
+
+
+def _ogg_codec(fmt: str) -> str:
+    """Codec for an Ogg request; raises 415 when libsndfile cannot encode it."""
+    codec = "opus" if fmt == "opus" else OGG_CODEC
+    if codec not in OGG_CODECS:
+        raise HTTPException(
+            status_code=415, detail=f"Ogg/{codec} not supported by libsndfile"
+        )
+    return codec
+
+
+def _check_format(fmt: str) -> None:
+    """Reject formats this instance cannot encode before spending inference."""
+    if fmt == "mp3" and not MP3_CAPABLE:
+        raise HTTPException(
+            status_code=415,
+            detail="MP3 requires libsndfile with MP3 or pydub + ffmpeg",
+        )
+    if fmt in ("ogg", "opus"):
+        _ogg_codec(fmt)
+
+
+def _output_formats() -> list[str]:
+    out = ["wav"]
+    if MP3_CAPABLE:
+        out.append("mp3")
+    if OGG_CODEC in OGG_CODECS:
+        out.append("ogg")
+    if "opus" in OGG_CODECS:
+        out.append("opus")
+    return out
+
+
+# Formats that can be encoded incrementally for stream=true
+_STREAM_FORMATS = {"wav"}
+if SNDFILE_MP3:
+    _STREAM_FORMATS.add("mp3")
+if OGG_CODECS:
+    _STREAM_FORMATS.update({"ogg", "opus"})
+
+# Voice/config documents built once and refreshed when voice dirs or
+# model-declared languages change
+_catalog = VoiceCatalog(
+    _build_catalog,
+    watch_paths=[
+        str(VOICES_DIR),
+        str(XTTS_SPEAKERS_DIR),
+        str(KOKORO_ONNX_DIR / "voices"),
+    ],
+    extra=_catalog_inputs,
+    refresh_seconds=float(os.environ.get("KOKORO_CATALOG_REFRESH_SECONDS", "5")),
+)
+
+
+# Server-Timing phase for each metrics stage
+_STAGE_PHASES = {
+    "synthesis": "forward",
+    "stitch": "postprocess",
+    "normalize": "postprocess",
+    "wav_encode": "encode",
+    "mp3_encode": "encode",
+    "ogg_encode": "encode",
+}
+
+
+@contextmanager
+def _stage(provider_key: str, name: str) -> Iterator[None]:
+    """Time a pipeline stage for both /metrics and Server-Timing."""
+    with timing.phase(_STAGE_PHASES[name]), metrics.stage(provider_key, name):
+        yield
+
+
+def _retry_after(seconds: float) -> str:
+    return str(max(1, int(math.ceil(seconds))))
+
+
+def _xtts_speaker_error(e: ValueError, voice: str) -> HTTPException:
+    sp = Path(__file__).parent / "assets" / "speakers" / f"{voice}.wav"
+    return HTTPException(
+        status_code=422,
+        detail=(f"{e}. Ensure speaker_wav at {sp} exists or choose a builtin speaker."),
+    )
+
+
+def _split_for(provider: object, text: str) -> List[str]:
+    """Split ``text`` into pieces within the provider's maxCharsPerRequest."""
+    limit = int(getattr(provider, "maxCharsPerRequest", 0) or 0)
+    return split_text(text, limit)
+
+
+def _texts_for(provider: object, req: SpeechIn) -> List[str]:
+    """Pieces to synthesize; phoneme input is split by the provider itself."""
+    if req.phonemes is not None:
+        return [req.input]
+    return _split_for(provider, req.input)
+
+
+def _iter_segments(
+    provider: object, provider_key: str, req: SpeechIn
+) -> Iterator[Tuple[np.ndarray, int]]:
+    """Yield (audio, sr) segments, falling back to one-shot synthesis.
+
+    Input over the provider limit is synthesized piece by piece, separated by
+    KOKORO_STITCH_MS of silence in silence mode.
+    """
+    stream_fn = getattr(provider, "stream", None)
+    texts = _texts_for(provider, req)
+    try:
+        for i, text in enumerate(texts):
+            kwargs = dict(
+                text=text,
+                voiceId=req.voice,
+                speed=req.speed,
+                languageCode=req.languageCode,
             )
+            if req.phonemes is not None:
+                kwargs["phonemes"] = req.phonemes
+            if callable(stream_fn):
+                segments = stream_fn(**kwargs)
+            else:
+                # type: ignore[attr-defined]
+                segments = iter([provider.synthesize(**kwargs)])
+            sr = 0
+            for audio, sr in segments:
+                yield audio, sr
+            if i + 1 < len(texts) and sr and STITCH_MODE == "silence":
+                yield np.zeros((int(sr) * STITCH_MS // 1000,), dtype=np.float32), sr
+    except ValueError as e:
+        # For XTTS, fail fast if no speaker can be resolved
+        if provider_key == "xtts":
+            raise _xtts_speaker_error(e, req.voice)
+        raise
+
+
+def _assemble(
+    req: SpeechIn, provider_key: str, provider: object
+) -> Tuple[PcmAssembler, int]:
+    """Synthesize ``req`` into one PcmAssembler (each segment copied once)."""
+    pcm = PcmAssembler()
+    sr = 0
+    t0 = time.perf_counter()
+    with _stage(provider_key, "synthesis"):
+        for audio, seg_sr in _iter_segments(provider, provider_key, req):
+            if not sr:
+                sr = int(seg_sr)
+            elif int(seg_sr) != sr:
+                audio = resample_linear(as_float32(audio), int(seg_sr), sr)
+            pcm.append(audio)
+    _observe_rtf(provider_key, pcm.size, sr, time.perf_counter() - t0)
+    return pcm, sr
+
+
+def _observe_rtf(provider_key: str, samples: int, sr: int, seconds: float) -> None:
+    if samples and sr and seconds > 0:
+        metrics.REALTIME_FACTOR.labels(provider_key).observe(samples / sr / seconds)
+
+
+def _render_piece(
+    req: SpeechIn, provider_key: str, provider: object
+) -> Tuple[np.ndarray, int]:
+    """Raw audio for one piece of a chunked request. Runs on an inference worker."""
+    pcm, sr = _assemble(req, provider_key, provider)
+    return pcm.samples, sr
+
+
+def _stitch(parts: List[Tuple[np.ndarray, int]]) -> Tuple[PcmAssembler, int]:
+    """Join pieces in order with KOKORO_STITCH_MS of silence or crossfade."""
+    sr = next((int(r) for a, r in parts if a.size and r), 0)
+    gap = sr * STITCH_MS // 1000
+    total = sum(a.size for a, _ in parts) + gap * max(0, len(parts) - 1)
+    pcm = PcmAssembler(initial_samples=max(1, total))
+    for audio, part_sr in parts:
+        if not audio.size:
+            continue
+        if int(part_sr) != sr:
+            audio = resample_linear(audio, int(part_sr), sr)
+        if pcm.size and STITCH_MODE == "crossfade":
+            pcm.crossfade(audio, gap)
+            continue
+        if pcm.size:
+            pcm.append_silence(gap)
+        pcm.append(audio)
+    return pcm, sr
+
+
+def _render(
+    req: SpeechIn, provider_key: str, provider: object, fmt: str
+) -> Tuple[bytes | memoryview, str]:
+    """Synthesize, normalize and encode one request. Runs on an inference worker."""
+    pcm, sr = _assemble(req, provider_key, provider)
+    return _encode(pcm, sr, req, provider_key, fmt)
+
+
+def _encode(
+    pcm: PcmAssembler, sr: int, req: SpeechIn, provider_key: str, fmt: str
+) -> Tuple[bytes | memoryview, str]:
+    """Validate, normalize and encode assembled audio.
+
+    Normalization happens in place and WAV is quantized straight into the
+    response buffer.
+    """
+    # Validate audio content
+    if pcm.size == 0:
+        raise HTTPException(status_code=422, detail="Kokoro returned empty audio")
+    if pcm.size < 1000 or pcm.peak < 1e-7:
+        raise HTTPException(status_code=422, detail="Kokoro returned silent audio")
+
+    # Peak normalization to ~-1 dBFS (avoid clipping)
+    with _stage(provider_key, "normalize"):
+        pcm.normalize(NORM_TARGET)
+    audio = pcm.samples
+
+    # Sampled requests also dump the canonical WAV (and the encoded output);
+    # WAV is only encoded when it is served, dumped or needed by pydub.
+    dump = _dumper.should_dump()
+    compressed = (fmt == "mp3" and SNDFILE_MP3) or fmt in ("ogg", "opus")
+    wav_data = b""
+    if not compressed or dump:
+        with _stage(provider_key, "wav_encode"):
+            wav_data = pcm.wav_pcm16(sr)
+    if dump:
+        with timing.phase("dump"):
+            _dumper.submit("wav", provider_key, req.voice, wav_data)
+
+    if fmt == "wav":
+        data = wav_data
+        app_logger.info("out wav bytes=%s sr=%s", len(data), sr)
+        return data, "audio/wav"
+
+    if fmt == "mp3" and SNDFILE_MP3:
+        try:
+            with _stage(provider_key, "mp3_encode"):
+                data = encode_mp3(audio, int(sr), MP3_PRESET)
+        except Exception as ex:
+            app_logger.warning("mp3 encode failed: %s", repr(ex))
+            raise HTTPException(status_code=415, detail="MP3 encode failed")
+        if dump:
+            with timing.phase("dump"):
+                _dumper.submit("mp3", provider_key, req.voice, data)
+        app_logger.info("out mp3 bytes=%s sr=%s preset=%s", len(data), sr, MP3_PRESET)
+        return data, "audio/mpeg"
+
+    if fmt == "mp3":
+        if not MP3_CAPABLE or AudioSegment is None:
+            app_logger.warning("mp3 export unavailable: pydub/ffmpeg missing")
+            raise HTTPException(
+                status_code=415,
+                detail="MP3 requires pydub + ffmpeg installed and on PATH",
+            )
+        try:
+            with _stage(provider_key, "mp3_encode"):
+                seg = AudioSegment.from_file(io.BytesIO(wav_data), format="wav")
+                out = io.BytesIO()
+                seg.export(out, format="mp3", bitrate="192k")
+                data = out.getvalue()
+            if dump:
+                with timing.phase("dump"):
+                    _dumper.submit("mp3", provider_key, req.voice, data)
+            app_logger.info("out mp3 bytes=%s sr=%s", len(data), sr)
+            return data, "audio/mpeg"
+        except HTTPException:
+            raise
+        except Exception as ex:
+            app_logger.warning("mp3 export failed: %s", repr(ex))
             raise HTTPException(
-                status_code=429,
-                detail=f"Too many concurrent requests. Maximum: {MAX_CONCURRENT_REQUESTS}",
-                headers={"Retry-After": "2"},
+                status_code=415,
+                detail="MP3 export failed; ensure ffmpeg is installed and accessible",
             )
-        _tts_concurrent_count += 1
-        current_count = _tts_concurrent_count
 
-    try:
-        provider_key = _choose_provider(req.provider, req.languageCode)
+    if fmt in ("ogg", "opus"):
+        codec = _ogg_codec(fmt)
+        try:
+            with _stage(provider_key, "ogg_encode"):
+                data = encode_ogg(audio, int(sr), codec, OGG_PRESET)
+        except Exception as ex:
+            app_logger.warning("ogg encode failed: %s", repr(ex))
+            raise HTTPException(status_code=415, detail="OGG encode failed")
+        if dump:
+            with timing.phase("dump"):
+                _dumper.submit("ogg", provider_key, req.voice, data)
         app_logger.info(
-            "incoming tts: provider=%s voice=%s fmt=%s lang=%s text_len=%s concurrent=%s",
-            provider_key,
-            req.voice,
-            req.format,
-            req.languageCode or "",
-            len(req.input or ""),
-            current_count,
+            "out ogg/%s bytes=%s sr=%s preset=%s", codec, len(data), sr, OGG_PRESET
         )
+        return data, "audio/ogg"
+
+    # Default to WAV on unknown format
+    data = wav_data
+    app_logger.info("out wav-default bytes=%s sr=%s", len(data), sr)
+    return data, "audio/wav"
 
-        provider = _providers.get(provider_key)
-        if provider is None:
+
+async def _submit(
+    pool: InferencePool, fn, *args, voice: Optional[str] = None
+) -> InferenceJob:
+    """Queue a job and wait until a worker starts it.
+
+    Waiting is bounded by KOKORO_QUEUE_TIMEOUT_SECONDS; a full queue or an
+    expired deadline is answered with Retry-After derived from the queue ETA.
+    """
+    try:
+        job = pool.submit(fn, *args)
+    except QueueFullError as e:
+        metrics.REJECTED.labels(pool.name, "queue_full").inc()
+        app_logger.warning(
+            "queue full: provider=%s stats=%s, rejecting request",
+            pool.name,
+            pool.stats(),
+        )
+        raise HTTPException(
+            status_code=429,
+            detail=f"Inference queue for {pool.name} is full",
+            headers={"Retry-After": _retry_after(e.retry_after)},
+        )
+    try:
+        await asyncio.wait_for(
+            asyncio.shield(asyncio.wrap_future(job.started)),
+            timeout=QUEUE_TIMEOUT_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        if job.cancel():
+            metrics.REJECTED.labels(pool.name, "queue_timeout").inc()
+            app_logger.warning(
+                "queue deadline: provider=%s waited=%ss, giving up",
+                pool.name,
+                QUEUE_TIMEOUT_SECONDS,
+            )
             raise HTTPException(
-                status_code=422, detail="No suitable TTS provider available"
+                status_code=503,
+                detail=f"Timed out waiting for a {pool.name} inference worker",
+                headers={"Retry-After": _retry_after(pool.eta_seconds())},
             )
-        # For XTTS, fail fast if no speaker can be resolved
-        if provider_key == "xtts":
-            try:
-                # type: ignore[attr-defined]
-                audio, sr = provider.synthesize(
-                    text=req.input,
-                    voiceId=req.voice,
-                    speed=req.speed,
-                    languageCode=req.languageCode,
-                )
-            except ValueError as e:
-                from pathlib import Path as _P
+        # A worker picked it up just as the deadline passed; keep the result
+    except asyncio.CancelledError:
+        job.cancel()
+        raise
+    metrics.QUEUE_WAIT_SECONDS.labels(pool.name, metrics.voice_label(voice)).observe(
+        job.wait_seconds
+    )
+    timing.add("queue", job.wait_seconds)
+    return job
 
-                sp = _P(__file__).parent / "assets" / "speakers" / f"{req.voice}.wav"
-                raise HTTPException(
-                    status_code=422,
-                    detail=(
-                        f"{e}. Ensure speaker_wav at {sp} exists or choose a builtin speaker."
-                    ),
-                )
-        else:
-            # type: ignore[attr-defined]
-            audio, sr = provider.synthesize(
-                text=req.input,
-                voiceId=req.voice,
-                speed=req.speed,
-                languageCode=req.languageCode,
-            )
 
-        # Validate audio content
-        if not isinstance(audio, np.ndarray) or audio.size == 0:
-            raise HTTPException(status_code=422, detail="Kokoro returned empty audio")
-        peak = float(np.max(np.abs(audio))) if audio.size else 0.0
-        if audio.size < 1000 or peak < 1e-7:
-            raise HTTPException(status_code=422, detail="Kokoro returned silent audio")
-
-        # Peak normalization to ~-1 dBFS (avoid clipping)
-        norm_target = 10 ** (-1.0 / 20.0)
-        if peak > 0 and peak > norm_target:
-            audio = (audio / peak) * norm_target
-
-        # Encode canonical WAV
-        wav_buf = io.BytesIO()
-        sf.write(
-            wav_buf,
-            audio.astype(np.float32, copy=False),
-            int(sr),
-            format="WAV",
-            subtype="PCM_16",
-        )
-        wav_buf.seek(0)
+def _stream_encoder(fmt: str, sr: int):
+    if fmt == "mp3":
+        return mp3_encoder(sr, MP3_PRESET)
+    if fmt in ("ogg", "opus"):
+        return ogg_encoder(sr, _ogg_codec(fmt), OGG_PRESET)
+    return WavStreamEncoder(sr)
+
+
+async def _stream_response(
+    pool: InferencePool,
+    req: SpeechIn,
+    provider_key: str,
+    provider: object,
+    fmt: str,
+) -> StreamingResponse:
+    """Synthesize, normalize and encode segment by segment on a worker and
+    relay the encoded bytes as they become available."""
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    t_start = time.perf_counter()
+    timings = timing.current()
+    in_flight = metrics.IN_FLIGHT.labels(provider_key)
+    in_flight.inc()
+    finished = False
+
+    def finish() -> None:
+        # Runs once the body ends, the client disconnects or setup fails
+        nonlocal finished
+        stop.set()
+        if finished:
+            return
+        finished = True
+        if timings is not None:
+            _profiler.detach(timings)
+        in_flight.dec()
+        metrics.REQUEST_SECONDS.labels(
+            provider_key, metrics.voice_label(req.voice), "miss"
+        ).observe(time.perf_counter() - t_start)
 
-        # Always dump WAV to filesystem for inspection
+    def put(item) -> None:
+        loop.call_soon_threadsafe(chunks.put_nowait, item)
+
+    def produce() -> None:
+        encoder = None
+        norm = RunningPeakNormalizer()
+        sr = 0
+        total = 0
+        samples = 0
+        t0 = time.perf_counter()
+        segments = _iter_segments(provider, provider_key, req)
         try:
-            import time as _time
-
-            dump_dir = os.path.join(os.path.dirname(__file__), "wav")
-            os.makedirs(dump_dir, exist_ok=True)
-            ts = str(_time.time_ns())
-            safe_voice = (
-                "".join(
-                    c for c in (req.voice or "voice") if c.isalnum() or c in ("-", "_")
+            while True:
+                with timing.phase("forward"):
+                    item = next(segments, None)
+                if item is None:
+                    break
+                audio, seg_sr = item
+                if stop.is_set():
+                    return
+                if not (audio.size and audio.any()):
+                    continue
+                samples += audio.size
+                if encoder is None:
+                    sr = int(seg_sr)
+                    encoder = _stream_encoder(fmt, sr)
+                elif int(seg_sr) != sr:
+                    app_logger.warning(
+                        "stream: sample rate changed mid-stream (%s -> %s), stopping",
+                        sr,
+                        seg_sr,
+                    )
+                    break
+                with timing.phase("postprocess"):
+                    block = norm.process(audio)
+                with timing.phase("encode"):
+                    data = encoder.write(block)
+                total += len(data)
+                # The first put also signals that audible audio exists
+                put(data)
+            if encoder is not None:
+                with timing.phase("encode"):
+                    data = encoder.close()
+                total += len(data)
+                put(data)
+                _observe_rtf(provider_key, samples, sr, time.perf_counter() - t0)
+                metrics.OUTPUT_BYTES.labels(provider_key, fmt).observe(total)
+                app_logger.info(
+                    "out %s-stream provider=%s bytes=%s sr=%s",
+                    fmt,
+                    provider_key,
+                    total,
+                    sr,
                 )
-                or "voice"
-            )
-            dump_path = os.path.join(
-                dump_dir, f"tts-{provider_key}-{safe_voice}-{ts}.wav"
+        except BaseException as ex:
+            put(ex)
+        finally:
+            put(None)
+
+    try:
+        await _submit(pool, produce, voice=req.voice)
+    except BaseException:
+        finish()
+        raise
+
+    async def next_chunk() -> Optional[bytes]:
+        item = await chunks.get()
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    # Wait for the first audible segment before responding so provider errors
+    # still surface as proper HTTP status codes.
+    try:
+        first = await next_chunk()
+    except BaseException:
+        finish()
+        raise
+    if first is None:
+        finish()
+        raise HTTPException(status_code=422, detail="Kokoro returned empty audio")
+
+    async def body() -> AsyncIterator[bytes]:
+        data: Optional[bytes] = first
+        try:
+            while data is not None:
+                if data:
+                    yield data
+                data = await next_chunk()
+        finally:
+            # Client went away or stream finished: stop the worker early
+            finish()
+
+    return StreamingResponse(
+        body(),
+        media_type=_MEDIA_TYPES[fmt],
+        # Phases up to the first audible segment
+        headers={
+            "X-Cache": "miss",
+            **({"Server-Timing": timings.header()} if timings is not None else {}),
+        },
+        # Covers clients that disconnect before the body starts
+        background=BackgroundTask(finish),
+    )
+
+
+async def _render_chunked(
+    pool: InferencePool,
+    req: SpeechIn,
+    texts: List[str],
+    provider_key: str,
+    provider: object,
+    fmt: str,
+) -> Tuple[bytes | memoryview, str]:
+    """Synthesize pieces of an oversized request in parallel, then stitch them
+    in order and encode once."""
+    parallel = CHUNK_PARALLEL or max(1, pool.workers // 2)
+    app_logger.info(
+        "chunked tts: provider=%s pieces=%s parallel=%s chars=%s stitch=%s/%sms",
+        provider_key,
+        len(texts),
+        parallel,
+        len(req.input),
+        STITCH_MODE,
+        STITCH_MS,
+    )
+    slots = asyncio.Semaphore(parallel)
+
+    async def piece(text: str) -> Tuple[np.ndarray, int]:
+        piece_req = req.model_copy(update={"input": text})
+        # Later pieces wait here rather than in the pool's queue, leaving
+        # workers and queue slots to other requests
+        async with slots:
+            job = await _submit(
+                pool, _render_piece, piece_req, provider_key, provider, voice=req.voice
             )
-            with open(dump_path, "wb") as _f:
-                _f.write(wav_buf.getvalue())
-            app_logger.info("dumped wav to %s", dump_path)
-        except Exception as _ex:
-            app_logger.warning("failed to dump wav: %s", repr(_ex))
+            return await asyncio.wrap_future(job.result)
+
+    tasks = [asyncio.ensure_future(piece(t)) for t in texts]
+    try:
+        parts = await asyncio.gather(*tasks)
+    except BaseException:
+        # One piece failed or the client went away: drop the queued rest
+        for t in tasks:
+            t.cancel()
+        raise
+
+    def finish() -> Tuple[bytes | memoryview, str]:
+        with _stage(provider_key, "stitch"):
+            pcm, sr = _stitch(parts)
+        return _encode(pcm, sr, req, provider_key, fmt)
+
+    return await asyncio.to_thread(finish)
+
+
+def _encoder_settings(fmt: str) -> str:
+    """Settings besides the format that change the encoded bytes."""
+    if fmt == "mp3":
+        return f"mp3:{MP3_PRESET}:{'sndfile' if SNDFILE_MP3 else 'ffmpeg'}"
+    if fmt in ("ogg", "opus"):
+        return f"ogg:{'opus' if fmt == 'opus' else OGG_CODEC}:{OGG_PRESET}"
+    return fmt
+
+
+def _dist_version(name: str) -> str:
+    try:
+        return importlib.metadata.version(name)
+    except Exception:
+        return str(getattr(sys.modules.get(name), "__version__", ""))
+
+
+def _file_version(path: Path) -> str:
+    try:
+        st = path.stat()
+    except OSError:
+        return ""
+    return f"{path.name}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def _describe_model(key: str, provider: object) -> str:
+    """Version of the model a provider serves, fixed once it is loaded."""
+    if key == "kokoro":
+        engine = _engine.stats() if _engine is not None else {}
+        return (
+            f"kokoro={_dist_version('kokoro')};"
+            f"quantized={bool(engine.get('quantized'))}"
+        )
+    if key == "kokoro_onnx":
+        return _file_version(Path(getattr(provider, "model_path", "")))
+    if key == "xtts":
+        return str(getattr(provider, "_model_version", "xtts_v2"))
+    return key
+
+
+def _voice_version(provider_key: str, voice: Optional[str]) -> str:
+    """Size and mtime of the local voice files a request uses, if any."""
+    if provider_key == "kokoro":
+        files = [VOICES_DIR / f"{v.strip()}.pt" for v in (voice or "").split(",")]
+    elif provider_key == "kokoro_onnx":
+        files = [
+            KOKORO_ONNX_DIR / "voices" / f"{v.strip()}{ext}"
+            for v in (voice or "").split(",")
+            for ext in (".npy", ".bin")
+        ]
+    elif provider_key == "xtts":
+        files = [XTTS_SPEAKERS_DIR / f"{voice}.wav"]
+    else:
+        return ""
+    return ",".join(v for v in (_file_version(f) for f in files) if v)
+
+
+def _cache_key_for(req: SpeechIn, provider_key: str, fmt: str) -> Optional[str]:
+    # Until the provider has loaded its model version is unknown; such
+    # requests neither read nor fill the cache
+    if not _cache.enabled or provider_key not in _model_versions:
+        return None
+    return _request_key(req, provider_key, fmt)
+
+
+def _request_key(req: SpeechIn, provider_key: str, fmt: str) -> str:
+    """Identity of a request's output: equal keys mean identical bytes."""
+    model_version = _model_versions.get(provider_key, "")
+    if CACHE_VERSION:
+        model_version = f"{model_version};{CACHE_VERSION}"
+    return make_cache_key(
+        provider=provider_key,
+        voice=req.voice,
+        text=req.input,
+        speed=req.speed,
+        languageCode=req.languageCode,
+        format=fmt,
+        sample_rate=req.sample_rate,
+        phonemes=req.phonemes,
+        encoder=_encoder_settings(fmt),
+        model_version=f"{model_version};{_voice_version(provider_key, req.voice)}",
+    )
+
+
+def _cached(cache_key: Optional[str], provider_key: str, req: SpeechIn, fmt: str):
+    if cache_key is None:
+        return None
+    data = _cache.get(cache_key)
+    if data is not None:
+        app_logger.info(
+            "cache hit: provider=%s voice=%s fmt=%s bytes=%s",
+            provider_key,
+            req.voice,
+            fmt,
+            len(data),
+        )
+    return data
+
+
+async def _await_provider(provider_key: str) -> None:
+    """Wait up to KOKORO_READY_TIMEOUT_SECONDS for a provider still loading."""
+    if provider_key in _providers or not _readiness.is_pending(provider_key):
+        return
+    with timing.phase("loading"):
+        ready = await _readiness.wait(provider_key, READY_TIMEOUT_SECONDS)
+    if not ready and _readiness.is_pending(provider_key):
+        metrics.REJECTED.labels(provider_key, "not_ready").inc()
+        raise HTTPException(
+            status_code=503,
+            detail=f"{provider_key} is still loading",
+            headers={"Retry-After": _retry_after(READY_TIMEOUT_SECONDS)},
+        )
 
+
+# Providers that accept SpeechIn.phonemes in place of text
+PHONEME_PROVIDERS = ("kokoro", "kokoro_onnx")
+
+
+def _provider_and_pool(
+    provider_key: str, req: SpeechIn
+) -> Tuple[object, InferencePool]:
+    provider = _providers.get(provider_key)
+    pool = _pools.get(provider_key)
+    if provider is None or pool is None:
+        raise HTTPException(
+            status_code=422, detail="No suitable TTS provider available"
+        )
+    if req.phonemes is not None and provider_key not in PHONEME_PROVIDERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"phonemes are not supported by {provider_key}",
+        )
+    if MAX_INPUT_CHARS and len(req.phonemes or req.input or "") > MAX_INPUT_CHARS:
+        metrics.REJECTED.labels(provider_key, "too_large").inc()
+        raise HTTPException(
+            status_code=413,
+            detail=f"Input exceeds {MAX_INPUT_CHARS} characters",
+        )
+    app_logger.info(
+        "incoming tts: provider=%s voice=%s fmt=%s lang=%s text_len=%s queued=%s",
+        provider_key,
+        req.voice,
+        req.format,
+        req.languageCode or "",
+        len(req.input or ""),
+        pool.stats()["queued"],
+    )
+    metrics.INPUT_CHARS.labels(provider_key).observe(len(req.input or ""))
+    return provider, pool
+
+
+async def _synthesize(req: SpeechIn) -> Tuple[bytes | memoryview, str, str]:
+    """Serve one non-streaming request from cache or the inference queue.
+
+    Returns (data, media_type, cache_status); errors raise HTTPException.
+    """
+    t0 = time.perf_counter()
+    with timing.phase("routing"):
+        provider_key = _choose_provider(req.provider, req.languageCode)
+        voice = metrics.voice_label(req.voice)
         fmt = (req.format or "wav").lower()
-        if fmt == "wav":
-            data = wav_buf.getvalue()
-            app_logger.info("out wav bytes=%s sr=%s", len(data), sr)
-            return Response(content=data, media_type="audio/wav")
-
-        if fmt == "mp3":
-            if not MP3_CAPABLE or AudioSegment is None:
-                app_logger.warning("mp3 export unavailable: pydub/ffmpeg missing")
-                raise HTTPException(
-                    status_code=415,
-                    detail="MP3 requires pydub + ffmpeg installed and on PATH",
+        cache_key = _cache_key_for(req, provider_key, fmt)
+        cached = _cached(cache_key, provider_key, req, fmt)
+    if cached is not None:
+        metrics.REQUEST_SECONDS.labels(provider_key, voice, "hit").observe(
+            time.perf_counter() - t0
+        )
+        return cached, _MEDIA_TYPES.get(fmt, "audio/wav"), "hit"
+
+    async def render() -> Tuple[bytes | memoryview, str]:
+        await _await_provider(provider_key)
+        with timing.phase("routing"):
+            _check_format(fmt)
+            provider, pool = _provider_and_pool(provider_key, req)
+            texts = _texts_for(provider, req)
+        with metrics.in_flight(provider_key):
+            if len(texts) > 1:
+                data, media_type = await _render_chunked(
+                    pool, req, texts, provider_key, provider, fmt
                 )
+            else:
+                job = await _submit(
+                    pool, _render, req, provider_key, provider, fmt, voice=req.voice
+                )
+                data, media_type = await asyncio.wrap_future(job.result)
+        metrics.OUTPUT_BYTES.labels(provider_key, fmt).observe(len(data))
+        if cache_key is not None:
             try:
-                seg = AudioSegment.from_file(wav_buf, format="wav")
-                out = io.BytesIO()
-                seg.export(out, format="mp3", bitrate="192k")
-                data = out.getvalue()
-                # Always dump MP3 to filesystem
-                try:
-                    import time as _time
-
-                    dump_dir_mp3 = os.path.join(os.path.dirname(__file__), "mp3")
-                    os.makedirs(dump_dir_mp3, exist_ok=True)
-                    ts_mp3 = str(_time.time_ns())
-                    safe_voice_mp3 = (
-                        "".join(
-                            c
-                            for c in (req.voice or "voice")
-                            if c.isalnum() or c in ("-", "_")
-                        )
-                        or "voice"
-                    )
-                    dump_mp3_path = os.path.join(
-                        dump_dir_mp3,
-                        f"tts-{provider_key}-{safe_voice_mp3}-{ts_mp3}.mp3",
-                    )
-                    with open(dump_mp3_path, "wb") as _fmp3:
-                        _fmp3.write(data)
-                    app_logger.info("dumped mp3 to %s", dump_mp3_path)
-                except Exception as _exm:
-                    app_logger.warning("failed to dump mp3: %s", repr(_exm))
-                app_logger.info("out mp3 bytes=%s sr=%s", len(data), sr)
-                return Response(content=data, media_type="audio/mpeg")
-            except HTTPException:
-                raise
+                _cache.put(cache_key, data)
             except Exception as ex:
-                app_logger.warning("mp3 export failed: %s", repr(ex))
+                app_logger.warning("cache store failed: %s", repr(ex))
+        return data, media_type
+
+    if not COALESCE:
+        data, media_type = await render()
+        status = "miss"
+    else:
+        # Identical requests already running share that run's bytes
+        t_wait = time.perf_counter()
+        flight_key = cache_key or _request_key(req, provider_key, fmt)
+        (data, media_type), shared = await _inflight.do(flight_key, render)
+        status = "coalesced" if shared else "miss"
+        if shared:
+            metrics.COALESCED.labels(provider_key).inc()
+            timing.add("coalesced", time.perf_counter() - t_wait)
+    metrics.REQUEST_SECONDS.labels(provider_key, voice, status).observe(
+        time.perf_counter() - t0
+    )
+    return data, media_type, status
+
+
+@app.post("/v1/audio/speech")
+async def tts(req: SpeechIn, authorization: Optional[str] = Header(default=None)):
+    if APP_TOKEN and authorization != f"Bearer {APP_TOKEN}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    timings = timing.begin()
+    _profiler.attach(timings)
+    streaming = False
+    try:
+        if req.stream:
+            with timing.phase("routing"):
+                provider_key = _choose_provider(req.provider, req.languageCode)
+                fmt = (req.format or "wav").lower()
+                # Serve repeated requests from cache without queueing for inference
+                cached = _cached(
+                    _cache_key_for(req, provider_key, fmt), provider_key, req, fmt
+                )
+            if cached is not None:
+                return Response(
+                    content=cached,
+                    media_type=_MEDIA_TYPES.get(fmt, "audio/wav"),
+                    headers={"X-Cache": "hit", "Server-Timing": timings.header()},
+                )
+            if fmt not in _STREAM_FORMATS:
                 raise HTTPException(
                     status_code=415,
-                    detail="MP3 export failed; ensure ffmpeg is installed and accessible",
+                    detail=f"Streaming supports {', '.join(sorted(_STREAM_FORMATS))}",
                 )
+            await _await_provider(provider_key)
+            with timing.phase("routing"):
+                _check_format(fmt)
+                provider, pool = _provider_and_pool(provider_key, req)
+            # The stream detaches from the profiler once its body ends
+            response = await _stream_response(pool, req, provider_key, provider, fmt)
+            streaming = True
+            return response
 
-        if fmt == "ogg":
-            raise HTTPException(status_code=415, detail="OGG not supported")
-
-        # Default to WAV on unknown format
-        data = wav_buf.getvalue()
-        app_logger.info("out wav-default bytes=%s sr=%s", len(data), sr)
-        return Response(content=data, media_type="audio/wav")
+        data, media_type, cache_status = await _synthesize(req)
+        return Response(
+            content=data,
+            media_type=media_type,
+            headers={"X-Cache": cache_status, "Server-Timing": timings.header()},
+        )
     finally:
-        # Always decrement counter when done
-        with _tts_lock:
-            _tts_concurrent_count -= 1
+        if not streaming:
+            _profiler.detach(timings)
+
+
+class SpeechBatchIn(BaseModel):
+    items: List[SpeechIn] = Field(
+        min_length=1, max_length=512, description="Requests to synthesize"
+    )
+    parallelism: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Max items in flight (default: total inference workers)",
+    )
+
+
+def _batch_line(obj: dict) -> bytes:
+    return (json.dumps(obj, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+@app.post("/v1/audio/speech:batch")
+async def tts_batch(
+    req: SpeechBatchIn, authorization: Optional[str] = Header(default=None)
+):
+    """Synthesize many items and stream NDJSON results as each one completes.
+
+    Each line is {"index", "ok": true, "contentType", "cache", "bytes", "audio"}
+    with base64 audio, or {"index", "ok": false, "status", "error"}. A final
+    {"done": true, ...} line summarizes the batch.
+    """
+    if APP_TOKEN and authorization != f"Bearer {APP_TOKEN}":
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    parallelism = req.parallelism or max(
+        1, sum(p.workers for p in list(_pools.values()))
+    )
+    gate = asyncio.Semaphore(parallelism)
+    app_logger.info(
+        "incoming tts batch: items=%s parallelism=%s", len(req.items), parallelism
+    )
+
+    async def run(index: int, item: SpeechIn) -> dict:
+        async with gate:
+            try:
+                # Streaming is per-response; batch items are always buffered
+                item = item.model_copy(update={"stream": False})
+                data, media_type, cache_status = await _synthesize(item)
+            except HTTPException as e:
+                return {
+                    "index": index,
+                    "ok": False,
+                    "status": e.status_code,
+                    "error": e.detail,
+                }
+            except Exception as ex:
+                app_logger.warning("batch item %s failed: %s", index, repr(ex))
+                return {"index": index, "ok": False, "status": 500, "error": repr(ex)}
+        return {
+            "index": index,
+            "ok": True,
+            "contentType": media_type,
+            "cache": cache_status,
+            "bytes": len(data),
+            "audio": base64.b64encode(data).decode("ascii"),
+        }
+
+    tasks = [asyncio.create_task(run(i, item)) for i, item in enumerate(req.items)]
+
+    async def body() -> AsyncIterator[bytes]:
+        ok = failed = 0
+        try:
+            for fut in asyncio.as_completed(tasks):
+                line = await fut
+                if line["ok"]:
+                    ok += 1
+                else:
+                    failed += 1
+                yield _batch_line(line)
+            yield _batch_line({"done": True, "ok": ok, "failed": failed})
+        finally:
+            # Client went away: drop items that have not run yet
+            for t in tasks:
+                t.cancel()
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+
+_start_loaders()
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+_log = logging.getLogger("kokoro-service")
+
+
+class DumpWriter:
+    """Sampled, bounded background writer for debug audio artifacts.
+
+    Requests are sampled with probability ``sample_rate`` and handed to a
+    single writer thread through a bounded queue; when the queue is full the
+    artifact is dropped rather than slowing the request down. The writer also
+    enforces retention on ``root/<kind>/tts-*`` files: anything older than
+    ``max_age_seconds`` is removed, then the oldest files until the total is
+    under ``max_bytes``.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        *,
+        sample_rate: float,
+        max_queue: int = 64,
+        max_bytes: int = 512 * 1024 * 1024,
+        max_age_seconds: float = 72 * 3600,
+        retention_interval_seconds: float = 60.0,
+        on_write: Optional[Callable[[str, float], None]] = None,
+    ) -> None:
+        self.root = root
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_age_seconds = max(0.0, float(max_age_seconds))
+        self.retention_interval_seconds = retention_interval_seconds
+        # Called with (provider_key, seconds) after each file is written
+        self._on_write = on_write
+        self._q: "queue.Queue[Tuple[str, str, str, bytes]]" = queue.Queue(
+            maxsize=max(1, int(max_queue))
+        )
+        self._lock = threading.Lock()
+        self._kinds: set[str] = {"wav", "mp3", "ogg"}
+        self._counters: Dict[str, int] = {
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "pruned": 0,
+        }
+        # Started on first submit, so forking worker processes at startup
+        # never happens with this thread running
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    def _ensure_thread(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="tts-dump-writer", daemon=True
+                )
+                self._thread.start()
+
+    def should_dump(self) -> bool:
+        """Sampling decision, taken once per request so all its artifacts match."""
+        return self.enabled and random.random() < self.sample_rate
+
+    def submit(
+        self, kind: str, provider_key: str, voice: Optional[str], data: bytes
+    ) -> bool:
+        if not self.enabled:
+            return False
+        self._ensure_thread()
+        safe_voice = (
+            "".join(c for c in (voice or "voice") if c.isalnum() or c in ("-", "_"))
+            or "voice"
+        )
+        try:
+            self._q.put_nowait((kind, provider_key, safe_voice, data))
+        except queue.Full:
+            with self._lock:
+                self._counters["dropped"] += 1
+            return False
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            out: Dict[str, object] = dict(self._counters)
+        out["sample_rate"] = self.sample_rate
+        out["queued"] = self._q.qsize()
+        return out
+
+    def _write(self, kind: str, provider_key: str, voice: str, data: bytes) -> None:
+        self._kinds.add(kind)
+        dump_dir = os.path.join(self.root, kind)
+        os.makedirs(dump_dir, exist_ok=True)
+        path = os.path.join(
+            dump_dir, f"tts-{provider_key}-{voice}-{time.time_ns()}.{kind}"
+        )
+        with open(path, "wb") as f:
+            f.write(data)
+        _log.info("dumped %s to %s", kind, path)
+
+    def enforce_retention(self) -> int:
+        files: list[Tuple[float, int, str]] = []
+        for kind in list(self._kinds):
+            try:
+                entries = list(os.scandir(os.path.join(self.root, kind)))
+            except OSError:
+                continue
+            for e in entries:
+                if not (e.name.startswith("tts-") and e.is_file()):
+                    continue
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, e.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        cutoff = time.time() - self.max_age_seconds if self.max_age_seconds else None
+        removed = 0
+        for mtime, size, path in files:
+            expired = cutoff is not None and mtime < cutoff
+            if not expired and (self.max_bytes <= 0 or total <= self.max_bytes):
+                break
+            try:
+                os.remove(path)
+                removed += 1
+                total -= size
+            except OSError:
+                pass
+        if removed:
+            with self._lock:
+                self._counters["pruned"] += removed
+        return removed
+
+    def _loop(self) -> None:
+        next_retention = 0.0
+        while True:
+            now = time.monotonic()
+            if now >= next_retention:
+                try:
+                    self.enforce_retention()
+                except Exception as ex:
+                    _log.warning("dump retention failed: %s", repr(ex))
+                next_retention = now + self.retention_interval_seconds
+            try:
+                item = self._q.get(timeout=self.retention_interval_seconds)
+            except queue.Empty:
+                continue
+            try:
+                t0 = time.perf_counter()
+                self._write(*item)
+                with self._lock:
+                    self._counters["written"] += 1
+                if self._on_write is not None:
+                    self._on_write(item[1], time.perf_counter() - t0)
+            except Exception as ex:
+                with self._lock:
+                    self._counters["failed"] += 1
+                _log.warning("failed to dump %s: %s", item[0], repr(ex))
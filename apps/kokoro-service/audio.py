@@ -0,0 +1,459 @@
+from __future__ import annotations
+
+import io
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+# Peak normalization target (~-1 dBFS, avoids clipping)
+NORM_TARGET = 10 ** (-1.0 / 20.0)
+
+# RIFF/data sizes used when the total length is unknown (streaming)
+_WAV_UNKNOWN_SIZE = 0xFFFFFFFF
+
+
+def wav_header(
+    sample_rate: int, num_samples: Optional[int] = None, channels: int = 1
+) -> bytes:
+    """Build a 44-byte PCM_16 WAV header.
+
+    When ``num_samples`` is None the RIFF and data sizes are set to 0xFFFFFFFF,
+    which browsers and ffmpeg accept as "read until EOF" for streamed WAV.
+    """
+    block_align = channels * 2
+    if num_samples is None:
+        data_size = _WAV_UNKNOWN_SIZE
+        riff_size = _WAV_UNKNOWN_SIZE
+    else:
+        data_size = int(num_samples) * block_align
+        riff_size = 36 + data_size
+    return (
+        b"RIFF"
+        + struct.pack("<I", riff_size)
+        + b"WAVE"
+        + b"fmt "
+        + struct.pack(
+            "<IHHIIHH",
+            16,
+            1,  # PCM
+            channels,
+            int(sample_rate),
+            int(sample_rate) * block_align,
+            block_align,
+            16,
+        )
+        + b"data"
+        + struct.pack("<I", data_size)
+    )
+
+
+def quantize_pcm16(
+    audio: np.ndarray, out: np.ndarray, scratch: Optional[np.ndarray] = None
+) -> None:
+    """Quantize float samples in [-1, 1] into the int16 array ``out``.
+
+    The one float -> PCM_16 rule, shared by buffered and streamed WAV so both
+    give the same bytes. Scaling, clipping and rounding follow libsndfile's
+    float -> PCM_16. ``scratch`` is an optional float32 work array of at least
+    ``audio.size`` samples.
+    """
+    tmp = scratch[: audio.size] if scratch is not None else np.empty_like(out, "f4")
+    np.multiply(audio, 32768.0, out=tmp)
+    np.clip(tmp, -32768.0, 32767.0, out=tmp)
+    np.floor(tmp, out=tmp)
+    out[...] = tmp
+
+
+def to_pcm16_bytes(audio: np.ndarray) -> bytes:
+    """Quantize float32 [-1, 1] samples to little-endian PCM_16 bytes."""
+    audio = as_float32(audio)
+    out = np.empty((audio.size,), dtype="<i2")
+    quantize_pcm16(audio, out)
+    return out.tobytes()
+
+
+def as_float32(audio) -> np.ndarray:
+    """Flat float32 view of a provider segment; copies only when it must."""
+    if hasattr(audio, "detach") and hasattr(audio, "cpu"):
+        audio = audio.detach().cpu().numpy()
+    return np.asarray(audio, dtype=np.float32).reshape(-1)
+
+
+class PcmAssembler:
+    """Collect provider segments into one growing float32 buffer.
+
+    Each segment is copied exactly once, into the buffer, and the peak is
+    tracked as segments arrive. ``normalize`` scales in place and ``wav_pcm16``
+    quantizes block by block straight into the response bytearray, so a
+    request holds one float buffer plus its output and no full-size temporaries.
+
+    The buffer starts at ``initial_samples`` (pass the length when it is known)
+    and doubles as needed, so short requests stay small.
+    """
+
+    _QUANTIZE_BLOCK = 1 << 16
+
+    def __init__(self, initial_samples: int = 1 << 16) -> None:
+        self._buf = np.empty((max(1, int(initial_samples)),), dtype=np.float32)
+        self.size = 0
+        self.peak = 0.0
+
+    def append(self, audio) -> None:
+        seg = as_float32(audio)
+        n = seg.size
+        if n == 0:
+            return
+        self._reserve(n)
+        self._buf[self.size : self.size + n] = seg
+        self.size += n
+        p = max(float(seg.max()), -float(seg.min()))
+        if p > self.peak:
+            self.peak = p
+
+    def _reserve(self, n: int) -> None:
+        end = self.size + n
+        if end > self._buf.size:
+            grown = np.empty((max(end, self._buf.size * 2),), dtype=np.float32)
+            grown[: self.size] = self._buf[: self.size]
+            self._buf = grown
+
+    def append_silence(self, n: int) -> None:
+        if n <= 0:
+            return
+        self._reserve(n)
+        self._buf[self.size : self.size + n] = 0.0
+        self.size += n
+
+    def crossfade(self, audio, overlap: int) -> None:
+        """Append ``audio``, linearly crossfading its first ``overlap`` samples
+        with the end of the buffer."""
+        seg = as_float32(audio)
+        k = min(max(0, int(overlap)), self.size, seg.size)
+        if k:
+            ramp = np.linspace(0.0, 1.0, k, dtype=np.float32)
+            tail = self._buf[self.size - k : self.size]
+            tail *= 1.0 - ramp
+            tail += seg[:k] * ramp
+            p = max(float(tail.max()), -float(tail.min()))
+            if p > self.peak:
+                self.peak = p
+        self.append(seg[k:])
+
+    @property
+    def samples(self) -> np.ndarray:
+        return self._buf[: self.size]
+
+    def normalize(self, target: float = NORM_TARGET) -> None:
+        """Peak-normalize in place when the peak exceeds ``target``."""
+        if self.peak > target:
+            np.multiply(self.samples, target / self.peak, out=self.samples)
+            self.peak = target
+
+    def wav_pcm16(self, sample_rate: int) -> memoryview:
+        """PCM_16 WAV (header + samples) without intermediate full-size arrays."""
+        out = bytearray(44 + self.size * 2)
+        out[:44] = wav_header(sample_rate, self.size)
+        pcm = np.frombuffer(out, dtype="<i2", offset=44)
+        scratch = np.empty((min(self.size, self._QUANTIZE_BLOCK),), dtype=np.float32)
+        src = self.samples
+        for start in range(0, self.size, self._QUANTIZE_BLOCK):
+            block = src[start : start + self._QUANTIZE_BLOCK]
+            quantize_pcm16(block, pcm[start : start + block.size], scratch)
+        return memoryview(out)
+
+
+class WavStreamEncoder:
+    """PCM_16 WAV with an open-ended header; same interface as StreamEncoder."""
+
+    def __init__(self, sample_rate: int) -> None:
+        self._header: Optional[bytes] = wav_header(sample_rate)
+
+    def write(self, audio: np.ndarray) -> bytes:
+        head, self._header = self._header or b"", None
+        return head + to_pcm16_bytes(audio)
+
+    def close(self) -> bytes:
+        head, self._header = self._header or b"", None
+        return head
+
+
+class RunningPeakNormalizer:
+    """Peak-normalize a stream of segments without knowing the global peak.
+
+    The gain is derived from the loudest sample seen so far, so it can only
+    decrease as segments arrive. Already-emitted audio therefore never clips,
+    at the cost of slightly louder early segments than a global pass would give.
+    """
+
+    def __init__(self, target: float = NORM_TARGET) -> None:
+        self.target = target
+        self.peak = 0.0
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        if chunk.size:
+            p = float(np.max(np.abs(chunk)))
+            if p > self.peak:
+                self.peak = p
+        if self.peak > self.target:
+            return chunk * (self.target / self.peak)
+        return chunk
+
+
+# MP3 presets for mono speech: (libsndfile bitrate mode, compression level).
+# Compression level 0..1 maps from best quality/highest bitrate to smallest.
+MP3_PRESETS: Dict[str, Tuple[str, float]] = {
+    "speech": ("VARIABLE", 0.4),
+    "compact": ("VARIABLE", 0.7),
+    "cbr64": ("CONSTANT", 0.63),
+    "legacy": ("CONSTANT", 0.0),
+}
+
+
+def sndfile_supports(fmt: str, subtype: str) -> bool:
+    """Whether the bundled libsndfile can write ``fmt``/``subtype``."""
+    try:
+        return fmt in sf.available_formats() and subtype in sf.available_subtypes(fmt)
+    except Exception:
+        return False
+
+
+class _StreamSink:
+    """Write-only file object that hands out bytes as libsndfile produces them.
+
+    libsndfile may seek back to patch headers on close (e.g. the MP3 Xing
+    frame). Bytes already handed out cannot change, so such rewrites are
+    dropped; the stream stays decodable.
+    """
+
+    def __init__(self) -> None:
+        self._pos = 0
+        self._end = 0
+        self._pending = bytearray()
+
+    def write(self, data) -> int:
+        n = len(data)
+        if self._pos >= self._end:
+            self._pending += data
+            self._end = self._pos + n
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        if whence == 0:
+            self._pos = offset
+        elif whence == 1:
+            self._pos += offset
+        else:
+            self._pos = self._end + offset
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        return b""
+
+    def take(self) -> bytes:
+        out = bytes(self._pending)
+        self._pending.clear()
+        return out
+
+
+_MP3_BITRATES_KBPS = {
+    # MPEG-1 Layer III
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    # MPEG-2 / 2.5 Layer III
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+
+
+def _mp3_frame_length(header: bytes) -> int:
+    """Byte length of the Layer III frame starting with ``header`` (0 if invalid)."""
+    if len(header) < 4 or header[0] != 0xFF or (header[1] & 0xE0) != 0xE0:
+        return 0
+    version = (header[1] >> 3) & 0x03  # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5
+    br_idx = (header[2] >> 4) & 0x0F
+    sr_idx = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version not in _MP3_SAMPLE_RATES or br_idx in (0, 15) or sr_idx == 3:
+        return 0
+    kbps = _MP3_BITRATES_KBPS[1 if version == 3 else 2][br_idx]
+    sr = _MP3_SAMPLE_RATES[version][sr_idx]
+    return (144 if version == 3 else 72) * kbps * 1000 // sr + padding
+
+
+def _silent_mp3_frame(header: bytes) -> bytes:
+    """Smallest Layer III frame in ``header``'s format; it decodes to silence."""
+    # Lowest bitrate, same sample rate and channel mode, no padding
+    head = bytes((header[0], header[1], (header[2] & 0x0C) | 0x10, header[3]))
+    return head + bytes(_mp3_frame_length(head) - 4)
+
+
+class StreamEncoder:
+    """Incremental in-process encoder (libsndfile) for compressed formats.
+
+    ``write`` returns whatever encoded bytes are ready so far, ``close`` the
+    remainder. No subprocess and no temp files are involved.
+
+    For MP3, libsndfile reserves the first frame for a Xing/LAME tag that it
+    only fills in on close; a stream cannot be patched afterwards. With
+    ``lead_frame`` that placeholder is sent as the smallest silent frame
+    instead: without a tag, decoders estimate a VBR file's length from the
+    first frame's bitrate, and the lowest bitrate makes them read to the end
+    rather than stop early. Dropping the frame altogether would let a dense
+    first audio frame cut decoding short.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        *,
+        format: str,
+        subtype: str,
+        bitrate_mode: Optional[str] = None,
+        compression_level: Optional[float] = None,
+        lead_frame: bool = False,
+    ) -> None:
+        self._sink = _StreamSink()
+        self._lead_frame = lead_frame
+        self._head = b""
+        kwargs = {}
+        if compression_level is not None:
+            kwargs["compression_level"] = compression_level
+        if bitrate_mode is not None:
+            kwargs["bitrate_mode"] = bitrate_mode
+        self._file = sf.SoundFile(
+            self._sink,
+            "w",
+            int(sample_rate),
+            1,
+            format=format,
+            subtype=subtype,
+            **kwargs,
+        )
+
+    def _drain(self) -> bytes:
+        out = self._sink.take()
+        if not self._lead_frame:
+            return out
+        self._head += out
+        size = _mp3_frame_length(self._head[:4])
+        if len(self._head) < max(4, size):
+            return b""
+        self._lead_frame = False
+        out, self._head = _silent_mp3_frame(self._head) + self._head[size:], b""
+        return out
+
+    def write(self, audio: np.ndarray) -> bytes:
+        if audio.size:
+            self._file.write(np.asarray(audio, dtype=np.float32))
+        return self._drain()
+
+    def close(self) -> bytes:
+        self._file.close()
+        return self._drain()
+
+
+def mp3_encoder(sample_rate: int, preset: str = "speech") -> StreamEncoder:
+    mode, level = MP3_PRESETS.get(preset, MP3_PRESETS["speech"])
+    return StreamEncoder(
+        sample_rate,
+        format="MP3",
+        subtype="MPEG_LAYER_III",
+        bitrate_mode=mode,
+        compression_level=level,
+        lead_frame=True,
+    )
+
+
+def encode_mp3(audio: np.ndarray, sample_rate: int, preset: str = "speech") -> bytes:
+    """Encode a whole buffer to MP3, including a correct Xing/LAME tag."""
+    mode, level = MP3_PRESETS.get(preset, MP3_PRESETS["speech"])
+    buf = io.BytesIO()
+    with sf.SoundFile(
+        buf,
+        "w",
+        int(sample_rate),
+        1,
+        format="MP3",
+        subtype="MPEG_LAYER_III",
+        bitrate_mode=mode,
+        compression_level=level,
+    ) as f:
+        f.write(np.asarray(audio, dtype=np.float32))
+    return buf.getvalue()
+
+
+# Ogg presets: codec -> {preset: compression level}. For Opus, libsndfile maps
+# the level linearly onto the bitrate; at 24 kHz mono 0.9 gives ~32 kbps and
+# 0.93 ~24 kbps.
+OGG_PRESETS: Dict[str, Dict[str, float]] = {
+    "opus": {"speech": 0.9, "compact": 0.93, "high": 0.8},
+    "vorbis": {"speech": 0.7, "compact": 1.0, "high": 0.4},
+}
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def opus_sample_rate(sample_rate: int) -> int:
+    """Closest Opus-supported rate at or above ``sample_rate`` (max 48 kHz)."""
+    for rate in OPUS_SAMPLE_RATES:
+        if rate >= sample_rate:
+            return rate
+    return OPUS_SAMPLE_RATES[-1]
+
+
+def resample_linear(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Linear-interpolation resampler; adequate for small speech rate changes."""
+    if src_rate == dst_rate or audio.size == 0:
+        return audio
+    n_out = int(round(audio.size * dst_rate / src_rate))
+    x_out = np.arange(n_out, dtype=np.float64) * (src_rate / dst_rate)
+    return np.interp(x_out, np.arange(audio.size), audio).astype(np.float32)
+
+
+class _ResamplingEncoder:
+    """Resample each chunk before handing it to the wrapped encoder."""
+
+    def __init__(self, inner: StreamEncoder, src_rate: int, dst_rate: int) -> None:
+        self._inner = inner
+        self._src = src_rate
+        self._dst = dst_rate
+
+    def write(self, audio: np.ndarray) -> bytes:
+        return self._inner.write(resample_linear(audio, self._src, self._dst))
+
+    def close(self) -> bytes:
+        return self._inner.close()
+
+
+def ogg_encoder(sample_rate: int, codec: str = "opus", preset: str = "speech"):
+    """Incremental Ogg/Opus or Ogg/Vorbis encoder.
+
+    Opus only accepts 8/12/16/24/48 kHz, so other rates (e.g. 22.05 kHz from
+    ``say``) are resampled per chunk to the next supported rate.
+    """
+    levels = OGG_PRESETS.get(codec, OGG_PRESETS["opus"])
+    level = levels.get(preset, levels["speech"])
+    if codec == "vorbis":
+        return StreamEncoder(
+            sample_rate, format="OGG", subtype="VORBIS", compression_level=level
+        )
+    rate = opus_sample_rate(int(sample_rate))
+    enc = StreamEncoder(rate, format="OGG", subtype="OPUS", compression_level=level)
+    if rate != int(sample_rate):
+        return _ResamplingEncoder(enc, int(sample_rate), rate)
+    return enc
+
+
+def encode_ogg(
+    audio: np.ndarray, sample_rate: int, codec: str = "opus", preset: str = "speech"
+) -> bytes:
+    enc = ogg_encoder(sample_rate, codec, preset)
+    return enc.write(audio) + enc.close()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Raised by submit() when the pool's queue is at capacity."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"inference queue full (eta {retry_after:.1f}s)")
+        self.retry_after = retry_after
+
+
+class InferenceJob:
+    """Handle for a queued call: ``started`` resolves when a worker picks it up."""
+
+    def __init__(self) -> None:
+        self.started: Future = Future()
+        self.result: Future = Future()
+        self.queued_at = time.perf_counter()
+        # Seconds between submit() and a worker picking the job up
+        self.wait_seconds = 0.0
+
+    def cancel(self) -> bool:
+        """Drop the job if no worker has started it yet."""
+        return self.result.cancel()
+
+
+class InferencePool:
+    """Bounded FIFO of inference jobs drained by dedicated worker threads.
+
+    One pool exists per provider so slow models cannot starve fast ones. The
+    pool keeps an exponentially weighted average of job durations, which is
+    used to estimate how long a newly queued job will wait.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        workers: int,
+        max_queue: int,
+        initial_job_seconds: float = 2.0,
+    ) -> None:
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.max_queue = max(1, int(max_queue))
+        self._q: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=self.max_queue)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._avg_job_s = float(initial_job_seconds)
+        self._counters: Dict[str, int] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "cancelled": 0,
+        }
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"tts-{name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> InferenceJob:
+        """Enqueue fn(*args, **kwargs); raises QueueFullError when saturated.
+
+        The caller's contextvars are captured and restored on the worker.
+        """
+        job = InferenceJob()
+        ctx = contextvars.copy_context()
+        try:
+            self._q.put_nowait((job, ctx, fn, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                self._counters["rejected"] += 1
+            raise QueueFullError(self.eta_seconds())
+        with self._lock:
+            self._counters["submitted"] += 1
+        return job
+
+    def eta_seconds(self) -> float:
+        """Estimated wait before a job submitted now would start."""
+        with self._lock:
+            ahead = self._q.qsize() + self._running
+            avg = self._avg_job_s
+        return (ahead / self.workers) * avg
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._counters)
+            out["workers"] = self.workers
+            out["running"] = self._running
+            out["queued"] = self._q.qsize()
+            out["max_queue"] = self.max_queue
+            out["avg_job_seconds"] = round(self._avg_job_s, 4)
+        return out
+
+    def shutdown(self) -> None:
+        for _ in self._threads:
+            self._q.put(None)
+
+    def _worker(self) -> None:
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            job, ctx, fn, args, kwargs = item
+            if not job.result.set_running_or_notify_cancel():
+                with self._lock:
+                    self._counters["cancelled"] += 1
+                continue
+            with self._lock:
+                self._running += 1
+            job.wait_seconds = time.perf_counter() - job.queued_at
+            job.started.set_result(True)
+            t0 = time.perf_counter()
+            ok = True
+            try:
+                value = ctx.run(fn, *args, **kwargs)
+            except BaseException as ex:
+                ok = False
+                job.result.set_exception(ex)
+            else:
+                job.result.set_result(value)
+            finally:
+                dt = time.perf_counter() - t0
+                with self._lock:
+                    self._running -= 1
+                    self._avg_job_s = 0.8 * self._avg_job_s + 0.2 * dt
+                    self._counters["completed" if ok else "failed"] += 1
+
+
+def workers_for(provider: str, default: Optional[int] = None) -> int:
+    """Worker count for a provider: KOKORO_WORKERS_<PROVIDER>, then KOKORO_WORKERS."""
+    base = default if default is not None else (os.cpu_count() or 1)
+    fallback = os.environ.get("KOKORO_WORKERS") or str(base)
+    return int(os.environ.get(f"KOKORO_WORKERS_{provider.upper()}", fallback))
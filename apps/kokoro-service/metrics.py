@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence, Tuple
+
+try:
+    from prometheus_client import (  # type: ignore
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        GCCollector,
+        Histogram,
+        ProcessCollector,
+        generate_latest,
+    )
+except Exception:  # pragma: no cover - optional dependency
+    CollectorRegistry = None  # type: ignore
+
+AVAILABLE = CollectorRegistry is not None
+
+# Voice ids come from clients; label at most this many distinct values
+MAX_VOICE_LABELS = int(os.environ.get("KOKORO_METRICS_MAX_VOICES", "100"))
+
+_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+    300.0,
+)
+_RTF_BUCKETS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0, 128.0)
+_CHAR_BUCKETS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+_BYTE_BUCKETS = tuple(float(1024 << i) for i in range(0, 16))  # 1 KiB .. 32 MiB
+_BATCH_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+
+
+class _Noop:
+    """Stands in for every metric when prometheus_client is not installed."""
+
+    def labels(self, *args, **kwargs) -> "_Noop":
+        return self
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def inc(self, value: float = 1) -> None:
+        pass
+
+    def dec(self, value: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+
+REGISTRY = None
+if AVAILABLE:
+    REGISTRY = CollectorRegistry()
+    ProcessCollector(registry=REGISTRY)
+    GCCollector(registry=REGISTRY)
+
+
+def _histogram(name: str, doc: str, labels: Sequence[str], buckets: Sequence[float]):
+    if not AVAILABLE:
+        return _Noop()
+    return Histogram(name, doc, labels, buckets=buckets, registry=REGISTRY)
+
+
+def _counter(name: str, doc: str, labels: Sequence[str]):
+    if not AVAILABLE:
+        return _Noop()
+    return Counter(name, doc, labels, registry=REGISTRY)
+
+
+def _gauge(name: str, doc: str, labels: Sequence[str]):
+    if not AVAILABLE:
+        return _Noop()
+    return Gauge(name, doc, labels, registry=REGISTRY)
+
+
+REQUEST_SECONDS = _histogram(
+    "tts_request_seconds",
+    "End-to-end synthesis request duration",
+    ["provider", "voice", "cache"],
+    _LATENCY_BUCKETS,
+)
+QUEUE_WAIT_SECONDS = _histogram(
+    "tts_queue_wait_seconds",
+    "Time a job waited for an inference worker",
+    ["provider", "voice"],
+    _LATENCY_BUCKETS,
+)
+STAGE_SECONDS = _histogram(
+    "tts_stage_seconds",
+    "Time spent per pipeline stage "
+    "(synthesis, stitch, normalize, wav_encode, mp3_encode, ogg_encode, dump)",
+    ["provider", "stage"],
+    _LATENCY_BUCKETS,
+)
+REALTIME_FACTOR = _histogram(
+    "tts_realtime_factor",
+    "Seconds of audio synthesized per second of wall time",
+    ["provider"],
+    _RTF_BUCKETS,
+)
+INPUT_CHARS = _histogram(
+    "tts_input_chars", "Input text length in characters", ["provider"], _CHAR_BUCKETS
+)
+OUTPUT_BYTES = _histogram(
+    "tts_output_bytes", "Encoded response size", ["provider", "format"], _BYTE_BUCKETS
+)
+BATCH_SIZE = _histogram(
+    "tts_batch_size",
+    "Rows per batched forward pass (KOKORO_BATCH_MAX > 1)",
+    ["provider"],
+    _BATCH_BUCKETS,
+)
+IN_FLIGHT = _gauge(
+    "tts_requests_in_flight", "Requests currently being synthesized", ["provider"]
+)
+REJECTED = _counter(
+    "tts_requests_rejected_total",
+    "Requests refused before synthesis "
+    "(queue_full, queue_timeout, too_large, not_ready, worker_unavailable)",
+    ["provider", "reason"],
+)
+COALESCED = _counter(
+    "tts_requests_coalesced_total",
+    "Requests served by joining an identical request already in flight",
+    ["provider"],
+)
+LOAD_SECONDS = _gauge(
+    "tts_model_load_seconds",
+    "Duration of the last model load or warmup per component",
+    ["component"],
+)
+
+_voice_lock = threading.Lock()
+_voice_labels: set[str] = set()
+
+
+def voice_label(voice: Optional[str]) -> str:
+    """``voice`` as a label value, or "other" once MAX_VOICE_LABELS are in use."""
+    v = (voice or "")[:64]
+    with _voice_lock:
+        if v in _voice_labels:
+            return v
+        if len(_voice_labels) < MAX_VOICE_LABELS:
+            _voice_labels.add(v)
+            return v
+    return "other"
+
+
+@contextmanager
+def stage(provider: str, name: str) -> Iterator[None]:
+    """Observe the duration of the enclosed block as stage ``name``."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(provider, name).observe(time.perf_counter() - t0)
+
+
+@contextmanager
+def timed_load(component: str) -> Iterator[None]:
+    """Record how long loading or warming up ``component`` took."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        LOAD_SECONDS.labels(component).set(time.perf_counter() - t0)
+
+
+@contextmanager
+def in_flight(provider: str) -> Iterator[None]:
+    gauge = IN_FLIGHT.labels(provider)
+    gauge.inc()
+    try:
+        yield
+    finally:
+        gauge.dec()
+
+
+def render() -> Tuple[bytes, str]:
+    """(exposition body, content type) for the /metrics endpoint."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
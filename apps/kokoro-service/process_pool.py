@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import gc
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+_log = logging.getLogger("kokoro-service")
+
+
+class WorkerUnavailableError(RuntimeError):
+    """No worker process could take the job in time (the app answers 503)."""
+
+    def __init__(self, provider: str, message: str) -> None:
+        super().__init__(message)
+        self.provider = provider
+
+
+def _memory_kb(pid: int) -> Dict[str, Optional[int]]:
+    """Rss/Pss/Uss in kB from /proc (Linux); None where unavailable."""
+    out: Dict[str, Optional[int]] = {"rss_kb": None, "pss_kb": None, "uss_kb": None}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            fields: Dict[str, int] = {}
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0].endswith(":"):
+                    try:
+                        fields[parts[0][:-1]] = int(parts[1])
+                    except ValueError:
+                        pass
+        out["rss_kb"] = fields.get("Rss")
+        out["pss_kb"] = fields.get("Pss")
+        out["uss_kb"] = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    except OSError:
+        pass
+    return out
+
+
+def _worker_main(provider: Any, conn, torch_threads: int) -> None:
+    """Child loop: run jobs from the parent and send audio back over the pipe."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    torch = sys.modules.get("torch")
+    if torch is not None and torch_threads > 0:
+        try:
+            torch.set_num_threads(torch_threads)
+        except Exception:
+            pass
+    while True:
+        try:
+            op, kwargs = conn.recv()
+        except (EOFError, OSError):
+            return
+        if op != "stream":
+            # Late "stop" for a job that already finished
+            continue
+        try:
+            stream_fn = getattr(provider, "stream", None)
+            segments = (
+                stream_fn(**kwargs)
+                if callable(stream_fn)
+                else iter([provider.synthesize(**kwargs)])
+            )
+            for audio, sr in segments:
+                if conn.poll():
+                    stop_op, _ = conn.recv()
+                    if stop_op == "stop":
+                        break
+                arr = np.ascontiguousarray(audio, dtype=np.float32)
+                conn.send(("chunk", int(sr)))
+                conn.send_bytes(arr.data)
+            conn.send(("end", None))
+        except Exception as ex:
+            try:
+                conn.send(("error", ex))
+            except Exception:
+                conn.send(("error", RuntimeError(repr(ex))))
+
+
+class _Worker:
+    def __init__(self, process, conn) -> None:
+        self.process = process
+        self.conn = conn
+
+
+class ProcessWorkerPool:
+    """Fork N inference processes that inherit an already-loaded provider.
+
+    The parent loads model weights and voice packs, freezes the GC so that
+    refcount updates do not dirty the inherited pages, then forks. Children
+    share those pages copy-on-write, so each extra worker costs only its
+    private memory. Jobs travel over a pipe per worker and audio comes back as
+    raw float32 segments. Must be constructed before the process starts any
+    threads; Linux only.
+
+    The pool exposes the provider interface (``synthesize``/``stream``), so it
+    can be registered in place of the wrapped provider.
+
+    A worker that dies is replaced by a fresh fork. Callers wait at most
+    ``acquire_timeout`` seconds for an idle worker, then get
+    ``WorkerUnavailableError``.
+    """
+
+    def __init__(
+        self,
+        provider: Any,
+        *,
+        workers: int,
+        torch_threads: int = 0,
+        acquire_timeout: float = 30.0,
+    ) -> None:
+        self.provider = provider
+        self.name = getattr(provider, "name", "provider")
+        self.maxCharsPerRequest = getattr(provider, "maxCharsPerRequest", 0)
+        self.supportsSsml = getattr(provider, "supportsSsml", False)
+        self.workers = max(1, int(workers))
+        self.torch_threads = int(torch_threads)
+        self.acquire_timeout = max(0.001, float(acquire_timeout))
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._all: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._respawns = 0
+        self._ctx = multiprocessing.get_context("fork")
+        gc.collect()
+        gc.freeze()
+        for _ in range(self.workers):
+            w = self._spawn()
+            self._all.append(w)
+            self._idle.put(w)
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(self.provider, child_conn, self.torch_threads),
+            daemon=True,
+        )
+        proc.start()
+        child_conn.close()
+        return _Worker(proc, parent_conn)
+
+    def _replace(self, dead: _Worker) -> None:
+        """Reap a dead worker and put a fresh fork in its place."""
+        try:
+            dead.conn.close()
+        except OSError:
+            pass
+        if dead.process.is_alive():
+            dead.process.kill()
+        dead.process.join(timeout=1.0)
+        try:
+            # The parent has threads by now; the child only runs the
+            # provider, which it inherits already loaded
+            w = self._spawn()
+        except Exception as ex:
+            _log.error("%s worker respawn failed: %s", self.name, repr(ex))
+            with self._lock:
+                self._all = [x for x in self._all if x is not dead]
+            return
+        with self._lock:
+            self._all = [w if x is dead else x for x in self._all]
+            self._respawns += 1
+        _log.warning(
+            "%s worker %s exited (code %s), respawned as %s",
+            self.name,
+            dead.process.pid,
+            dead.process.exitcode,
+            w.process.pid,
+        )
+        self._idle.put(w)
+
+    def alive(self) -> int:
+        with self._lock:
+            workers = list(self._all)
+        return sum(1 for w in workers if w.process.is_alive())
+
+    def stream(self, **kwargs: Any) -> Iterator[Tuple[np.ndarray, int]]:
+        with self._lock:
+            exhausted = not self._all
+        if exhausted:
+            # Only when respawning itself failed for every worker
+            raise WorkerUnavailableError(
+                self.name, f"all {self.name} worker processes have exited"
+            )
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            try:
+                w = self._idle.get(timeout=max(0.001, deadline - time.monotonic()))
+            except queue.Empty:
+                raise WorkerUnavailableError(
+                    self.name,
+                    f"no {self.name} worker process free after "
+                    f"{self.acquire_timeout}s",
+                )
+            if w.process.is_alive():
+                break
+            # Killed while idle (e.g. by the OOM killer); replace it and retry
+            self._replace(w)
+        healthy = True
+        done = False
+        try:
+            w.conn.send(("stream", kwargs))
+            while True:
+                kind, val = w.conn.recv()
+                if kind == "chunk":
+                    data = w.conn.recv_bytes()
+                    yield np.frombuffer(data, dtype=np.float32), int(val)
+                elif kind == "end":
+                    done = True
+                    return
+                else:
+                    done = True
+                    raise val
+        except (EOFError, OSError, BrokenPipeError) as ex:
+            healthy = False
+            raise WorkerUnavailableError(
+                self.name, f"{self.name} worker process died: {ex!r}"
+            )
+        finally:
+            if healthy and not done:
+                # Consumer stopped early: ask the child to stop and drain
+                try:
+                    w.conn.send(("stop", None))
+                    while True:
+                        kind, _ = w.conn.recv()
+                        if kind == "chunk":
+                            w.conn.recv_bytes()
+                        else:
+                            break
+                except Exception:
+                    healthy = False
+            if healthy:
+                self._idle.put(w)
+            else:
+                self._replace(w)
+
+    def synthesize(self, **kwargs: Any) -> Tuple[np.ndarray, int]:
+        chunks: List[np.ndarray] = []
+        sr = 24000
+        for audio, sr in self.stream(**kwargs):
+            chunks.append(audio)
+        if not chunks:
+            return np.zeros((0,), dtype=np.float32), sr
+        return np.concatenate(chunks), sr
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-worker memory; ``uss_kb`` is the memory a worker adds on its own."""
+        parent = _memory_kb(os.getpid())
+        children = []
+        with self._lock:
+            workers = list(self._all)
+            respawns = self._respawns
+        for w in workers:
+            mem = _memory_kb(w.process.pid) if w.process.pid else {}
+            children.append(
+                {"pid": w.process.pid, "alive": w.process.is_alive(), **mem}
+            )
+        return {
+            "workers": self.workers,
+            "alive": self.alive(),
+            "respawns": respawns,
+            "idle": self._idle.qsize(),
+            "parent": parent,
+            "children": children,
+        }
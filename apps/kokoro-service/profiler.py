@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import Future
+from typing import Dict, Optional, Set
+
+from providers.timing import Timings
+
+
+def _collapse(frame) -> str:
+    """One stack in collapsed (folded) form, root first."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(
+            f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+        )
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class ProfileSession:
+    """Stack samples and peak traced memory for the next ``requests`` requests."""
+
+    def __init__(self, requests: int, interval_s: float, memory: bool) -> None:
+        self.requests = requests
+        self.interval_s = interval_s
+        self.memory = memory
+        self.done: Future = Future()
+        self.completed = 0
+        self.samples: Counter = Counter()
+        self.peak_bytes: Optional[int] = None
+        self.started = time.monotonic()
+        self.elapsed_s = 0.0
+        self._claimed = 0
+        self._attached: Set[Timings] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._owns_tracing = False
+        self._thread = threading.Thread(
+            target=self._loop, name="tts-profiler", daemon=True
+        )
+
+    def start(self) -> None:
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+            tracemalloc.reset_peak()
+        self._thread.start()
+
+    def attach(self, timings: Timings) -> bool:
+        with self._lock:
+            if self._stop.is_set() or self._claimed >= self.requests:
+                return False
+            self._claimed += 1
+            self._attached.add(timings)
+            return True
+
+    def detach(self, timings: Timings) -> None:
+        with self._lock:
+            if timings not in self._attached:
+                return
+            self._attached.discard(timings)
+            self.completed += 1
+            finished = self.completed >= self.requests
+        if finished and not self.done.done():
+            self.done.set_result(True)
+
+    def stop(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.elapsed_s = time.monotonic() - self.started
+        if self.memory and tracemalloc.is_tracing():
+            self.peak_bytes = tracemalloc.get_traced_memory()[1]
+            if self._owns_tracing:
+                tracemalloc.stop()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+    def _loop(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            with self._lock:
+                idents = {i for t in self._attached for i in t.active_threads()}
+            idents.discard(me)
+            if not idents:
+                continue
+            frames = sys._current_frames()
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.samples[_collapse(frame)] += 1
+
+
+class SamplingProfiler:
+    """On-demand, in-process sampling profiler for synthesis requests.
+
+    Only threads currently inside a timed phase of a profiled request are
+    sampled, so idle inference workers and unrelated requests do not dilute
+    the profile. At most one session runs at a time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._session: Optional[ProfileSession] = None
+
+    def start(
+        self, requests: int, interval_s: float, memory: bool = True
+    ) -> ProfileSession:
+        with self._lock:
+            if self._session is not None:
+                raise RuntimeError("a profiling session is already running")
+            self._session = ProfileSession(requests, interval_s, memory)
+            session = self._session
+        session.start()
+        return session
+
+    def finish(self, session: ProfileSession) -> None:
+        with self._lock:
+            if self._session is session:
+                self._session = None
+        session.stop()
+
+    def attach(self, timings: Timings) -> bool:
+        session = self._session
+        return session is not None and session.attach(timings)
+
+    def detach(self, timings: Timings) -> None:
+        session = self._session
+        if session is not None:
+            session.detach(timings)
+
+    def stats(self) -> Dict[str, object]:
+        session = self._session
+        if session is None:
+            return {"active": False}
+        return {
+            "active": True,
+            "requests": session.requests,
+            "completed": session.completed,
+        }
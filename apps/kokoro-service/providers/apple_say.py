@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import logging
 import os
+import shutil
+import struct
 import subprocess
 import tempfile
+import threading
 import re
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Tuple
 
 import numpy as np
 import soundfile as sf
 
+from .timing import phase
+
+_log = logging.getLogger("kokoro-service")
+
 
 def sanitize_for_say(text: str) -> str:
     """Sanitize text for safe use with Apple 'say' command.
@@ -23,39 +31,112 @@ def sanitize_for_say(text: str) -> str:
     return text.strip()
 
 
+def read_caf(data: bytes) -> Tuple[np.ndarray, int]:
+    """Decode linear PCM from a CAF byte stream to mono float32.
+
+    ``say`` writing to a pipe cannot seek back to patch sizes, so the data
+    chunk may declare size -1 and run to the end of the stream.
+    """
+    if data[:4] != b"caff":
+        raise ValueError("not a CAF stream")
+    pos = 8
+    desc = None
+    pcm = b""
+    while pos + 12 <= len(data):
+        kind = data[pos : pos + 4]
+        (size,) = struct.unpack(">q", data[pos + 4 : pos + 12])
+        pos += 12
+        if kind == b"desc":
+            desc = struct.unpack(">d4sIIIII", data[pos : pos + 32])
+        elif kind == b"data":
+            end = len(data) if size < 0 else pos + size
+            # Chunk starts with a 4-byte edit count
+            pcm = data[pos + 4 : end]
+            break
+        pos += size
+    if desc is None:
+        raise ValueError("CAF stream has no desc chunk")
+    rate, fmt, flags, _, _, channels, bits = desc
+    if fmt != b"lpcm":
+        raise ValueError(f"unsupported CAF format {fmt!r}")
+    order = "<" if flags & 2 else ">"
+    if flags & 1:
+        dtype, scale = np.dtype(f"{order}f{bits // 8}"), 1.0
+    else:
+        dtype, scale = np.dtype(f"{order}i{bits // 8}"), float(2 ** (bits - 1))
+    frame = dtype.itemsize * max(1, channels)
+    pcm = pcm[: len(pcm) - len(pcm) % frame]
+    audio = np.frombuffer(pcm, dtype=dtype).astype(np.float32) / scale
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    return audio, int(rate)
+
+
 class AppleSayProvider:
+    """macOS ``say`` as a provider.
+
+    Text is passed on stdin (``-f -``) and audio comes back as 16-bit PCM in
+    a CAF stream on stdout, so a request touches no temporary files. At most
+    ``max_concurrency`` ``say`` processes run at once. The voice list (and
+    with it availability) is probed once per process. ``say_bin`` may point
+    at any executable with the same interface, e.g. ``scripts/say_stub.py``
+    on Linux.
+    """
+
     name: str = "apple_say"
     maxCharsPerRequest: int = 10000
     supportsSsml: bool = False
 
-    def __init__(self) -> None:
+    def __init__(
+        self, say_bin: Optional[str] = None, max_concurrency: Optional[int] = None
+    ) -> None:
+        self.say_bin = say_bin or os.environ.get("KOKORO_SAY_BIN") or "say"
+        self.max_concurrency = max(
+            1,
+            int(
+                max_concurrency
+                or os.environ.get("KOKORO_SAY_CONCURRENCY")
+                or (os.cpu_count() or 1)
+            ),
+        )
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._probe_lock = threading.Lock()
         self._available: Optional[bool] = None
         self._cached_voices: Optional[List[Dict[str, str]]] = None
+        # Cleared the first time piped output fails; temp files from then on
+        self._pipe_ok = True
+        self._lock = threading.Lock()
+        self._counters = {"runs": 0, "waited": 0, "pipe": 0, "file": 0}
+
+    def _probe(self) -> None:
+        """Run ``say -v ?`` once; caches availability and the voice list."""
+        with self._probe_lock:
+            if self._available is not None:
+                return
+            out = None
+            if shutil.which(self.say_bin) is not None:
+                try:
+                    out = subprocess.run(
+                        [self.say_bin, "-v", "?"],
+                        capture_output=True,
+                        text=True,
+                        check=True,
+                    ).stdout
+                except Exception:
+                    out = None
+            self._cached_voices = [] if out is None else self._parse_voices(out)
+            self._available = out is not None
 
     def is_available(self) -> bool:
-        if self._available is not None:
-            return self._available
-        try:
-            subprocess.run(
-                ["say", "-v", "?"], capture_output=True, text=True, check=True
-            )
-            self._available = True
-        except Exception:
-            self._available = False
-        return self._available
+        self._probe()
+        return bool(self._available)
 
     def voices(self) -> List[Dict[str, str]]:
-        if self._cached_voices is not None:
-            return self._cached_voices
-        out = ""
-        try:
-            out = subprocess.run(
-                ["say", "-v", "?"], capture_output=True, text=True, check=True
-            ).stdout
-        except Exception:
-            return []
-        res: List[Dict[str, str]] = []
+        self._probe()
+        return self._cached_voices or []
 
+    def _parse_voices(self, out: str) -> List[Dict[str, str]]:
+        res: List[Dict[str, str]] = []
         locale_re = re.compile(r"^[a-z]{2}_[A-Z]{2}$")
         for line in out.splitlines():
             # keep only the segment before '#'
@@ -85,7 +166,6 @@ class AppleSayProvider:
                 continue
             seen.add(key)
             uniq.append(v)
-        self._cached_voices = uniq
         return uniq
 
     def _pick_voice(self, voiceId: Optional[str], languageCode: Optional[str]) -> str:
@@ -116,6 +196,47 @@ class AppleSayProvider:
         # final fallback
         return "Alex"
 
+    def _command(self, voice: str, wpm: int, output: str) -> List[str]:
+        return [
+            self.say_bin,
+            "-v",
+            voice,
+            "-r",
+            str(wpm),
+            "-o",
+            output,
+            "--file-format=caff",
+            "--data-format=LEI16",
+            "-f",
+            "-",
+        ]
+
+    def _run_pipe(self, voice: str, wpm: int, text: str) -> Tuple[np.ndarray, int]:
+        proc = subprocess.run(
+            self._command(voice, wpm, "/dev/stdout"),
+            input=text.encode("utf-8"),
+            capture_output=True,
+            check=True,
+        )
+        with phase("postprocess"):
+            return read_caf(proc.stdout)
+
+    def _run_file(self, voice: str, wpm: int, text: str) -> Tuple[np.ndarray, int]:
+        with tempfile.TemporaryDirectory() as td:
+            out = os.path.join(td, "out.caf")
+            subprocess.run(
+                self._command(voice, wpm, out),
+                input=text.encode("utf-8"),
+                capture_output=True,
+                check=True,
+            )
+            with phase("postprocess"):
+                audio, sr = sf.read(out, dtype="float32", always_2d=False)
+                if isinstance(audio, np.ndarray) and audio.ndim > 1:
+                    # mixdown to mono
+                    audio = audio.mean(axis=1)
+                return np.asarray(audio, dtype=np.float32).ravel(), int(sr)
+
     def synthesize(
         self,
         *,
@@ -132,47 +253,44 @@ class AppleSayProvider:
         mul = 1.0 if speed is None else float(speed)
         wpm = max(80, min(450, int(base_wpm * mul)))
 
+        # Text goes over stdin, so leading '-' and shell-ish input are safe
         sanitized_text = sanitize_for_say(text)
 
-        with tempfile.TemporaryDirectory() as td:
-            aiff = os.path.join(td, "out.aiff")
-            # Write text to temp file to avoid CLI parsing issues
-            text_file = os.path.join(td, "input.txt")
-            try:
-                with open(text_file, "w", encoding="utf-8") as tf:
-                    tf.write(sanitized_text)
-
-                # Use -f flag to read text from file
-                args = [
-                    "say",
-                    "-v",
-                    voice,
-                    "-r",
-                    str(wpm),
-                    "-o",
-                    aiff,
-                    "-f",
-                    text_file,
-                ]
-                subprocess.run(args, check=True)
-            except Exception:
-                # Fallback: use -- separator if file-based approach fails
-                args = [
-                    "say",
-                    "-v",
-                    voice,
-                    "-r",
-                    str(wpm),
-                    "-o",
-                    aiff,
-                    "--",
-                    sanitized_text,
-                ]
-                subprocess.run(args, check=True)
-
-            audio, sr = sf.read(aiff, dtype="float32", always_2d=False)
-            if isinstance(audio, np.ndarray) and audio.ndim > 1:
-                # mixdown to mono
-                audio = audio.mean(axis=1)
-            arr = np.asarray(audio, dtype=np.float32).ravel()
-            return arr, int(sr)
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counters["waited"] += 1
+            self._slots.acquire()
+        try:
+            with self._lock:
+                self._counters["runs"] += 1
+            pipe_error: Optional[Exception] = None
+            if self._pipe_ok:
+                try:
+                    audio, sr = self._run_pipe(voice, wpm, sanitized_text)
+                    with self._lock:
+                        self._counters["pipe"] += 1
+                    return audio, sr
+                except (ValueError, subprocess.CalledProcessError) as ex:
+                    pipe_error = ex
+            audio, sr = self._run_file(voice, wpm, sanitized_text)
+            if pipe_error is not None:
+                # The same request worked through a file: this say cannot
+                # write to a pipe, so stop trying
+                self._pipe_ok = False
+                _log.warning(
+                    "say: piped output failed (%r), using temp files", pipe_error
+                )
+            with self._lock:
+                self._counters["file"] += 1
+            return audio, sr
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "bin": self.say_bin,
+                "max_concurrency": self.max_concurrency,
+                "output": "pipe" if self._pipe_ok else "file",
+                **self._counters,
+            }
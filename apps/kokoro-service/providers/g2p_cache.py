@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_log = logging.getLogger("kokoro-service")
+
+
+def normalize_g2p_text(text: str) -> str:
+    """Key form of a G2P input: NFC with whitespace runs collapsed."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class G2PCache:
+    """Bounded LRU of G2P results per (lang_code, normalized text).
+
+    Results are stored pickled and unpickled on every hit: ``KPipeline``
+    writes timestamps into the tokens G2P returns, so callers must never
+    share one result object. ``max_bytes`` bounds the pickled size held in
+    memory. With ``path`` the entries are also kept in a SQLite file (at
+    most ``max_rows``, oldest dropped first) so a restart starts warm. Disk
+    reads use a connection per thread and writes are queued to a background
+    writer, so lookups never wait on each other's I/O. Connections are
+    reopened after a fork, so process-pool workers each get their own.
+    Results that cannot be pickled are simply not cached.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 32 * 1024 * 1024,
+        *,
+        path: Optional[str] = None,
+        max_rows: int = 200_000,
+        max_pending: int = 1024,
+    ) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.path = path or None
+        self.max_rows = max(1, int(max_rows))
+        # Guards the memory tier and counters only; SQLite is never touched
+        # while it is held
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        # One read connection per thread (and process); writes go through a
+        # bounded queue to a single writer thread with its own connection
+        self._local = threading.local()
+        self._pending: "queue.Queue[Tuple[str, bytes]]" = queue.Queue(
+            maxsize=max(1, int(max_pending))
+        )
+        self._writer_pid: Optional[int] = None
+        self._counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "unpicklable": 0,
+            "writes": 0,
+            "writes_dropped": 0,
+        }
+
+    @staticmethod
+    def _key(lang: str, text: str) -> str:
+        return f"{lang}\x00{normalize_g2p_text(text)}"
+
+    # Persistent store
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        path = self.path
+        if path is None:
+            return None
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            db = sqlite3.connect(path, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS g2p (key TEXT PRIMARY KEY, value BLOB)"
+            )
+        except sqlite3.Error as ex:
+            _log.warning("g2p cache: %s unusable, memory only: %s", path, ex)
+            self.path = None
+            return None
+        return db
+
+    def _reader(self) -> Optional[sqlite3.Connection]:
+        if self.path is None:
+            return None
+        # Connections do not survive a fork; process-pool workers reopen
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.db = self._open()
+            self._local.pid = os.getpid()
+        return self._local.db
+
+    def _load(self, key: str) -> Optional[bytes]:
+        db = self._reader()
+        if db is None:
+            return None
+        try:
+            row = db.execute("SELECT value FROM g2p WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as ex:
+            _log.warning("g2p cache: read failed: %s", ex)
+            return None
+        return bytes(row[0]) if row else None
+
+    def _store(self, key: str, blob: bytes) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            if self._writer_pid != os.getpid():
+                # Started on first store, so forks at startup never carry it;
+                # a forked child gets its own queue and writer
+                if self._writer_pid is not None:
+                    self._pending = queue.Queue(maxsize=self._pending.maxsize)
+                self._writer_pid = os.getpid()
+                threading.Thread(
+                    target=self._write_loop, name="g2p-cache-writer", daemon=True
+                ).start()
+        try:
+            self._pending.put_nowait((key, blob))
+        except queue.Full:
+            # The memory tier still has it; only persistence is skipped
+            with self._lock:
+                self._counters["writes_dropped"] += 1
+
+    def _write_loop(self) -> None:
+        db = self._open()
+        if db is None:
+            return
+        while True:
+            key, blob = self._pending.get()
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO g2p (key, value) VALUES (?, ?)",
+                    (key, blob),
+                )
+                rowid = db.execute("SELECT last_insert_rowid()").fetchone()[0]
+                if rowid % 1000 == 0:
+                    db.execute(
+                        "DELETE FROM g2p WHERE rowid <= ?", (rowid - self.max_rows,)
+                    )
+            except sqlite3.Error as ex:
+                _log.warning("g2p cache: write failed: %s", ex)
+                continue
+            with self._lock:
+                self._counters["writes"] += 1
+
+    # Memory
+
+    def _remember(self, key: str, blob: bytes) -> None:
+        if len(blob) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._entries[key] = blob
+        self._bytes += len(blob)
+        while self._bytes > self.max_bytes:
+            _, dropped = self._entries.popitem(last=False)
+            self._bytes -= len(dropped)
+            self._counters["evictions"] += 1
+
+    def get(self, lang: str, text: str) -> Any:
+        """A fresh copy of the cached result, or None."""
+        key = self._key(lang, text)
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+        if blob is None:
+            blob = self._load(key)
+            with self._lock:
+                if blob is None:
+                    self._counters["misses"] += 1
+                    return None
+                self._counters["disk_hits"] += 1
+                self._remember(key, blob)
+        return pickle.loads(blob)
+
+    def put(self, lang: str, text: str, value: Any) -> None:
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            with self._lock:
+                self._counters["unpicklable"] += 1
+            return
+        key = self._key(lang, text)
+        with self._lock:
+            self._remember(key, blob)
+        self._store(key, blob)
+
+    def wrap(self, lang: str, g2p: Callable[[str], Any]) -> Callable[[str], Any]:
+        """``g2p`` answered from the cache; misses are computed and stored."""
+
+        def cached(text: str) -> Any:
+            value = self.get(lang, text)
+            if value is not None:
+                return value
+            value = g2p(text)
+            self.put(lang, text, value)
+            # The caller may mutate what it gets; the stored copy stays clean
+            return value
+
+        return cached
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "path": self.path,
+                "pending_writes": self._pending.qsize(),
+                **self._counters,
+            }
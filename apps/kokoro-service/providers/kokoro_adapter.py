@@ -1,17 +1,103 @@
 from __future__ import annotations
 
-from typing import Tuple, Optional
+from typing import Iterator, Tuple, Optional
 
 import numpy as np
 
+from .kokoro_pipelines import split_phonemes
+from .timing import phase
+
+
+def _time_g2p(pipe, cache=None) -> None:
+    """Report the pipeline's G2P calls as the ``g2p`` phase and answer them
+    from ``cache`` (a G2PCache) when given; applied once per pipeline."""
+    g2p = getattr(pipe, "g2p", None)
+    if g2p is None or getattr(g2p, "_timed", False):
+        return
+    cached = cache.wrap(getattr(pipe, "lang_code", "a"), g2p) if cache else None
+
+    def timed(*args, **kwargs):
+        with phase("g2p"):
+            if cached is not None and len(args) == 1 and not kwargs:
+                return cached(args[0])
+            return g2p(*args, **kwargs)
+
+    timed._timed = True  # type: ignore[attr-defined]
+    pipe.g2p = timed
+
+
+def _to_numpy(audio) -> np.ndarray:
+    if hasattr(audio, "detach") and hasattr(audio, "cpu"):
+        # CPU tensors share memory with the numpy view; no copy here
+        audio = audio.detach().cpu().numpy()
+    return np.asarray(audio, dtype=np.float32).reshape(-1)
+
 
 class KokoroProvider:
     name: str = "kokoro"
     maxCharsPerRequest: int = 20000
     supportsSsml: bool = False
 
-    def __init__(self, pipeline) -> None:
+    def __init__(
+        self, pipeline, batcher=None, voices=None, pipelines=None, g2p_cache=None
+    ) -> None:
         self.pipe = pipeline
+        # Optional KokoroPipelinePool selecting a G2P front end per language
+        self.pipelines = pipelines
+        # Optional KokoroBatcher used in place of the pipeline's own model
+        self.batcher = batcher
+        # Optional KokoroVoiceManager holding resident voice packs
+        self.voices = voices
+        # Optional G2PCache consulted before each pipeline's G2P
+        self.g2p_cache = g2p_cache
+
+    def stream(
+        self,
+        *,
+        text: str,
+        voiceId: Optional[str],
+        speed: Optional[float],
+        languageCode: Optional[str] | None = None,
+        phonemes: Optional[str] = None,
+    ) -> Iterator[Tuple[np.ndarray, int]]:
+        """Yield (audio, sample_rate) per segment as the pipeline produces it.
+
+        With ``phonemes`` (a misaki phoneme string) G2P is skipped and ``text``
+        is ignored; the phonemes are split at 510 and run as given.
+        """
+        kwargs = {"model": self.batcher} if self.batcher is not None else {}
+        pipe = self.pipe
+        voice = voiceId or "af_heart"
+        if self.pipelines is not None:
+            code, pipe = self.pipelines.acquire(languageCode)
+            voice = self.pipelines.voice_for(
+                code, voiceId, explicit=languageCode is not None
+            )
+        _time_g2p(pipe, self.g2p_cache)
+        if self.voices is not None:
+            with phase("voice"):
+                voice = self.voices.get(voice)
+        if phonemes is not None:
+            yield from self._stream_phonemes(pipe, phonemes, voice)
+            return
+        for _, _, audio in pipe(text, voice=voice, **kwargs):
+            if audio is None:
+                continue
+            yield _to_numpy(audio), 24000
+
+    def _stream_phonemes(self, pipe, phonemes: str, voice):
+        model = self.batcher if self.batcher is not None else pipe.model
+        if isinstance(voice, str):
+            with phase("voice"):
+                voice = pipe.load_voice(voice)
+        device = getattr(model, "device", None)
+        if device is not None and hasattr(voice, "to"):
+            voice = voice.to(device)
+        for piece in split_phonemes(phonemes):
+            output = type(pipe).infer(model, piece, voice)
+            audio = getattr(output, "audio", None)
+            if audio is not None:
+                yield _to_numpy(audio), 24000
 
     def synthesize(
         self,
@@ -20,12 +106,18 @@ class KokoroProvider:
         voiceId: Optional[str],
         speed: Optional[float],
         languageCode: Optional[str] | None = None,
+        phonemes: Optional[str] = None,
     ) -> Tuple[np.ndarray, int]:
-        chunks = []
-        for _, _, audio in self.pipe(text, voice=voiceId or "af_heart"):
-            if hasattr(audio, "detach") and hasattr(audio, "cpu"):
-                audio = audio.detach().cpu().numpy()
-            chunks.append(np.asarray(audio, dtype=np.float32).ravel())
+        chunks = [
+            audio
+            for audio, _ in self.stream(
+                text=text,
+                voiceId=voiceId,
+                speed=speed,
+                languageCode=languageCode,
+                phonemes=phonemes,
+            )
+        ]
         if not chunks:
             return np.zeros((0,), dtype=np.float32), 24000
         return np.concatenate(chunks), 24000
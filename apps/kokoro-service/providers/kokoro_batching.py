@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class _Row:
+    __slots__ = ("phonemes", "ref_s", "speed", "done", "audio", "pred_dur", "error")
+
+    def __init__(self, phonemes: str, ref_s: Any, speed: float) -> None:
+        self.phonemes = phonemes
+        self.ref_s = ref_s
+        self.speed = speed
+        self.done = threading.Event()
+        self.audio: Any = None
+        self.pred_dur: Any = None
+        self.error: Optional[BaseException] = None
+
+
+def _packed_lstm(lstm, x, lengths):
+    """Run a batch_first LSTM over padded rows without leaking padding."""
+    import torch.nn as nn  # type: ignore
+
+    packed = nn.utils.rnn.pack_padded_sequence(
+        x, lengths.cpu(), batch_first=True, enforce_sorted=False
+    )
+    out, _ = lstm(packed)
+    out, _ = nn.utils.rnn.pad_packed_sequence(
+        out, batch_first=True, total_length=x.shape[1]
+    )
+    return out
+
+
+def _group_by_frames(frames: List[int], tolerance: float) -> List[List[int]]:
+    """Group row indices whose frame counts are within ``tolerance`` of each other.
+
+    The prosody and decoder blocks use instance norm over time, so padding a
+    short row to a much longer one shifts its statistics; grouping keeps the
+    padding (and the drift) small.
+    """
+    order = sorted(range(len(frames)), key=lambda i: frames[i])
+    groups: List[List[int]] = []
+    for i in order:
+        if groups and frames[i] <= frames[groups[-1][0]] * (1.0 + tolerance):
+            groups[-1].append(i)
+        else:
+            groups.append([i])
+    return groups
+
+
+def forward_batch(
+    model, rows: List[_Row], pad_tolerance: float
+) -> List[Tuple[Any, Any]]:
+    """Padded-batch equivalent of ``KModel.forward_with_tokens``.
+
+    Returns (audio, pred_dur) per row, in input order.
+    """
+    import torch  # type: ignore
+
+    device = model.device
+    ids = []
+    for r in rows:
+        tok = [i for i in (model.vocab.get(p) for p in r.phonemes) if i is not None]
+        ids.append([0, *tok, 0])
+    lengths = torch.tensor([len(x) for x in ids], dtype=torch.long, device=device)
+    bsz, max_len = len(ids), int(lengths.max())
+    input_ids = torch.zeros((bsz, max_len), dtype=torch.long, device=device)
+    for b, x in enumerate(ids):
+        input_ids[b, : len(x)] = torch.tensor(x, dtype=torch.long, device=device)
+    ref_s = torch.cat([r.ref_s.reshape(1, -1) for r in rows], dim=0).to(device)
+    speeds = torch.tensor([float(r.speed) for r in rows], device=device)
+
+    text_mask = torch.arange(max_len, device=device).unsqueeze(0).expand(bsz, -1)
+    text_mask = torch.gt(text_mask + 1, lengths.unsqueeze(1))
+    bert_dur = model.bert(input_ids, attention_mask=(~text_mask).int())
+    d_en = model.bert_encoder(bert_dur).transpose(-1, -2)
+    s = ref_s[:, 128:]
+    d = model.predictor.text_encoder(d_en, s, lengths, text_mask)
+    x = _packed_lstm(model.predictor.lstm, d, lengths)
+    duration = model.predictor.duration_proj(x)
+    duration = torch.sigmoid(duration).sum(axis=-1) / speeds.unsqueeze(1)
+    pred_dur = torch.round(duration).clamp(min=1).long().masked_fill(text_mask, 0)
+    t_en = model.text_encoder(input_ids, lengths, text_mask)
+
+    frames = [int(f) for f in pred_dur.sum(dim=1).tolist()]
+    out: List[Optional[Tuple[Any, Any]]] = [None] * bsz
+    for group in _group_by_frames(frames, pad_tolerance):
+        g = torch.tensor(group, dtype=torch.long, device=device)
+        n_frames = max(frames[i] for i in group)
+        aln = torch.zeros((len(group), max_len, n_frames), device=device)
+        for row, i in enumerate(group):
+            n = int(lengths[i])
+            idx = torch.repeat_interleave(
+                torch.arange(n, device=device), pred_dur[i, :n]
+            )
+            aln[row, idx, torch.arange(idx.shape[0], device=device)] = 1
+        en = d[g].transpose(-1, -2) @ aln
+        g_frames = torch.tensor([frames[i] for i in group], device=device)
+        # ProsodyPredictor.F0Ntrain with a packed shared LSTM
+        shared = _packed_lstm(model.predictor.shared, en.transpose(-1, -2), g_frames)
+        f0 = shared.transpose(-1, -2)
+        for block in model.predictor.F0:
+            f0 = block(f0, s[g])
+        f0 = model.predictor.F0_proj(f0).squeeze(1)
+        nn_ = shared.transpose(-1, -2)
+        for block in model.predictor.N:
+            nn_ = block(nn_, s[g])
+        nn_ = model.predictor.N_proj(nn_).squeeze(1)
+        asr = t_en[g] @ aln
+        audio = model.decoder(asr, f0, nn_, ref_s[g, :128]).reshape(len(group), -1)
+        per_frame = audio.shape[-1] // n_frames
+        for row, i in enumerate(group):
+            n = int(lengths[i])
+            out[i] = (audio[row, : frames[i] * per_frame], pred_dur[i, :n])
+    return out  # type: ignore[return-value]
+
+
+class KokoroBatcher:
+    """Coalesce concurrent Kokoro forward passes into padded batches.
+
+    Instances stand in for ``KModel`` when passed as ``model=`` to a
+    ``KPipeline`` call: G2P still runs on the calling worker thread, while every
+    acoustic-model call is queued here. A single batching thread collects up to
+    ``max_batch`` rows, waiting at most ``max_wait_ms`` after the first one,
+    runs them as one batch (voice embeddings are mixed per row) and hands each
+    caller its own slice. ``on_batch`` is called with the size of every batch
+    run (the app feeds it to a metric).
+    """
+
+    def __init__(
+        self,
+        model,
+        *,
+        max_batch: int = 8,
+        max_wait_ms: float = 5.0,
+        pad_tolerance: float = 0.15,
+        on_batch: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        self.model = model
+        self.on_batch = on_batch
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self.pad_tolerance = max(0.0, float(pad_tolerance))
+        self._q: "queue.Queue[_Row]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._sizes: Dict[int, int] = {}
+        self._thread = threading.Thread(
+            target=self._loop, name="kokoro-batcher", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def device(self):
+        return self.model.device
+
+    def __call__(self, phonemes: str, ref_s, speed: float = 1, return_output=False):
+        """Same contract as ``KModel.forward``; blocks until the row is done."""
+        row = _Row(phonemes, ref_s, speed)
+        self._q.put(row)
+        row.done.wait()
+        if row.error is not None:
+            raise row.error
+        if not return_output:
+            return row.audio
+        from kokoro.model import KModel  # type: ignore
+
+        return KModel.Output(audio=row.audio, pred_dur=row.pred_dur)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_batch": self.max_batch,
+                "max_wait_ms": round(self.max_wait_s * 1000.0, 3),
+                "batches": self._batches,
+                "rows": self._rows,
+                "avg_batch_size": (
+                    round(self._rows / self._batches, 3) if self._batches else 0.0
+                ),
+                "batch_sizes": dict(sorted(self._sizes.items())),
+            }
+
+    def _loop(self) -> None:
+        while True:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + self.max_wait_s
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch: List[_Row]) -> None:
+        try:
+            import torch  # type: ignore
+
+            with torch.inference_mode():
+                results = forward_batch(self.model, batch, self.pad_tolerance)
+            for row, (audio, pred_dur) in zip(batch, results):
+                row.audio = audio
+                row.pred_dur = pred_dur
+        except BaseException as ex:
+            for row in batch:
+                row.error = ex
+        finally:
+            with self._lock:
+                self._batches += 1
+                self._rows += len(batch)
+                self._sizes[len(batch)] = self._sizes.get(len(batch), 0) + 1
+            if self.on_batch is not None:
+                try:
+                    self.on_batch(len(batch))
+                except Exception:
+                    pass
+            for row in batch:
+                row.done.set()
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+_log = logging.getLogger("kokoro-service")
+
+# Phoneme lengths the compiled graphs are warmed up on; real inputs fall in
+# between and reuse the dynamic-shape graphs these produce
+DEFAULT_BUCKETS = (16, 64, 128, 256, 510)
+
+# Length used to compare eager and optimized latency at startup
+_REFERENCE_LENGTH = 128
+
+
+def _sample_phonemes(vocab: Dict[str, int], length: int) -> str:
+    """A phoneme string of ``length`` characters the model's vocab accepts."""
+    letters = [c for c in vocab if c.isalpha()] or list(vocab)
+    words: List[str] = []
+    n = 0
+    i = 0
+    while n < length:
+        word = "".join(letters[(i + k) % len(letters)] for k in range(5))
+        words.append(word)
+        n += len(word) + 1
+        i += 7
+    return " ".join(words)[:length]
+
+
+class KokoroEngine:
+    """How the Kokoro ``KModel`` runs: threads, inference mode, quantization
+    and compilation, applied once to the shared model when it is built.
+
+    - ``threads``/``interop_threads``: torch's intra- and inter-op pool sizes.
+      Every inference worker runs its own forward pass, so the default splits
+      the cores between the workers instead of giving each a full-width pool.
+    - ``inference_mode``: forward passes run under ``torch.inference_mode``
+      (no autograd bookkeeping or version counters), not just ``no_grad``.
+    - ``quantize``: dynamic int8 quantization of Linear and LSTM layers (CPU).
+    - ``compile``: ``torch.compile`` with dynamic shapes for the submodules in
+      ``compile_modules``, then warmed up on ``buckets`` phoneme lengths so
+      compilation happens at startup instead of in the first requests.
+
+    ``apply`` times a reference input before and after and records the
+    speedup in ``stats()``.
+    """
+
+    def __init__(
+        self,
+        *,
+        threads: int = 0,
+        interop_threads: int = 0,
+        inference_mode: bool = True,
+        quantize: bool = False,
+        compile: bool = False,
+        compile_mode: str = "default",
+        compile_modules: Sequence[str] = ("bert", "decoder"),
+        buckets: Sequence[int] = DEFAULT_BUCKETS,
+        concurrency: int = 1,
+    ) -> None:
+        self.concurrency = max(1, int(concurrency))
+        self.threads = max(0, int(threads))
+        self.interop_threads = max(0, int(interop_threads))
+        self.inference_mode = inference_mode
+        self.quantize = quantize
+        self.compile = compile
+        self.compile_mode = compile_mode
+        self.compile_modules = [m for m in compile_modules if m]
+        self.buckets = sorted({max(1, min(510, int(b))) for b in buckets})
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"applied": False}
+
+    @classmethod
+    def from_env(cls, concurrency: int) -> "KokoroEngine":
+        """Settings from ``KOKORO_TORCH_*``; ``concurrency`` is how many
+        forward passes may run at once (inference workers)."""
+        cores = os.cpu_count() or 1
+        default_threads = max(1, cores // max(1, concurrency))
+        buckets = [
+            int(b)
+            for b in os.environ.get(
+                "KOKORO_TORCH_WARMUP_BUCKETS", ",".join(map(str, DEFAULT_BUCKETS))
+            ).split(",")
+            if b.strip()
+        ]
+        return cls(
+            threads=int(os.environ.get("KOKORO_TORCH_THREADS", str(default_threads))),
+            interop_threads=int(os.environ.get("KOKORO_TORCH_INTEROP_THREADS", "1")),
+            inference_mode=os.environ.get("KOKORO_TORCH_INFERENCE_MODE", "1") != "0",
+            quantize=os.environ.get("KOKORO_TORCH_QUANTIZE", "0") == "1",
+            compile=os.environ.get("KOKORO_TORCH_COMPILE", "0") == "1",
+            compile_mode=os.environ.get("KOKORO_TORCH_COMPILE_MODE", "default"),
+            compile_modules=[
+                m.strip()
+                for m in os.environ.get(
+                    "KOKORO_TORCH_COMPILE_MODULES", "bert,decoder"
+                ).split(",")
+            ],
+            buckets=buckets,
+            concurrency=concurrency,
+        )
+
+    def configure_threads(self) -> None:
+        """Size torch's thread pools; call before the first forward pass."""
+        torch = sys.modules.get("torch")
+        if torch is None:
+            return
+        if self.threads > 0:
+            torch.set_num_threads(self.threads)
+        if self.interop_threads > 0:
+            try:
+                torch.set_num_interop_threads(self.interop_threads)
+            except RuntimeError as ex:
+                # Only settable before any inter-op work has started
+                _log.warning("engine: interop threads unchanged: %s", ex)
+        threads = torch.get_num_threads()
+        with self._lock:
+            self._stats["threads"] = threads
+            self._stats["interop_threads"] = torch.get_num_interop_threads()
+            # What actually competes for the cores when every worker is busy
+            self._stats["workers"] = self.concurrency
+            self._stats["total_threads"] = threads * self.concurrency
+            self._stats["cores"] = os.cpu_count() or 1
+        if threads * self.concurrency > (os.cpu_count() or 1):
+            _log.warning(
+                "engine: %s workers x %s threads oversubscribe %s cores",
+                self.concurrency,
+                threads,
+                os.cpu_count() or 1,
+            )
+
+    def apply(self, model, ref_s=None) -> None:
+        """Optimize ``model`` in place and warm it up.
+
+        ``ref_s`` is a voice pack (or a single style vector) used for the
+        warmup passes; zeros are used without one.
+        """
+        # Loaded by kokoro; never imported here on its own
+        torch = sys.modules.get("torch")
+        if torch is None:
+            _log.warning("engine: torch is not loaded, nothing to apply")
+            return
+        on_cpu = str(getattr(model, "device", "cpu")) == "cpu"
+        eager_ms = self._time(model, ref_s)
+
+        if self.inference_mode:
+            self._wrap_inference_mode(model, torch)
+        if self.quantize:
+            if on_cpu:
+                torch.ao.quantization.quantize_dynamic(
+                    model,
+                    {torch.nn.Linear, torch.nn.LSTM},
+                    dtype=torch.qint8,
+                    inplace=True,
+                )
+            else:
+                _log.warning("engine: dynamic quantization skipped off CPU")
+        compiled: List[str] = []
+        if self.compile:
+            for name in self.compile_modules:
+                sub = getattr(model, name, None)
+                if sub is None:
+                    _log.warning("engine: no submodule %s to compile", name)
+                    continue
+                setattr(
+                    model,
+                    name,
+                    torch.compile(sub, mode=self.compile_mode, dynamic=True),
+                )
+                compiled.append(name)
+
+        t0 = time.perf_counter()
+        warmed = []
+        if compiled or self.quantize:
+            for length in self.buckets:
+                try:
+                    self._forward(model, ref_s, length)
+                    warmed.append(length)
+                except Exception as ex:
+                    _log.warning(
+                        "engine: warmup at %s phonemes failed: %s", length, repr(ex)
+                    )
+        warmup_s = time.perf_counter() - t0
+        optimized_ms = self._time(model, ref_s)
+
+        speedup = None
+        if eager_ms and optimized_ms:
+            speedup = round(eager_ms / optimized_ms, 3)
+        with self._lock:
+            self._stats.update(
+                {
+                    "applied": True,
+                    "inference_mode": self.inference_mode,
+                    "quantized": self.quantize and on_cpu,
+                    "compiled": compiled,
+                    "compile_mode": self.compile_mode if compiled else None,
+                    "warmup_buckets": warmed,
+                    "warmup_seconds": round(warmup_s, 3),
+                    "reference_phonemes": _REFERENCE_LENGTH,
+                    "eager_ms": eager_ms,
+                    "optimized_ms": optimized_ms,
+                    "speedup": speedup,
+                }
+            )
+        _log.info(
+            "engine: inference_mode=%s quantized=%s compiled=%s warmup=%.1fs "
+            "eager=%sms optimized=%sms speedup=%sx",
+            self.inference_mode,
+            self.quantize and on_cpu,
+            compiled,
+            warmup_s,
+            eager_ms,
+            optimized_ms,
+            speedup,
+        )
+        if speedup is not None and speedup < 1.0:
+            _log.warning(
+                "engine: optimized reference pass is slower than eager; "
+                "check KOKORO_TORCH_QUANTIZE/KOKORO_TORCH_COMPILE on this host"
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._stats)
+
+    # Internals
+
+    def _wrap_inference_mode(self, model, torch) -> None:
+        # Inference mode is thread-local, so it is entered per call on
+        # whichever worker thread runs the forward pass
+        for name in ("forward", "forward_with_tokens"):
+            fn = getattr(model, name, None)
+            if fn is None or getattr(fn, "_inference_mode", False):
+                continue
+            wrapped = torch.inference_mode()(fn)
+            wrapped._inference_mode = True
+            setattr(model, name, wrapped)
+
+    def _style(self, ref_s, length: int):
+        if ref_s is None:
+            return sys.modules["torch"].zeros((1, 256))
+        if ref_s.dim() == 3:
+            # Voice pack: one style vector per input length
+            return ref_s[min(length, len(ref_s)) - 1]
+        return ref_s
+
+    def _forward(self, model, ref_s, length: int) -> None:
+        phonemes = _sample_phonemes(getattr(model, "vocab", {}) or {"a": 1}, length)
+        style = self._style(ref_s, len(phonemes))
+        device = getattr(model, "device", None)
+        if device is not None and hasattr(style, "to"):
+            style = style.to(device)
+        model(phonemes, style, 1.0)
+
+    def _time(self, model, ref_s, repeats: int = 3) -> Optional[float]:
+        """Median latency in ms of a reference forward pass (after one
+        untimed pass), or None if the model cannot run it."""
+        try:
+            self._forward(model, ref_s, _REFERENCE_LENGTH)
+            runs = []
+            for _ in range(repeats):
+                t0 = time.perf_counter()
+                self._forward(model, ref_s, _REFERENCE_LENGTH)
+                runs.append((time.perf_counter() - t0) * 1000.0)
+            return round(statistics.median(runs), 3)
+        except Exception as ex:
+            _log.warning("engine: reference timing failed: %s", repr(ex))
+            return None
@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .kokoro_pipelines import (
+    KOKORO_DEFAULT_VOICES,
+    KOKORO_LANGUAGES,
+    MAX_PHONEMES,
+    kokoro_lang_code,
+    split_phonemes,
+)
+from .timing import phase
+
+_log = logging.getLogger("kokoro-service")
+
+SAMPLE_RATE = 24000
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…。！？])\s+|\n+")
+
+# espeak-ng language per Kokoro lang_code, as in KPipeline
+_ESPEAK_LANGS = {"e": "es", "f": "fr-fr", "h": "hi", "i": "it", "p": "pt-br"}
+
+
+def _make_g2p(code: str):
+    """misaki front end for a Kokoro lang_code, configured like KPipeline."""
+    if code in ("a", "b"):
+        from misaki import en, espeak  # type: ignore
+
+        try:
+            fallback = espeak.EspeakFallback(british=code == "b")
+        except Exception:
+            fallback = None
+        return en.G2P(trf=False, british=code == "b", fallback=fallback, unk="")
+    if code == "j":
+        from misaki import ja  # type: ignore
+
+        return ja.JAG2P()
+    if code == "z":
+        from misaki import zh  # type: ignore
+
+        return zh.ZHG2P()
+    from misaki import espeak  # type: ignore
+
+    return espeak.EspeakG2P(language=_ESPEAK_LANGS[code])
+
+
+class KokoroOnnxProvider:
+    """Kokoro through ONNX Runtime on CPU, without torch.
+
+    ``model_dir`` holds what ``scripts/export_kokoro_onnx.py`` writes: the
+    graph (``model.int8.onnx`` when quantized, else ``model.onnx``),
+    ``config.json`` with the phoneme vocabulary, and ``voices/<id>.npy``
+    style packs (raw float32 ``.bin`` packs are read too). Text goes through
+    the same misaki front ends as ``KPipeline``, one sentence per forward
+    pass, so audio is yielded as each sentence finishes.
+    """
+
+    name: str = "kokoro_onnx"
+    maxCharsPerRequest: int = 20000
+    supportsSsml: bool = False
+
+    def __init__(
+        self,
+        model_dir: str,
+        *,
+        model_file: Optional[str] = None,
+        threads: int = 0,
+        default_lang: str = "a",
+        languages: Optional[Iterable[str]] = None,
+        g2p_cache=None,
+    ) -> None:
+        import onnxruntime as ort  # type: ignore
+
+        self.model_dir = model_dir
+        if model_file is None:
+            quantized = os.path.join(model_dir, "model.int8.onnx")
+            model_file = (
+                "model.int8.onnx" if os.path.isfile(quantized) else "model.onnx"
+            )
+        self.model_path = os.path.join(model_dir, model_file)
+        if not os.path.isfile(self.model_path):
+            raise FileNotFoundError(self.model_path)
+        with open(os.path.join(model_dir, "config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.vocab: Dict[str, int] = config["vocab"]
+        self.voices_dir = os.path.join(model_dir, "voices")
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # Parallelism comes from the inference pool's workers; keep each
+        # session call on its own intra-op threads only
+        opts.inter_op_num_threads = 1
+        if threads > 0:
+            opts.intra_op_num_threads = threads
+        self.threads = threads
+        self.session = ort.InferenceSession(
+            self.model_path, sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        # Exported graphs name the style input "style"; older ones "ref_s"
+        self._style_input = "style" if "style" in self._inputs else "ref_s"
+
+        self.default_lang = default_lang
+        self.languages = set(languages or KOKORO_LANGUAGES) | {default_lang}
+        # Optional G2PCache consulted before each misaki front end
+        self.g2p_cache = g2p_cache
+        self._lock = threading.Lock()
+        self._g2p: Dict[str, Any] = {}
+        self._failed: Dict[str, str] = {}
+        self._packs: Dict[str, np.ndarray] = {}
+        self._counters = {"forward_calls": 0, "phonemes": 0}
+
+    # Languages and voices
+
+    def supports(self, language: Optional[str]) -> bool:
+        code = kokoro_lang_code(language)
+        return code is not None and code in self.languages and code not in self._failed
+
+    def resolve(self, language: Optional[str]) -> str:
+        if not self.supports(language):
+            return self.default_lang
+        return kokoro_lang_code(language)  # type: ignore[return-value]
+
+    def voices(self) -> List[Dict[str, str]]:
+        try:
+            names = sorted(
+                os.path.splitext(f)[0]
+                for f in os.listdir(self.voices_dir)
+                if f.endswith((".npy", ".bin"))
+            )
+        except OSError:
+            return []
+        return [{"id": n, "lang": KOKORO_LANGUAGES.get(n[:1], "en-US")} for n in names]
+
+    def _g2p_for(self, code: str):
+        with self._lock:
+            g2p = self._g2p.get(code)
+        if g2p is not None:
+            return g2p
+        try:
+            g2p = _make_g2p(code)
+        except Exception as ex:
+            self._failed[code] = repr(ex)
+            raise
+        if self.g2p_cache is not None:
+            g2p = self.g2p_cache.wrap(code, g2p)
+        with self._lock:
+            return self._g2p.setdefault(code, g2p)
+
+    def _pack(self, voice_id: str) -> np.ndarray:
+        with self._lock:
+            pack = self._packs.get(voice_id)
+        if pack is not None:
+            return pack
+        npy = os.path.join(self.voices_dir, voice_id + ".npy")
+        if os.path.isfile(npy):
+            pack = np.load(npy)
+        else:
+            bin_path = os.path.join(self.voices_dir, voice_id + ".bin")
+            pack = np.fromfile(bin_path, dtype=np.float32)
+        pack = np.asarray(pack, dtype=np.float32).reshape(-1, 1, 256)
+        with self._lock:
+            return self._packs.setdefault(voice_id, pack)
+
+    def _exported(self, voice_id: str) -> bool:
+        return voice_id in self._packs or any(
+            os.path.isfile(os.path.join(self.voices_dir, voice_id + ext))
+            for ext in (".npy", ".bin")
+        )
+
+    def _voice(
+        self, code: str, voice: Optional[str], explicit: bool = False
+    ) -> np.ndarray:
+        """Style pack for ``voice``, swapped for the language's default only
+        when ``explicit`` names another language or the pack was not
+        exported (only exported packs exist here)."""
+        ids = [v.strip() for v in (voice or "").split(",") if v.strip()]
+        mismatch = explicit and any(v[0] != code for v in ids)
+        missing = [v for v in ids if not self._exported(v)]
+        if not ids or mismatch or missing:
+            if ids:
+                _log.info(
+                    "kokoro_onnx: voice %s %s, using lang=%s default",
+                    voice,
+                    "not exported" if missing else "does not match",
+                    code,
+                )
+            # The language's default voice, then the default language's
+            ids = [KOKORO_DEFAULT_VOICES.get(code, "af_heart")]
+            if not self._exported(ids[0]):
+                ids = [KOKORO_DEFAULT_VOICES.get(self.default_lang, "af_heart")]
+        packs = [self._pack(v) for v in ids]
+        # Comma-separated voices are averaged, like KPipeline.load_voice
+        return packs[0] if len(packs) == 1 else np.mean(packs, axis=0)
+
+    # Inference
+
+    def _phonemize(self, g2p, text: str) -> str:
+        out = g2p(text)
+        return out[0] if isinstance(out, tuple) else out
+
+    def _forward(self, ps: str, pack: np.ndarray, speed: float) -> np.ndarray:
+        ids = [self.vocab[p] for p in ps if p in self.vocab][:MAX_PHONEMES]
+        if not ids:
+            return np.zeros((0,), dtype=np.float32)
+        feeds = {
+            "input_ids": np.array([[0, *ids, 0]], dtype=np.int64),
+            self._style_input: pack[min(len(ids), len(pack)) - 1].astype(np.float32),
+            "speed": np.array([speed], dtype=np.float32),
+        }
+        audio = self.session.run(None, feeds)[0]
+        with self._lock:
+            self._counters["forward_calls"] += 1
+            self._counters["phonemes"] += len(ids)
+        return np.asarray(audio, dtype=np.float32).reshape(-1)
+
+    def stream(
+        self,
+        *,
+        text: str,
+        voiceId: Optional[str],
+        speed: Optional[float],
+        languageCode: Optional[str] | None = None,
+        phonemes: Optional[str] = None,
+    ) -> Iterator[Tuple[np.ndarray, int]]:
+        """Yield (audio, sample_rate) per sentence (or 510-phoneme piece).
+
+        With ``phonemes`` G2P is skipped and ``text`` is ignored.
+        """
+        code = self.resolve(languageCode)
+        g2p = None
+        if phonemes is None:
+            try:
+                g2p = self._g2p_for(code)
+            except Exception:
+                if code == self.default_lang:
+                    raise
+                # Served like later requests, which resolve() now reroutes
+                code = self.default_lang
+                g2p = self._g2p_for(code)
+        with phase("voice"):
+            pack = self._voice(code, voiceId, explicit=languageCode is not None)
+        if g2p is None:
+            for piece in split_phonemes(phonemes or ""):
+                audio = self._forward(piece, pack, float(speed or 1.0))
+                if audio.size:
+                    yield audio, SAMPLE_RATE
+            return
+        for sentence in _SENTENCE_END.split(text):
+            if not sentence.strip():
+                continue
+            with phase("g2p"):
+                ps = self._phonemize(g2p, sentence.strip())
+            for piece in split_phonemes(ps or ""):
+                audio = self._forward(piece, pack, float(speed or 1.0))
+                if audio.size:
+                    yield audio, SAMPLE_RATE
+
+    def synthesize(
+        self,
+        *,
+        text: str,
+        voiceId: Optional[str],
+        speed: Optional[float],
+        languageCode: Optional[str] | None = None,
+        phonemes: Optional[str] = None,
+    ) -> Tuple[np.ndarray, int]:
+        chunks = [
+            audio
+            for audio, _ in self.stream(
+                text=text,
+                voiceId=voiceId,
+                speed=speed,
+                languageCode=languageCode,
+                phonemes=phonemes,
+            )
+        ]
+        if not chunks:
+            return np.zeros((0,), dtype=np.float32), SAMPLE_RATE
+        return np.concatenate(chunks), SAMPLE_RATE
+
+    def available_languages(self) -> List[str]:
+        return sorted(
+            KOKORO_LANGUAGES.get(c, c) for c in self.languages if c not in self._failed
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model": os.path.basename(self.model_path),
+                "threads": self.threads,
+                "g2p_loaded": sorted(self._g2p),
+                "failed": dict(self._failed),
+                "voices_loaded": sorted(self._packs),
+                **self._counters,
+            }
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+_log = logging.getLogger("kokoro-service")
+
+# Kokoro's context is 512 tokens including the two pad tokens
+MAX_PHONEMES = 510
+
+# BCP-47 tag (or primary subtag) -> Kokoro lang_code
+KOKORO_LANG_CODES: Dict[str, str] = {
+    "en-us": "a",
+    "en": "a",
+    "en-gb": "b",
+    "es": "e",
+    "fr": "f",
+    "hi": "h",
+    "it": "i",
+    "ja": "j",
+    "pt-br": "p",
+    "pt": "p",
+    "zh": "z",
+}
+
+# Kokoro lang_code -> BCP-47 tag reported to clients
+KOKORO_LANGUAGES: Dict[str, str] = {
+    "a": "en-US",
+    "b": "en-GB",
+    "e": "es-ES",
+    "f": "fr-FR",
+    "h": "hi-IN",
+    "i": "it-IT",
+    "j": "ja-JP",
+    "p": "pt-BR",
+    "z": "zh-CN",
+}
+
+# Voice used when the requested voice belongs to another language; Kokoro
+# voice ids start with their lang_code (af_heart, jf_alpha, ...)
+KOKORO_DEFAULT_VOICES: Dict[str, str] = {
+    "a": "af_heart",
+    "b": "bf_emma",
+    "e": "ef_dora",
+    "f": "ff_siwis",
+    "h": "hf_alpha",
+    "i": "if_sara",
+    "j": "jf_alpha",
+    "p": "pf_dora",
+    "z": "zf_xiaobei",
+}
+
+
+def split_phonemes(ps: str, limit: int = MAX_PHONEMES) -> List[str]:
+    """Cut a phoneme string into pieces of at most ``limit`` characters,
+    preferring punctuation, then spaces."""
+    out: List[str] = []
+    while len(ps) > limit:
+        head = ps[:limit]
+        cut = max(head.rfind(c) for c in ".!?;:,—…")
+        if cut < limit // 2:
+            cut = head.rfind(" ")
+        if cut <= 0:
+            cut = limit - 1
+        out.append(ps[: cut + 1].strip())
+        ps = ps[cut + 1 :]
+    if ps.strip():
+        out.append(ps.strip())
+    return [p for p in out if p]
+
+
+def kokoro_lang_code(language: Optional[str]) -> Optional[str]:
+    """Kokoro lang_code for a BCP-47 tag or Kokoro alias, None if not covered."""
+    if not language:
+        return None
+    tag = language.strip().lower().replace("_", "-")
+    if tag in KOKORO_LANGUAGES:
+        return tag
+    return KOKORO_LANG_CODES.get(tag) or KOKORO_LANG_CODES.get(tag.split("-")[0])
+
+
+class KokoroPipelinePool:
+    """Lazily created ``KPipeline`` per language, all sharing one ``KModel``.
+
+    Only the G2P front end differs between languages, so extra pipelines cost
+    their phonemizer and nothing else. The default pipeline is pinned; the
+    others are kept in an LRU of at most ``max_pipelines`` and dropped when
+    least recently used (requests already holding one keep it until done). A
+    language whose pipeline fails to build (e.g. a missing ``misaki[ja]``
+    extra) is marked unavailable so routing stops sending it here.
+    """
+
+    def __init__(
+        self,
+        default_pipeline,
+        factory: Callable[[str], Any],
+        *,
+        default_lang: str,
+        languages: Optional[Iterable[str]] = None,
+        max_pipelines: int = 4,
+    ) -> None:
+        self.default_lang = default_lang
+        self._default = default_pipeline
+        self._factory = factory
+        self.languages = set(languages or KOKORO_LANGUAGES) | {default_lang}
+        self.max_pipelines = max(1, int(max_pipelines))
+        self._lock = threading.Lock()
+        self._pipes: "OrderedDict[str, Any]" = OrderedDict()
+        self._building: Dict[str, threading.Lock] = {}
+        self._failed: Dict[str, str] = {}
+        self._counters = {"created": 0, "evictions": 0}
+
+    def supports(self, language: Optional[str]) -> bool:
+        code = kokoro_lang_code(language)
+        return code is not None and code in self.languages and code not in self._failed
+
+    def resolve(self, language: Optional[str]) -> str:
+        code = kokoro_lang_code(language)
+        if code is None or code not in self.languages or code in self._failed:
+            return self.default_lang
+        return code
+
+    def default_voice(self, code: str) -> str:
+        return KOKORO_DEFAULT_VOICES.get(code, "af_heart")
+
+    def voice_for(
+        self, code: str, voice: Optional[str], *, explicit: bool = False
+    ) -> str:
+        """The voice to use with the ``code`` pipeline.
+
+        ``voice`` is kept unless ``explicit`` (the caller asked for a
+        language) and it belongs to another language; then that language's
+        default voice is used. Voices are only matched to a language by their
+        first letter, so custom voices are never swapped without a request.
+        """
+        ids = [v.strip() for v in (voice or "").split(",") if v.strip()]
+        if not ids:
+            return self.default_voice(code)
+        if all(v[0] == code for v in ids):
+            return voice  # type: ignore[return-value]
+        if explicit:
+            _log.info(
+                "voice %s does not match lang=%s, using %s",
+                voice,
+                code,
+                self.default_voice(code),
+            )
+            return self.default_voice(code)
+        _log.debug("voice %s used with lang=%s pipeline", voice, code)
+        return voice  # type: ignore[return-value]
+
+    def acquire(self, language: Optional[str]) -> Tuple[str, Any]:
+        """``(code, pipeline)`` serving ``language``.
+
+        Falls back to the default language when the pipeline cannot be built,
+        so the first request for that language is served like later ones.
+        """
+        code = self.resolve(language)
+        try:
+            return code, self.get(code)
+        except Exception:
+            return self.default_lang, self._default
+
+    def get(self, code: str):
+        if code == self.default_lang:
+            return self._default
+        with self._lock:
+            pipe = self._pipes.get(code)
+            if pipe is not None:
+                self._pipes.move_to_end(code)
+                return pipe
+            build_lock = self._building.setdefault(code, threading.Lock())
+        with build_lock:
+            with self._lock:
+                pipe = self._pipes.get(code)
+                if pipe is not None:
+                    return pipe
+            try:
+                pipe = self._factory(code)
+            except Exception as ex:
+                self._failed[code] = repr(ex)
+                _log.warning(
+                    "kokoro pipeline for lang=%s unavailable: %s", code, repr(ex)
+                )
+                raise
+            with self._lock:
+                self._pipes[code] = pipe
+                self._counters["created"] += 1
+                while len(self._pipes) > self.max_pipelines - 1:
+                    evicted, _ = self._pipes.popitem(last=False)
+                    self._counters["evictions"] += 1
+                    _log.info("kokoro pipeline for lang=%s evicted", evicted)
+            _log.info("kokoro pipeline for lang=%s created", code)
+            return pipe
+
+    def available_languages(self) -> List[str]:
+        return sorted(
+            KOKORO_LANGUAGES.get(c, c) for c in self.languages if c not in self._failed
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "default": self.default_lang,
+                "loaded": [self.default_lang, *self._pipes],
+                "max_pipelines": self.max_pipelines,
+                "failed": dict(self._failed),
+                **self._counters,
+            }
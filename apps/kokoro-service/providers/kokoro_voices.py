@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def _nbytes(pack: Any) -> int:
+    try:
+        return int(pack.numel()) * int(pack.element_size())
+    except Exception:
+        return 0
+
+
+class KokoroVoiceManager:
+    """Resident Kokoro voice packs: a pinned hot set plus a byte-bounded LRU.
+
+    Packs are loaded through the pipeline (local ``<voices_dir>/<id>.pt`` when
+    present, else the Hub cache) and removed from ``pipeline.voices`` again so
+    this manager alone decides what stays in memory. Callers get the tensor
+    and pass it as ``voice=`` to the pipeline, which then skips its own load.
+    Comma-separated ids are averaged, like ``KPipeline.load_voice``.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        *,
+        voices_dir: Optional[str] = None,
+        max_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        self.pipe = pipeline
+        self.voices_dir = voices_dir
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._packs: "OrderedDict[str, Any]" = OrderedDict()
+        self._pinned: set[str] = set()
+        self._loading: Dict[str, threading.Event] = {}
+        self._bytes = 0
+        self._counters = {"hits": 0, "loads": 0, "evictions": 0}
+        self._load_ms: Dict[str, float] = {}
+
+    def _source(self, voice_id: str) -> str:
+        if self.voices_dir:
+            for ext in (".pt", ".pth"):
+                p = os.path.join(self.voices_dir, voice_id + ext)
+                if os.path.isfile(p):
+                    return p
+        return voice_id
+
+    def _load(self, voice_id: str) -> Any:
+        src = self._source(voice_id)
+        t0 = time.perf_counter()
+        pack = self.pipe.load_single_voice(src)
+        # The pipeline caches every pack it loads; residency is managed here
+        getattr(self.pipe, "voices", {}).pop(src, None)
+        with self._lock:
+            self._load_ms[voice_id] = round((time.perf_counter() - t0) * 1000.0, 3)
+        return pack
+
+    def _get_one(self, voice_id: str) -> Any:
+        while True:
+            with self._lock:
+                pack = self._packs.get(voice_id)
+                if pack is not None:
+                    self._packs.move_to_end(voice_id)
+                    self._counters["hits"] += 1
+                    return pack
+                waiter = self._loading.get(voice_id)
+                if waiter is None:
+                    waiter = self._loading[voice_id] = threading.Event()
+                    break
+            # Another thread is loading this voice; wait and re-check
+            waiter.wait()
+        try:
+            pack = self._load(voice_id)
+            with self._lock:
+                self._packs[voice_id] = pack
+                self._bytes += _nbytes(pack)
+                self._counters["loads"] += 1
+                self._evict_locked()
+            return pack
+        finally:
+            with self._lock:
+                self._loading.pop(voice_id, None)
+            waiter.set()
+
+    def _evict_locked(self) -> None:
+        if self.max_bytes <= 0:
+            return
+        for vid in list(self._packs):
+            if self._bytes <= self.max_bytes:
+                break
+            if vid in self._pinned:
+                continue
+            self._bytes -= _nbytes(self._packs.pop(vid))
+            self._counters["evictions"] += 1
+
+    def get(self, voice: str) -> Any:
+        """Voice tensor for ``voice`` (an id or comma-separated mix of ids)."""
+        ids = [v.strip() for v in voice.split(",") if v.strip()]
+        if len(ids) <= 1:
+            return self._get_one(ids[0] if ids else voice)
+        import torch  # type: ignore
+
+        return torch.mean(torch.stack([self._get_one(v) for v in ids]), dim=0)
+
+    def prewarm(self, voice_ids: Iterable[str], *, pin: bool = False) -> List[str]:
+        """Load ``voice_ids`` (pinning them if asked); returns those loaded."""
+        done: List[str] = []
+        for vid in voice_ids:
+            if pin:
+                with self._lock:
+                    self._pinned.add(vid)
+            self._get_one(vid)
+            done.append(vid)
+        return done
+
+    def evict(self, voice_ids: Iterable[str]) -> List[str]:
+        """Drop ``voice_ids`` (and their pins); returns those that were resident."""
+        out: List[str] = []
+        with self._lock:
+            for vid in voice_ids:
+                self._pinned.discard(vid)
+                pack = self._packs.pop(vid, None)
+                if pack is not None:
+                    self._bytes -= _nbytes(pack)
+                    out.append(vid)
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "resident": [
+                    {
+                        "id": vid,
+                        "bytes": _nbytes(pack),
+                        "pinned": vid in self._pinned,
+                        "load_ms": self._load_ms.get(vid),
+                    }
+                    for vid, pack in self._packs.items()
+                ],
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                **self._counters,
+            }
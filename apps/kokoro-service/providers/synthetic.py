@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import re
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .timing import phase
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…。！？])\s*|\n+")
+
+SAMPLE_RATE = 24000
+
+
+def _seed(*parts: str) -> int:
+    return zlib.crc32("\x00".join(parts).encode("utf-8"))
+
+
+class SyntheticProvider:
+    """Deterministic stand-in for a neural TTS model, for benchmarks and CI.
+
+    Each sentence becomes a voiced tone plus a little noise, seeded from the
+    voice and text so identical requests produce identical audio. Synthesis
+    costs ``ms_per_char`` of wall time per input character, split 10/90
+    between a ``g2p`` phase and the forward pass, and produces
+    ``seconds_per_char`` of audio, so queueing, encoding and I/O behave as
+    they would with a real model of that speed. With ``busy`` the cost is
+    spent computing on the CPU while holding the GIL (like pure-Python
+    front ends); otherwise it sleeps (like torch kernels, which release it).
+    """
+
+    name: str = "synthetic"
+    maxCharsPerRequest: int = 20000
+    supportsSsml: bool = False
+
+    def __init__(
+        self,
+        *,
+        ms_per_char: float = 2.0,
+        seconds_per_char: float = 0.06,
+        busy: bool = False,
+    ) -> None:
+        self.ms_per_char = max(0.0, float(ms_per_char))
+        self.seconds_per_char = max(0.001, float(seconds_per_char))
+        self.busy = busy
+
+    def voices(self) -> List[Dict[str, str]]:
+        return [
+            {"id": "synth_low", "lang": "en-US"},
+            {"id": "synth_mid", "lang": "en-US"},
+            {"id": "synth_high", "lang": "en-US"},
+        ]
+
+    def _spend(self, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        if not self.busy:
+            time.sleep(seconds)
+            return
+        deadline = time.perf_counter() + seconds
+        x = 0
+        while time.perf_counter() < deadline:
+            for i in range(1000):
+                x ^= i
+
+    def _tone(self, sentence: str, voice: str, speed: float) -> np.ndarray:
+        n = int(SAMPLE_RATE * len(sentence) * self.seconds_per_char / max(0.25, speed))
+        rng = np.random.default_rng(_seed(voice, sentence))
+        f0 = 90.0 + (_seed(voice) % 200)
+        t = np.arange(n, dtype=np.float32) / SAMPLE_RATE
+        # Slow pitch and loudness movement so encoders see speech-like signal
+        vibrato = 1.0 + 0.03 * np.sin(2 * np.pi * 4.0 * t)
+        phase_acc = 2 * np.pi * f0 * np.cumsum(vibrato) / SAMPLE_RATE
+        audio = (
+            np.sin(phase_acc)
+            + 0.4 * np.sin(2 * phase_acc)
+            + 0.2 * np.sin(3 * phase_acc)
+        )
+        envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3.0 * t + rng.uniform(0, np.pi))
+        audio = 0.3 * audio * envelope + 0.01 * rng.standard_normal(n)
+        fade = min(n // 2, SAMPLE_RATE // 100)
+        if fade:
+            ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+            audio[:fade] *= ramp
+            audio[-fade:] *= ramp[::-1]
+        return audio.astype(np.float32)
+
+    def stream(
+        self,
+        *,
+        text: str,
+        voiceId: Optional[str],
+        speed: Optional[float],
+        languageCode: Optional[str] | None = None,
+    ) -> Iterator[Tuple[np.ndarray, int]]:
+        """Yield (audio, sample_rate) per sentence after its simulated cost."""
+        voice = voiceId or "synth_mid"
+        for sentence in _SENTENCE_END.split(text):
+            sentence = sentence.strip()
+            if not sentence:
+                continue
+            cost = len(sentence) * self.ms_per_char / 1000.0
+            with phase("g2p"):
+                self._spend(cost * 0.1)
+            self._spend(cost * 0.9)
+            yield self._tone(sentence, voice, speed or 1.0), SAMPLE_RATE
+
+    def synthesize(
+        self,
+        *,
+        text: str,
+        voiceId: Optional[str],
+        speed: Optional[float],
+        languageCode: Optional[str] | None = None,
+    ) -> Tuple[np.ndarray, int]:
+        chunks = [
+            audio
+            for audio, _ in self.stream(
+                text=text, voiceId=voiceId, speed=speed, languageCode=languageCode
+            )
+        ]
+        if not chunks:
+            return np.zeros((0,), dtype=np.float32), SAMPLE_RATE
+        return np.concatenate(chunks), SAMPLE_RATE
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+class Timings:
+    """Exclusive time per phase for one request.
+
+    Phases nest: time spent in an inner phase is not counted again in the
+    enclosing one, so a provider reporting ``g2p`` inside the app's
+    ``forward`` splits that time instead of adding to it. One object is shared
+    by every thread working on the request (InferencePool and
+    ``asyncio.to_thread`` carry the context over), so each thread keeps its
+    own phase stack.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._totals: Dict[str, float] = {}
+        self._local = threading.local()
+        # thread ident -> open phases, used by the sampling profiler
+        self._threads: Dict[int, int] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._totals[name] = self._totals.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+        children = [0.0]
+        stack.append(children)
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            dt = time.perf_counter() - t0
+            stack.pop()
+            if stack:
+                stack[-1][0] += dt
+            with self._lock:
+                self._totals[name] = self._totals.get(name, 0.0) + dt - children[0]
+                left = self._threads[ident] - 1
+                if left:
+                    self._threads[ident] = left
+                else:
+                    del self._threads[ident]
+
+    def active_threads(self) -> List[int]:
+        with self._lock:
+            return list(self._threads)
+
+    def totals(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._totals)
+
+    def header(self) -> str:
+        """Server-Timing value: each phase plus ``total``, in milliseconds."""
+        parts = [f"{name};dur={s * 1000.0:.2f}" for name, s in self.totals().items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000.0:.2f}")
+        return ", ".join(parts)
+
+
+_current: contextvars.ContextVar[Optional[Timings]] = contextvars.ContextVar(
+    "tts_timings", default=None
+)
+
+
+def begin() -> Timings:
+    """Start timing the current request; later phases in this context report here."""
+    timings = Timings()
+    _current.set(timings)
+    return timings
+
+
+def current() -> Optional[Timings]:
+    return _current.get()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Attribute the enclosed block to ``name``; a no-op outside a request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    with timings.phase(name):
+        yield
+
+
+def add(name: str, seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
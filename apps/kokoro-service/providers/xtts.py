@@ -1,23 +1,108 @@
 from __future__ import annotations
 
+import hashlib
+import logging
 import os
+import re
+import threading
 from glob import glob
-from typing import Optional, Tuple, Dict, List
+from typing import Any, Iterator, Optional, Tuple, Dict, List
 
 import numpy as np
 
+from .timing import phase
+
+_log = logging.getLogger("kokoro-service")
+
+# Sentence ends: Latin punctuation before whitespace, CJK full stops, Devanagari danda
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|(?<=[。！？；])|(?<=[।॥])\s*")
+_SOFT_BREAKS = (", ", "、", "，", "; ", " ")
+
+
+def split_sentences(text: str, max_chars: int) -> List[str]:
+    """Split ``text`` into sentences of at most ``max_chars`` characters.
+
+    Over-long sentences are cut at the last comma or space before the limit
+    (or hard at the limit for unspaced scripts).
+    """
+    out: List[str] = []
+    for part in _SENTENCE_END.split(text or ""):
+        part = part.strip()
+        while len(part) > max_chars:
+            cut = max(part.rfind(sep, 0, max_chars) for sep in _SOFT_BREAKS)
+            cut = cut + 1 if cut > 0 else max_chars
+            out.append(part[:cut].strip())
+            part = part[cut:].strip()
+        if part:
+            out.append(part)
+    return out
+
+
+def _to_numpy(wav: Any) -> np.ndarray:
+    if hasattr(wav, "detach") and hasattr(wav, "cpu"):
+        wav = wav.detach().cpu().numpy()
+    return np.asarray(wav, dtype=np.float32).ravel()
+
+
+class _Crossfader:
+    """Hold back a short tail of each chunk; overlap it with the next sentence."""
+
+    def __init__(self, samples: int) -> None:
+        self.samples = max(0, int(samples))
+        self._tail: Optional[np.ndarray] = None
+        self._fade = False
+
+    def push(self, chunk: np.ndarray) -> np.ndarray:
+        if self.samples == 0 or chunk.size == 0:
+            return chunk
+        if self._tail is None:
+            body = chunk
+        elif self._fade:
+            k = min(self._tail.size, chunk.size)
+            ramp = np.linspace(0.0, 1.0, k, dtype=np.float32)
+            mixed = self._tail[self._tail.size - k :] * (1.0 - ramp) + chunk[:k] * ramp
+            body = np.concatenate([self._tail[: self._tail.size - k], mixed, chunk[k:]])
+        else:
+            body = np.concatenate([self._tail, chunk])
+        self._fade = False
+        keep = min(self.samples, body.size)
+        self._tail = body[body.size - keep :].copy()
+        return body[: body.size - keep]
+
+    def boundary(self) -> None:
+        """Next chunk starts a new sentence."""
+        self._fade = self._tail is not None
+
+    def flush(self) -> np.ndarray:
+        tail, self._tail = self._tail, None
+        return tail if tail is not None else np.zeros((0,), dtype=np.float32)
+
 
 class XTTSProvider:
     name: str = "xtts"
     maxCharsPerRequest: int = 1200
     supportsSsml: bool = False
 
-    def __init__(self, speakers_dir: str = "assets/xtts-speakers") -> None:
+    def __init__(
+        self,
+        speakers_dir: str = "assets/xtts-speakers",
+        latents_dir: Optional[str] = None,
+        crossfade_ms: float = 20.0,
+    ) -> None:
         self.speakers_dir = speakers_dir
+        self.crossfade_ms = crossfade_ms
+        # Sidecar cache of speaker conditioning latents (see _conditioning)
+        self.latents_dir = latents_dir or os.path.join(speakers_dir, ".latents")
+        self._latents: Dict[Tuple[str, int, int], Tuple[Any, Any]] = {}
+        self._latents_lock = threading.Lock()
+        self._latent_counters = {"memory": 0, "disk": 0, "computed": 0}
+        self._model_version = "xtts_v2"
         self._tts = None  # lazy load to avoid import cost when unused
         self._device = None
         self._builtin_speakers: list[str] = []
         self._default_speaker: str | None = None
+        # Model-declared languages, captured once the model has loaded
+        self._languages: list[str] = []
 
     def _ensure_loaded(self) -> None:
         if self._tts is not None:
@@ -53,6 +138,12 @@ class XTTSProvider:
         self._tts = TTS(
             "tts_models/multilingual/multi-dataset/xtts_v2", progress_bar=False
         ).to(self._device)
+        try:
+            import TTS as _tts_pkg  # type: ignore
+
+            self._model_version = f"xtts_v2:{getattr(_tts_pkg, '__version__', '')}"
+        except Exception:
+            pass
         # Capture builtin speaker names if available (for cases without speaker_wav)
         try:
             # Prefer deep introspection which is stable across TTS versions
@@ -71,6 +162,14 @@ class XTTSProvider:
                     self._default_speaker = spk_list[0]
         except Exception:
             pass
+        try:
+            self._languages = self._model_languages()
+        except Exception:
+            self._languages = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._tts is not None
 
     def list_speakers(self) -> List[Dict[str, str]]:
         if not os.path.isdir(self.speakers_dir):
@@ -81,8 +180,8 @@ class XTTSProvider:
             out.append({"id": vid})
         return out
 
-    def languages(self) -> List[str]:
-        # Return model-declared languages (normalized to BCP-47 where obvious)
+    def _model_languages(self) -> List[str]:
+        # Model-declared languages (normalized to BCP-47 where obvious)
         def _norm(x: str) -> str:
             x = (x or "").lower()
             # simple mapping to common region defaults
@@ -106,17 +205,17 @@ class XTTSProvider:
             }
             return m.get(x, x)
 
-        try:
-            self._ensure_loaded()
-            cfg = getattr(
-                getattr(getattr(self._tts, "synthesizer", None), "tts_model", None),
-                "config",
-                None,
-            )
-            langs = list(getattr(cfg, "languages", [])) if cfg else []
-            return sorted({_norm(l) for l in langs if isinstance(l, str) and l})
-        except Exception:
-            return ["en-US", "ja-JP"]
+        cfg = getattr(
+            getattr(getattr(self._tts, "synthesizer", None), "tts_model", None),
+            "config",
+            None,
+        )
+        langs = list(getattr(cfg, "languages", [])) if cfg else []
+        return sorted({_norm(l) for l in langs if isinstance(l, str) and l})
+
+    def languages(self) -> List[str]:
+        """Languages captured at model load; never loads the model itself."""
+        return list(self._languages) or ["en-US", "ja-JP"]
 
     def _speaker_path(self, voiceId: Optional[str]) -> Optional[str]:
         if not voiceId:
@@ -146,6 +245,230 @@ class XTTSProvider:
         except Exception:
             pass
 
+    def _model(self):
+        """Underlying Xtts model, or None if this TTS version hides it."""
+        tts_model = getattr(getattr(self._tts, "synthesizer", None), "tts_model", None)
+        if tts_model is None or not hasattr(tts_model, "inference"):
+            return None
+        return tts_model
+
+    def _latent_path(self, key: Tuple[str, int, int]) -> str:
+        digest = hashlib.sha256(
+            f"{key[0]}|{key[1]}|{key[2]}|{self._model_version}".encode("utf-8")
+        ).hexdigest()[:32]
+        stem = os.path.splitext(os.path.basename(key[0]))[0]
+        return os.path.join(self.latents_dir, f"{stem}.{digest}.pt")
+
+    def _conditioning(self, tts_model, speaker_wav: str) -> Tuple[Any, Any]:
+        """GPT conditioning latent and speaker embedding for ``speaker_wav``.
+
+        Computed once per file version (path + mtime + size) and model
+        version, kept in memory and persisted next to the speakers as a small
+        torch file so restarts skip the reload/resample/encode as well.
+        """
+        import torch  # type: ignore
+
+        st = os.stat(speaker_wav)
+        key = (os.path.abspath(speaker_wav), st.st_mtime_ns, st.st_size)
+        with self._latents_lock:
+            hit = self._latents.get(key)
+            if hit is not None:
+                self._latent_counters["memory"] += 1
+                return hit
+        device = getattr(tts_model, "device", self._device)
+        path = self._latent_path(key)
+        latents = None
+        if os.path.isfile(path):
+            try:
+                blob = torch.load(path, map_location="cpu", weights_only=True)
+                latents = (
+                    blob["gpt_cond_latent"].to(device),
+                    blob["speaker_embedding"].to(device),
+                )
+                with self._latents_lock:
+                    self._latent_counters["disk"] += 1
+            except Exception as ex:
+                _log.warning(
+                    "xtts: ignoring unreadable latent cache %s: %s", path, repr(ex)
+                )
+        if latents is None:
+            cfg = tts_model.config
+            latents = tts_model.get_conditioning_latents(
+                audio_path=[speaker_wav],
+                gpt_cond_len=cfg.gpt_cond_len,
+                gpt_cond_chunk_len=cfg.gpt_cond_chunk_len,
+                max_ref_length=cfg.max_ref_len,
+                sound_norm_refs=cfg.sound_norm_refs,
+            )
+            with self._latents_lock:
+                self._latent_counters["computed"] += 1
+            try:
+                os.makedirs(self.latents_dir, exist_ok=True)
+                tmp = f"{path}.tmp.{os.getpid()}"
+                torch.save(
+                    {
+                        "gpt_cond_latent": latents[0].detach().cpu(),
+                        "speaker_embedding": latents[1].detach().cpu(),
+                    },
+                    tmp,
+                )
+                os.replace(tmp, path)
+            except Exception as ex:
+                _log.warning(
+                    "xtts: failed to persist latents for %s: %s", speaker_wav, repr(ex)
+                )
+        with self._latents_lock:
+            # Drop entries for older versions of the same file
+            for old in [k for k in self._latents if k[0] == key[0]]:
+                del self._latents[old]
+            self._latents[key] = latents
+        return latents
+
+    def _inference_kwargs(self, tts_model) -> Dict[str, Any]:
+        # Same sampling settings the high-level tts() API takes from the config
+        cfg = tts_model.config
+        return {
+            "temperature": cfg.temperature,
+            "length_penalty": cfg.length_penalty,
+            "repetition_penalty": cfg.repetition_penalty,
+            "top_k": cfg.top_k,
+            "top_p": cfg.top_p,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._latents_lock:
+            return {
+                "loaded": self.loaded,
+                "latents_resident": len(self._latents),
+                "latent_hits": dict(self._latent_counters),
+            }
+
+    def _xtts_lang(self, languageCode: Optional[str]) -> str:
+        lang = (languageCode or "en").lower()
+        return "zh-cn" if lang.startswith("zh") else lang.split("-")[0]
+
+    def _char_limit(self, tts_model, lang: str) -> int:
+        # XTTS degrades past its per-language tokenizer limit (e.g. en 250, ja 71)
+        limits = getattr(getattr(tts_model, "tokenizer", None), "char_limits", None)
+        if isinstance(limits, dict):
+            return int(limits.get(lang, 250))
+        return 250
+
+    def _resolve_speaker(
+        self, voiceId: Optional[str], lang: str
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """(speaker_wav, builtin speaker); raises ValueError when neither exists."""
+        spk_wav = self._speaker_path(voiceId)
+        if spk_wav:
+            print(f"[xtts] using speaker_wav: {spk_wav} lang={lang}")
+            return spk_wav, None
+        # Try builtin speakers (if any)
+        chosen = None
+        if voiceId and self._builtin_speakers and voiceId in self._builtin_speakers:
+            chosen = voiceId
+        elif self._default_speaker:
+            chosen = self._default_speaker
+        if chosen:
+            print(f"[xtts] using builtin speaker: {chosen} lang={lang}")
+            return None, chosen
+        raise ValueError(
+            "XTTS requires a speaker. Provide voiceId that maps to "
+            "assets/xtts-speakers/<voiceId>.wav (speaker_wav) or pick a valid builtin speaker."
+        )
+
+    def _speaker_latents(
+        self, tts_model, spk_wav: Optional[str], builtin: Optional[str]
+    ) -> Optional[Tuple[Any, Any]]:
+        if tts_model is None:
+            return None
+        if spk_wav:
+            return self._conditioning(tts_model, spk_wav)
+        spk_mgr = getattr(tts_model, "speaker_manager", None)
+        spk = (getattr(spk_mgr, "speakers", None) or {}).get(builtin)
+        if isinstance(spk, dict) and "gpt_cond_latent" in spk:
+            return spk["gpt_cond_latent"], spk["speaker_embedding"]
+        return None
+
+    def _sentence_audio(
+        self,
+        sentence: str,
+        lang: str,
+        speed: float,
+        tts_model,
+        latents: Optional[Tuple[Any, Any]],
+        spk_wav: Optional[str],
+        builtin: Optional[str],
+    ) -> Iterator[np.ndarray]:
+        if latents is None:
+            kwargs: Dict[str, Any] = {
+                "text": sentence,
+                "language": lang,
+                "speed": speed,
+            }
+            if spk_wav:
+                kwargs["speaker_wav"] = spk_wav
+            else:
+                kwargs["speaker"] = builtin
+            yield _to_numpy(self._tts.tts(**kwargs))
+            return
+        if hasattr(tts_model, "inference_stream"):
+            for chunk in tts_model.inference_stream(
+                sentence,
+                lang,
+                latents[0],
+                latents[1],
+                speed=speed,
+                enable_text_splitting=False,
+                **self._inference_kwargs(tts_model),
+            ):
+                yield _to_numpy(chunk)
+            return
+        # Reuse cached conditioning instead of re-encoding the reference
+        out = tts_model.inference(
+            sentence,
+            lang,
+            latents[0],
+            latents[1],
+            speed=speed,
+            enable_text_splitting=False,
+            **self._inference_kwargs(tts_model),
+        )
+        yield _to_numpy(out["wav"])
+
+    def stream(
+        self,
+        *,
+        text: str,
+        voiceId: Optional[str],
+        speed: Optional[float],
+        languageCode: Optional[str] | None = None,
+    ) -> Iterator[Tuple[np.ndarray, int]]:
+        """Yield audio sentence by sentence, as XTTS streams it.
+
+        Text is split on sentence boundaries within the model's per-language
+        character limit; consecutive sentences are joined with a short
+        crossfade.
+        """
+        self._ensure_loaded()
+        lang = self._xtts_lang(languageCode)
+        spk_wav, builtin = self._resolve_speaker(voiceId, lang)
+        tts_model = self._model()
+        with phase("conditioning"):
+            latents = self._speaker_latents(tts_model, spk_wav, builtin)
+        fader = _Crossfader(24000 * self.crossfade_ms / 1000.0)
+        for sentence in split_sentences(text, self._char_limit(tts_model, lang)):
+            for chunk in self._sentence_audio(
+                sentence, lang, speed or 1.0, tts_model, latents, spk_wav, builtin
+            ):
+                with phase("postprocess"):
+                    out = fader.push(chunk)
+                if out.size:
+                    yield out, 24000
+            fader.boundary()
+        tail = fader.flush()
+        if tail.size:
+            yield tail, 24000
+
     def synthesize(
         self,
         *,
@@ -154,28 +477,12 @@ class XTTSProvider:
         speed: Optional[float],
         languageCode: Optional[str] | None = None,
     ) -> Tuple[np.ndarray, int]:
-        self._ensure_loaded()
-        lang = (languageCode or "en").split("-")[0]
-        spk_wav = self._speaker_path(voiceId)
-        kwargs = {"text": text, "language": lang, "speed": speed or 1.0}
-        if spk_wav:
-            kwargs["speaker_wav"] = spk_wav
-            print(f"[xtts] using speaker_wav: {spk_wav} lang={lang}")
-        else:
-            # Try builtin speakers (if any)
-            chosen = None
-            if voiceId and self._builtin_speakers and voiceId in self._builtin_speakers:
-                chosen = voiceId
-            elif self._default_speaker:
-                chosen = self._default_speaker
-            if chosen:
-                kwargs["speaker"] = chosen
-                print(f"[xtts] using builtin speaker: {chosen} lang={lang}")
-            else:
-                raise ValueError(
-                    "XTTS requires a speaker. Provide voiceId that maps to "
-                    "assets/xtts-speakers/<voiceId>.wav (speaker_wav) or pick a valid builtin speaker."
-                )
-        wav = self._tts.tts(**kwargs)
-        audio = np.asarray(wav, dtype=np.float32).ravel()
-        return audio, 24000
+        chunks = [
+            audio
+            for audio, _ in self.stream(
+                text=text, voiceId=voiceId, speed=speed, languageCode=languageCode
+            )
+        ]
+        if not chunks:
+            return np.zeros((0,), dtype=np.float32), 24000
+        return np.concatenate(chunks), 24000
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ProviderReadiness:
+    """Load state per provider: pending -> loading -> ready | failed.
+
+    Providers load on background threads while the server already accepts
+    connections; request handlers consult this registry to wait for a
+    provider that is still loading or to route around one that failed.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, threading.Event] = {}
+
+    def expect(self, name: str) -> None:
+        with self._lock:
+            self._states[name] = {"state": PENDING}
+            self._events[name] = threading.Event()
+
+    def loading(self, name: str) -> None:
+        with self._lock:
+            self._states[name] = {"state": LOADING, "since": time.time()}
+
+    def ready(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._states[name] = {"state": READY, "load_seconds": round(seconds, 3)}
+            event = self._events.setdefault(name, threading.Event())
+        event.set()
+
+    def failed(self, name: str, error: str) -> None:
+        with self._lock:
+            self._states[name] = {"state": FAILED, "error": error}
+            event = self._events.setdefault(name, threading.Event())
+        event.set()
+
+    def state(self, name: str) -> Optional[str]:
+        with self._lock:
+            st = self._states.get(name)
+            return st["state"] if st else None
+
+    def is_ready(self, name: str) -> bool:
+        return self.state(name) == READY
+
+    def is_pending(self, name: str) -> bool:
+        """Not loaded yet but expected to be (pending or loading)."""
+        return self.state(name) in (PENDING, LOADING)
+
+    async def wait(self, name: str, timeout: float, poll: float = 0.05) -> bool:
+        """Wait until ``name`` settles; True if it became ready in time."""
+        with self._lock:
+            event = self._events.get(name)
+        if event is None:
+            return False
+        deadline = time.monotonic() + timeout
+        while not event.is_set():
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return False
+            await asyncio.sleep(min(poll, left))
+        return self.is_ready(name)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._states.items()}
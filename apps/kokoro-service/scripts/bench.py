@@ -0,0 +1,489 @@
+"""Load and latency benchmark for the TTS service.
+
+Drives ``/v1/audio/speech`` either in-process (the ASGI app is imported and
+called directly, no sockets) or over HTTP against a running server, with a
+fixed number of concurrent clients and a seeded text-length distribution.
+Prints a JSON report: throughput, latency and time-to-first-byte percentiles,
+real-time factor and peak RSS. ``--baseline`` compares against a stored
+report and exits non-zero on regressions beyond ``--tolerance``.
+
+Examples (from apps/kokoro-service):
+
+    # No model weights needed: the synthetic provider only
+    KOKORO_PROVIDERS=synthetic python scripts/bench.py --provider synthetic \\
+        --requests 200 --concurrency 8 --lengths lognormal:200:0.8 --out base.json
+
+    # Same workload against a running server, compared with the baseline
+    python scripts/bench.py --url http://127.0.0.1:8010 --provider synthetic \\
+        --requests 200 --concurrency 8 --lengths lognormal:200:0.8 --baseline base.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import http.client
+import io
+import json
+import math
+import os
+import platform
+import random
+import resource
+import struct
+import sys
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_SENTENCES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "A journey of a thousand miles begins with a single step.",
+    "She sells sea shells by the sea shore, or so the story goes.",
+    "Every morning the baker opened the shop before sunrise.",
+    "Numbers like 42, 1999 and 3.14 test the text normalizer.",
+    "Would you like a cup of tea, or perhaps something stronger?",
+    "The committee postponed its decision until next Thursday.",
+    "Rain drummed on the tin roof while the kettle began to sing.",
+    "Please remember to bring your ticket and a valid ID.",
+    "Long ago, in a quiet village by the river, there lived an old clockmaker.",
+]
+
+
+@dataclass
+class Sample:
+    status: int
+    latency_s: float
+    ttfb_s: float
+    nbytes: int
+    audio_s: Optional[float]
+
+
+def parse_lengths(spec: str) -> Callable[[random.Random], int]:
+    """fixed:N | uniform:A:B | lognormal:MEDIAN:SIGMA (characters)."""
+    kind, _, rest = spec.partition(":")
+    args = [float(x) for x in rest.split(":") if x]
+    if kind == "fixed" and len(args) == 1:
+        return lambda rng: int(args[0])
+    if kind == "uniform" and len(args) == 2:
+        return lambda rng: rng.randint(int(args[0]), int(args[1]))
+    if kind == "lognormal" and len(args) == 2:
+        mu = math.log(args[0])
+        return lambda rng: max(1, int(rng.lognormvariate(mu, args[1])))
+    raise argparse.ArgumentTypeError(f"bad --lengths spec: {spec!r}")
+
+
+def make_text(rng: random.Random, n: int) -> str:
+    """About ``n`` characters of sentences, cut at a word boundary."""
+    parts: List[str] = []
+    size = 0
+    while size < n:
+        s = rng.choice(_SENTENCES)
+        parts.append(s)
+        size += len(s) + 1
+    text = " ".join(parts)
+    if len(text) > n:
+        cut = text.rfind(" ", 0, n)
+        text = text[: cut if cut > 0 else n]
+    return text
+
+
+def audio_seconds(body: bytes, fmt: str) -> Optional[float]:
+    if fmt == "wav" and body[:4] == b"RIFF":
+        # Streamed WAV has placeholder sizes; derive the length from the body
+        try:
+            channels, sr = struct.unpack("<HI", body[22:28])
+            bits = struct.unpack("<H", body[34:36])[0]
+            data = body.find(b"data", 12)
+            frames = (len(body) - data - 8) / (channels * bits / 8)
+            return frames / sr
+        except Exception:
+            return None
+    try:
+        import soundfile as sf  # type: ignore
+
+        return float(sf.info(io.BytesIO(body)).duration)
+    except Exception:
+        return None
+
+
+def percentiles(values: List[float], scale: float = 1.0) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    xs = sorted(values)
+
+    def pct(p: float) -> float:
+        k = (len(xs) - 1) * p
+        lo, hi = math.floor(k), math.ceil(k)
+        return xs[lo] + (xs[hi] - xs[lo]) * (k - lo)
+
+    return {
+        "p50": round(pct(0.50) * scale, 3),
+        "p95": round(pct(0.95) * scale, 3),
+        "p99": round(pct(0.99) * scale, 3),
+        "mean": round(sum(xs) / len(xs) * scale, 3),
+        "max": round(xs[-1] * scale, 3),
+    }
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _server_peak_rss_mb(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+class InProcessClient:
+    """Calls the ASGI app directly, timing the first body chunk as TTFB."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def post(
+        self, path: str, body: bytes, headers: Dict[str, str]
+    ) -> Tuple[int, float, bytes]:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+            + [(b"content-length", str(len(body)).encode())],
+            "client": ("127.0.0.1", 0),
+            "server": ("127.0.0.1", 80),
+        }
+        t0 = time.perf_counter()
+        done = asyncio.Event()
+        sent_body = False
+        status = 0
+        ttfb = 0.0
+        chunks: List[bytes] = []
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal sent_body
+            if not sent_body:
+                sent_body = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Dict[str, Any]) -> None:
+            nonlocal status, ttfb
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                data = message.get("body", b"")
+                if data and not ttfb:
+                    ttfb = time.perf_counter() - t0
+                chunks.append(data)
+                if not message.get("more_body", False):
+                    done.set()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            done.set()
+        return status, ttfb, b"".join(chunks)
+
+
+class HttpClient:
+    """One keep-alive connection per worker thread."""
+
+    def __init__(self, base_url: str, concurrency: int, timeout: float) -> None:
+        u = urllib.parse.urlsplit(base_url)
+        self._conn_cls = (
+            http.client.HTTPSConnection
+            if u.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self._host = u.hostname or "127.0.0.1"
+        self._port = u.port
+        self._prefix = u.path.rstrip("/")
+        self._timeout = timeout
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._conn_cls(
+                self._host, self._port, timeout=self._timeout
+            )
+        return conn
+
+    def _post(self, path: str, body: bytes, headers: Dict[str, str]):
+        t0 = time.perf_counter()
+        for attempt in (0, 1):
+            conn = self._conn()
+            try:
+                conn.request("POST", self._prefix + path, body=body, headers=headers)
+                resp = conn.getresponse()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # Stale keep-alive connection: reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        first = resp.read(1)
+        ttfb = time.perf_counter() - t0 if first else 0.0
+        data = first + resp.read()
+        return resp.status, ttfb, data
+
+    async def post(self, path: str, body: bytes, headers: Dict[str, str]):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._post, path, body, headers
+        )
+
+
+async def run_load(client, args, texts: List[str]) -> Tuple[List[Sample], float]:
+    headers = {"content-type": "application/json"}
+    if args.token:
+        headers["authorization"] = f"Bearer {args.token}"
+    samples: List[Sample] = []
+
+    async def worker(queue: "asyncio.Queue[Tuple[int, str]]") -> None:
+        while True:
+            try:
+                index, text = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            payload = {
+                "input": text,
+                "format": args.format,
+                "stream": args.stream,
+            }
+            if args.provider:
+                payload["provider"] = args.provider
+            if args.voice:
+                payload["voice"] = args.voice
+            body = json.dumps(payload).encode("utf-8")
+            t0 = time.perf_counter()
+            try:
+                status, ttfb, data = await client.post(
+                    "/v1/audio/speech", body, headers
+                )
+            except Exception as ex:
+                print(f"request {index} failed: {ex!r}", file=sys.stderr)
+                status, ttfb, data = 0, 0.0, b""
+            latency = time.perf_counter() - t0
+            if index >= args.warmup:
+                samples.append(
+                    Sample(
+                        status=status,
+                        latency_s=latency,
+                        ttfb_s=ttfb,
+                        nbytes=len(data),
+                        audio_s=(
+                            audio_seconds(data, args.format) if status == 200 else None
+                        ),
+                    )
+                )
+
+    warm: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue()
+    timed: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue()
+    for index, text in enumerate(texts):
+        (warm if index < args.warmup else timed).put_nowait((index, text))
+    # Warmup requests run first and sequentially, outside the timed window
+    await worker(warm)
+    t_start = time.perf_counter()
+    await asyncio.gather(*(worker(timed) for _ in range(args.concurrency)))
+    return samples, time.perf_counter() - t_start
+
+
+def summarize(samples: List[Sample], wall_s: float) -> Dict[str, Any]:
+    ok = [s for s in samples if s.status == 200]
+    errors: Dict[str, int] = {}
+    for s in samples:
+        if s.status != 200:
+            errors[str(s.status)] = errors.get(str(s.status), 0) + 1
+    audio_total = sum(s.audio_s or 0.0 for s in ok)
+    rtfs = [s.audio_s / s.latency_s for s in ok if s.audio_s and s.latency_s > 0]
+    return {
+        "requests": len(samples),
+        "ok": len(ok),
+        "errors": errors,
+        "wall_seconds": round(wall_s, 3),
+        "throughput_rps": round(len(ok) / wall_s, 3) if wall_s > 0 else None,
+        "audio_seconds_per_second": (
+            round(audio_total / wall_s, 3) if wall_s > 0 else None
+        ),
+        "latency_ms": percentiles([s.latency_s for s in ok], 1000.0),
+        "ttfb_ms": percentiles([s.ttfb_s for s in ok if s.ttfb_s], 1000.0),
+        "rtf": percentiles(rtfs),
+        "bytes_per_request": round(sum(s.nbytes for s in ok) / len(ok)) if ok else None,
+    }
+
+
+# (path in report, higher is better)
+_COMPARED = [
+    (("throughput_rps",), True),
+    (("audio_seconds_per_second",), True),
+    (("latency_ms", "p50"), False),
+    (("latency_ms", "p95"), False),
+    (("latency_ms", "p99"), False),
+    (("ttfb_ms", "p95"), False),
+    (("peak_rss_mb",), False),
+]
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float):
+    """Relative change per metric and the names of those that regressed."""
+    changes: Dict[str, Any] = {}
+    regressions: List[str] = []
+    for path, higher_is_better in _COMPARED:
+        cur: Any = report
+        base: Any = baseline
+        for key in path:
+            cur = cur.get(key) if isinstance(cur, dict) else None
+            base = base.get(key) if isinstance(base, dict) else None
+        name = ".".join(path)
+        if (
+            not isinstance(cur, (int, float))
+            or not isinstance(base, (int, float))
+            or not base
+        ):
+            continue
+        change = (cur - base) / base
+        changes[name] = {"baseline": base, "current": cur, "change": round(change, 4)}
+        worse = -change if higher_is_better else change
+        if worse > tolerance:
+            regressions.append(name)
+    return changes, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument("--url", help="Benchmark a running server instead of in-process")
+    p.add_argument("--requests", type=int, default=100)
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--warmup", type=int, default=5, help="Untimed leading requests")
+    p.add_argument(
+        "--lengths",
+        default="lognormal:200:0.8",
+        help="fixed:N | uniform:A:B | lognormal:MEDIAN:SIGMA characters",
+    )
+    p.add_argument("--seed", type=int, default=1234)
+    p.add_argument("--provider", default=None)
+    p.add_argument("--voice", default=None)
+    p.add_argument("--format", default="wav", choices=["wav", "mp3", "ogg", "opus"])
+    p.add_argument("--stream", action="store_true")
+    p.add_argument("--token", default=os.environ.get("APP_TOKEN"))
+    p.add_argument("--timeout", type=float, default=300.0)
+    p.add_argument(
+        "--server-pid", type=int, help="Read the server's peak RSS (HTTP mode)"
+    )
+    p.add_argument("--out", help="Also write the report to this file")
+    p.add_argument("--baseline", help="Report to compare against")
+    p.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="Allowed relative regression before exiting with status 1",
+    )
+    args = p.parse_args(argv)
+    try:
+        length_of = parse_lengths(args.lengths)
+    except argparse.ArgumentTypeError as ex:
+        p.error(str(ex))
+
+    rng = random.Random(args.seed)
+    texts = [make_text(rng, length_of(rng)) for _ in range(args.warmup + args.requests)]
+
+    if args.url:
+        client = HttpClient(args.url, args.concurrency, args.timeout)
+        mode = "http"
+    else:
+        # Quiet, uncached defaults for the in-process app; explicit env wins
+        os.environ.setdefault("KOKORO_CACHE_MAX_MB", "0")
+        os.environ.setdefault("KOKORO_DUMP_SAMPLE_RATE", "0")
+        os.environ.setdefault(
+            "KOKORO_LOG_FILE",
+            os.path.join(os.path.dirname(__file__), "..", "bench.log"),
+        )
+        sys.path.insert(
+            0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+        )
+        t0 = time.perf_counter()
+        import app as service  # type: ignore
+
+        print(f"app loaded in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+        client = InProcessClient(service.app)
+        mode = "in-process"
+
+    samples, wall = asyncio.run(run_load(client, args, texts))
+    report: Dict[str, Any] = {
+        "config": {
+            "mode": mode,
+            "url": args.url,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "lengths": args.lengths,
+            "seed": args.seed,
+            "provider": args.provider,
+            "voice": args.voice,
+            "format": args.format,
+            "stream": args.stream,
+            "input_chars_mean": round(
+                sum(len(t) for t in texts[args.warmup :]) / max(1, args.requests), 1
+            ),
+        },
+        "host": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        **summarize(samples, wall),
+        "peak_rss_mb": (
+            _server_peak_rss_mb(args.server_pid)
+            if args.server_pid
+            else (_peak_rss_mb() if mode == "in-process" else None)
+        ),
+    }
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        changes, regressions = compare(report, baseline, args.tolerance)
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "tolerance": args.tolerance,
+            "changes": changes,
+            "regressions": regressions,
+        }
+        if regressions:
+            print(
+                f"regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}",
+                file=sys.stderr,
+            )
+            status = 1
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Export Kokoro to ONNX for the ``kokoro_onnx`` provider and verify it.
+
+Writes into ``--out`` (default ``assets/kokoro-onnx``):
+
+    model.onnx        fp32 graph: (input_ids, style, speed) -> waveform
+    model.int8.onnx   with --quantize: dynamic int8 weights (MatMul/Gemm/LSTM)
+    config.json       phoneme vocabulary and sample rate
+    voices/<id>.npy   style packs converted from the torch voice files
+
+Then runs the same phonemes through the torch pipeline and through ONNX
+Runtime and compares the audio: duration ratio, frame-wise log-spectral
+distance and the distance between the long-term spectra. Exits 1 when a
+sentence exceeds ``--max-duration-diff`` or ``--max-spectral-db``. Export
+needs torch and a kokoro release whose ``KModel`` takes ``disable_complex``;
+the service itself then needs only onnxruntime and misaki.
+
+Examples (from apps/kokoro-service):
+
+    python scripts/export_kokoro_onnx.py --quantize --voices af_heart,bf_emma
+    python scripts/export_kokoro_onnx.py --verify-only --model model.int8.onnx
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from providers.kokoro_onnx import KokoroOnnxProvider  # noqa: E402
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_TEXTS = [
+    "Hello there.",
+    "The quick brown fox jumps over the lazy dog.",
+    "She sells seashells by the seashore, and the shells she sells are surely seashells.",
+    "In 1969, two astronauts walked on the Moon while a third orbited above, "
+    "waiting to bring them home.",
+    "Numbers like 3.14, dates like March 5th, and abbreviations like Dr. Smith "
+    "all go through the same front end before the acoustic model sees them.",
+]
+
+
+def export_graph(repo: str, path: Path, opset: int) -> Dict[str, int]:
+    import torch  # type: ignore
+    from kokoro import KModel  # type: ignore
+
+    # The complex STFT in the decoder has no ONNX equivalent
+    model = KModel(repo_id=repo, disable_complex=True).eval()
+
+    class Graph(torch.nn.Module):
+        def __init__(self, model) -> None:
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, style, speed):
+            audio, _ = self.model.forward_with_tokens(input_ids, style, speed)
+            return audio
+
+    ids = torch.randint(1, 100, (1, 48), dtype=torch.long)
+    ids[0, 0] = ids[0, -1] = 0
+    style = torch.randn(1, 256)
+    speed = torch.ones(1)
+    with torch.inference_mode():
+        torch.onnx.export(
+            Graph(model),
+            (ids, style, speed),
+            str(path),
+            input_names=["input_ids", "style", "speed"],
+            output_names=["waveform"],
+            dynamic_axes={"input_ids": {1: "tokens"}, "waveform": {0: "samples"}},
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+    return dict(model.vocab)
+
+
+def quantize(src: Path, dst: Path) -> None:
+    from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore
+
+    # ConvInteger has no kernel in many CPU builds; convolutions stay fp32
+    quantize_dynamic(
+        str(src),
+        str(dst),
+        weight_type=QuantType.QInt8,
+        op_types_to_quantize=["MatMul", "Gemm", "LSTM"],
+    )
+
+
+def export_voices(voices: List[str], voices_dir: Path, out_dir: Path) -> None:
+    from kokoro import KPipeline  # type: ignore
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    g2p_only = KPipeline(lang_code="a", model=False)
+    for voice in voices:
+        local = voices_dir / f"{voice}.pt"
+        pack = g2p_only.load_single_voice(str(local) if local.is_file() else voice)
+        np.save(
+            out_dir / f"{voice}.npy", pack.detach().cpu().numpy().astype(np.float32)
+        )
+        print(f"voice {voice}: {tuple(pack.shape)}", file=sys.stderr)
+
+
+def _log_spectrogram(
+    audio: np.ndarray, n_fft: int = 1024, hop: int = 256
+) -> np.ndarray:
+    if audio.size < n_fft:
+        audio = np.pad(audio, (0, n_fft - audio.size))
+    frames = np.lib.stride_tricks.sliding_window_view(audio, n_fft)[::hop]
+    mag = np.abs(np.fft.rfft(frames * np.hanning(n_fft), axis=-1))
+    return 20.0 * np.log10(mag + 1e-5)
+
+
+def compare(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, float]:
+    ref, cand = _log_spectrogram(reference), _log_spectrogram(candidate)
+    n = min(len(ref), len(cand))
+    frame_lsd = float(np.mean(np.sqrt(np.mean((ref[:n] - cand[:n]) ** 2, axis=-1))))
+    # Time-averaged spectra tolerate small duration shifts from quantization
+    long_term = float(np.sqrt(np.mean((ref.mean(axis=0) - cand.mean(axis=0)) ** 2)))
+    return {
+        "duration_diff": abs(candidate.size / max(1, reference.size) - 1.0),
+        "frame_lsd_db": frame_lsd,
+        "spectral_db": long_term,
+    }
+
+
+def verify(args, provider: KokoroOnnxProvider) -> bool:
+    from kokoro import KModel, KPipeline  # type: ignore
+
+    texts = DEFAULT_TEXTS
+    if args.texts:
+        texts = [
+            t for t in Path(args.texts).read_text("utf-8").splitlines() if t.strip()
+        ]
+    # G2P only; the reference forward pass is timed separately below
+    g2p = KPipeline(lang_code="a", repo_id=args.repo, model=False)
+    model = KModel(repo_id=args.repo).eval()
+    voice_src = Path(args.voices_dir) / f"{args.verify_voice}.pt"
+    pack = g2p.load_voice(str(voice_src) if voice_src.is_file() else args.verify_voice)
+
+    ok = True
+    torch_s = onnx_s = audio_s = 0.0
+    for text in texts:
+        for result in g2p(text, voice=args.verify_voice):
+            ps = result.phonemes
+            if not ps:
+                continue
+            t0 = time.perf_counter()
+            ref = KPipeline.infer(model, ps, pack).audio
+            torch_s += time.perf_counter() - t0
+            ref = np.asarray(ref.detach().cpu().numpy(), dtype=np.float32).reshape(-1)
+            t0 = time.perf_counter()
+            cand, sr = provider.synthesize(
+                text="", phonemes=ps, voiceId=args.verify_voice, speed=1.0
+            )
+            onnx_s += time.perf_counter() - t0
+            audio_s += ref.size / sr
+            m = compare(ref, cand)
+            passed = (
+                m["duration_diff"] <= args.max_duration_diff
+                and m["spectral_db"] <= args.max_spectral_db
+            )
+            ok = ok and passed
+            row = {k: round(v, 4) for k, v in m.items()}
+            print(json.dumps({"text": text[:60], **row, "ok": passed}))
+    print(
+        json.dumps(
+            {
+                "model": os.path.basename(provider.model_path),
+                "audio_seconds": round(audio_s, 3),
+                "torch_rtf": round(torch_s / max(audio_s, 1e-9), 4),
+                "onnx_rtf": round(onnx_s / max(audio_s, 1e-9), 4),
+                "passed": ok,
+            }
+        )
+    )
+    return ok
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument(
+        "--repo", default=os.environ.get("KOKORO_REPO", "hexgrad/Kokoro-82M")
+    )
+    p.add_argument("--out", default=str(APP_DIR / "assets" / "kokoro-onnx"))
+    p.add_argument(
+        "--voices-dir",
+        default=os.environ.get(
+            "KOKORO_VOICES_DIR", str(APP_DIR / "assets" / "kokoro-voices")
+        ),
+        help="Local <id>.pt voice files; other voices come from the Hub",
+    )
+    p.add_argument(
+        "--voices", default="af_heart", help="Comma-separated voices to convert"
+    )
+    p.add_argument("--opset", type=int, default=17)
+    p.add_argument("--quantize", action="store_true", help="Also write model.int8.onnx")
+    p.add_argument("--verify-only", action="store_true", help="Skip export")
+    p.add_argument(
+        "--model", default=None, help="Graph to verify (default: int8 if present)"
+    )
+    p.add_argument("--verify-voice", default="af_heart")
+    p.add_argument("--texts", default=None, help="File with one test sentence per line")
+    p.add_argument("--threads", type=int, default=0)
+    p.add_argument("--max-duration-diff", type=float, default=0.05)
+    p.add_argument("--max-spectral-db", type=float, default=3.0)
+    args = p.parse_args(argv)
+
+    out = Path(args.out)
+    if not args.verify_only:
+        out.mkdir(parents=True, exist_ok=True)
+        t0 = time.perf_counter()
+        vocab = export_graph(args.repo, out / "model.onnx", args.opset)
+        (out / "config.json").write_text(
+            json.dumps({"vocab": vocab, "sample_rate": 24000, "source": args.repo}),
+            "utf-8",
+        )
+        print(
+            f"exported model.onnx in {time.perf_counter() - t0:.1f}s", file=sys.stderr
+        )
+        if args.quantize:
+            quantize(out / "model.onnx", out / "model.int8.onnx")
+            print("quantized model.int8.onnx", file=sys.stderr)
+        voices = [v.strip() for v in args.voices.split(",") if v.strip()]
+        if args.verify_voice not in voices:
+            voices.append(args.verify_voice)
+        export_voices(voices, Path(args.voices_dir), out / "voices")
+        for name in ("model.onnx", "model.int8.onnx"):
+            if (out / name).is_file():
+                print(
+                    f"{name}: {(out / name).stat().st_size / 1e6:.1f} MB",
+                    file=sys.stderr,
+                )
+
+    provider = KokoroOnnxProvider(str(out), model_file=args.model, threads=args.threads)
+    return 0 if verify(args, provider) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Stand-in for macOS ``say`` so AppleSayProvider runs on Linux.
+
+Supports the subset the provider uses: ``-v ?`` lists a few voices,
+``-v``/``-r``/``-o``/``-f`` (``-`` for stdin) or a trailing message, and
+``--file-format=caff --data-format=LEI16[@rate]``. Output is a tone whose
+length follows the word count and rate, written as CAF; when ``-o`` is not
+seekable (a pipe) the data chunk size is -1, as real ``say`` does.
+
+    KOKORO_SAY_BIN=scripts/say_stub.py python scripts/smoke_apple_say.py
+
+``SAY_STUB_DELAY_MS`` adds a fixed startup delay per run.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import struct
+import sys
+import time
+
+VOICES = [
+    ("Alex", "en_US", "Most people recognize me by my voice."),
+    ("Samantha", "en_US", "Hello, my name is Samantha."),
+    ("Daniel", "en_GB", "Hello, my name is Daniel."),
+    ("Alva", "sv_SE", "Hej, jag heter Alva."),
+    ("Kyoko", "ja_JP", "こんにちは、私の名前はKyokoです。"),
+]
+
+
+def caf(pcm: bytes, rate: int, seekable: bool) -> bytes:
+    desc = struct.pack(">d4sIIIII", float(rate), b"lpcm", 2, 2, 1, 1, 16)
+    size = len(pcm) + 4 if seekable else -1
+    return (
+        b"caff"
+        + struct.pack(">HH", 1, 0)
+        + b"desc"
+        + struct.pack(">q", len(desc))
+        + desc
+        + b"data"
+        + struct.pack(">q", size)
+        + struct.pack(">I", 0)
+        + pcm
+    )
+
+
+def tone(text: str, wpm: int, rate: int) -> bytes:
+    words = max(1, len(text.split()))
+    n = int(rate * words * 60.0 / max(1, wpm))
+    f0 = 110.0 + (sum(text.encode("utf-8")) % 80)
+    return b"".join(
+        struct.pack("<h", int(8000 * math.sin(2 * math.pi * f0 * i / rate)))
+        for i in range(n)
+    )
+
+
+def main(argv) -> int:
+    voice, wpm, out, infile, rate = "Alex", 175, None, None, 22050
+    message = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "-v":
+            voice = next(args)
+        elif arg == "-r":
+            wpm = int(float(next(args)))
+        elif arg == "-o":
+            out = next(args)
+        elif arg == "-f":
+            infile = next(args)
+        elif arg.startswith("--data-format="):
+            fmt = arg.split("=", 1)[1]
+            if "@" in fmt:
+                rate = int(float(fmt.split("@", 1)[1]))
+        elif arg.startswith("--file-format="):
+            pass
+        elif arg == "--":
+            message.extend(args)
+        else:
+            message.append(arg)
+    if voice == "?":
+        for name, lang, sample in VOICES:
+            print(f"{name:<20} {lang}    # {sample}")
+        return 0
+    if voice not in {v[0] for v in VOICES}:
+        print(f"Voice `{voice}' not found.", file=sys.stderr)
+        return 1
+    if infile == "-" or (infile is None and not message):
+        text = sys.stdin.read()
+    elif infile is not None:
+        with open(infile, "r", encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = " ".join(message)
+    time.sleep(float(os.environ.get("SAY_STUB_DELAY_MS", "0")) / 1000.0)
+    pcm = tone(text, wpm, rate)
+    if out is None:
+        return 0
+    with open(out, "wb") as f:
+        f.write(caf(pcm, rate, f.seekable()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -5,6 +5,8 @@ Tests edge cases that previously caused failures:
 - Text starting with '-' (bullet points)
 - Long paragraphs
 - Multilingual content
+
+Runs on Linux against the stand-in: KOKORO_SAY_BIN=scripts/say_stub.py
 """
 
 import sys
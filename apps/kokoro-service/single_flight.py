@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    def __init__(self, task: "asyncio.Task[T]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """Run one computation per key at a time; identical callers share it.
+
+    The first caller for a key (the leader) starts ``fn`` as its own task;
+    callers arriving while it runs (followers) await the same task and get
+    the same result or exception. A caller that is cancelled stops waiting
+    without cancelling the others; the task is cancelled only when no caller
+    is left waiting for it. The key is released as soon as the task ends, so
+    later requests start fresh (or hit the response cache).
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _Call[T]] = {}
+        self._counters = {"leaders": 0, "followers": 0, "abandoned": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """``(result, shared)``; ``shared`` is True for followers."""
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            # The task copies the leader's context (timings, profiler)
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _t, k=key, c=call: self._release(k, c))
+            self._counters["leaders"] += 1
+        else:
+            self._counters["followers"] += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), shared
+        except asyncio.CancelledError:
+            if not call.task.done() and call.waiters == 1:
+                # Nobody else wants it; new callers must not join a dying task
+                self._counters["abandoned"] += 1
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _release(self, key: str, call: _Call[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            # Retrieved here so an error nobody awaited is not logged as lost
+            call.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._calls), **self._counters}
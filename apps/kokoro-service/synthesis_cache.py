@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+_WS_RE = re.compile(r"[ \t\f\v]+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys without changing what gets synthesized.
+
+    Unicode is NFC-normalized, line endings unified, runs of horizontal
+    whitespace collapsed and each line trimmed. Newlines are kept because the
+    Kokoro pipeline splits paragraphs on them.
+    """
+    text = unicodedata.normalize("NFC", text or "")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    lines = [_WS_RE.sub(" ", line).strip() for line in text.split("\n")]
+    return "\n".join(lines).strip()
+
+
+def make_cache_key(
+    *,
+    provider: str,
+    voice: Optional[str],
+    text: str,
+    speed: Optional[float],
+    languageCode: Optional[str],
+    format: str,
+    sample_rate: Optional[int],
+    phonemes: Optional[str] = None,
+    encoder: str = "",
+    model_version: str = "",
+) -> str:
+    """Content address for one synthesis result (sha256 hex digest).
+
+    ``encoder`` names the settings that shape the encoded bytes (preset,
+    codec, backend) and ``model_version`` the model and voice pack that
+    produced the audio, so a config change or upgrade never serves old bytes.
+    """
+    fields = [
+        provider,
+        voice or "",
+        normalize_text(text),
+        round(float(speed if speed is not None else 1.0), 4),
+        (languageCode or "").lower(),
+        (format or "wav").lower(),
+        int(sample_rate or 0),
+        encoder,
+        model_version,
+    ]
+    if phonemes is not None:
+        # Appended only when set so keys of text requests stay unchanged
+        fields.append(["phonemes", phonemes])
+    payload = json.dumps(
+        fields,
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SynthesisCache:
+    """Two-tier cache of encoded audio bytes keyed by content hash.
+
+    The memory tier is an LRU bounded by total bytes. The optional disk tier
+    stores one file per key under ``disk_dir/<key[:2]>/<key>.bin``; entries
+    older than ``ttl_seconds`` are treated as misses and removed, and the
+    oldest files are evicted once ``disk_max_bytes`` is exceeded.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_bytes: int,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 0,
+        ttl_seconds: float = 0.0,
+    ) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = max(0, int(disk_max_bytes))
+        self.ttl_seconds = max(0.0, float(ttl_seconds))
+        self._lock = Lock()
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._mem_bytes = 0
+        # key -> (size, mtime), oldest first
+        self._disk_index: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._disk_bytes = 0
+        self._counters: Dict[str, int] = {
+            "hits_memory": 0,
+            "hits_disk": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions_memory": 0,
+            "evictions_disk": 0,
+        }
+        if self.disk_dir:
+            self._load_disk_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or bool(self.disk_dir)
+
+    # ---- public API -------------------------------------------------------
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self._counters["hits_memory"] += 1
+                return data
+        data = self._disk_get(key)
+        with self._lock:
+            if data is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits_disk"] += 1
+            self._mem_put_locked(key, data)
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if not data:
+            return
+        with self._lock:
+            self._counters["stores"] += 1
+            self._mem_put_locked(key, data)
+        self._disk_put(key, data)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self._counters)
+            out["memory_entries"] = len(self._mem)
+            out["memory_bytes"] = self._mem_bytes
+            out["disk_entries"] = len(self._disk_index)
+            out["disk_bytes"] = self._disk_bytes
+        return out
+
+    # ---- memory tier ------------------------------------------------------
+
+    def _mem_put_locked(self, key: str, data: bytes) -> None:
+        size = len(data)
+        if self.max_bytes <= 0 or size > self.max_bytes:
+            return
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= len(old)
+        self._mem[key] = data
+        self._mem_bytes += size
+        while self._mem_bytes > self.max_bytes and self._mem:
+            _, evicted = self._mem.popitem(last=False)
+            self._mem_bytes -= len(evicted)
+            self._counters["evictions_memory"] += 1
+
+    # ---- disk tier --------------------------------------------------------
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir or "", key[:2], f"{key}.bin")
+
+    def _expired(self, mtime: float) -> bool:
+        return self.ttl_seconds > 0 and (time.time() - mtime) > self.ttl_seconds
+
+    def _load_disk_index(self) -> None:
+        entries: list[Tuple[float, str, int]] = []
+        try:
+            os.makedirs(self.disk_dir or "", exist_ok=True)
+            for sub in os.scandir(self.disk_dir or ""):
+                if not sub.is_dir():
+                    continue
+                for f in os.scandir(sub.path):
+                    if not f.name.endswith(".bin"):
+                        continue
+                    st = f.stat()
+                    entries.append((st.st_mtime, f.name[:-4], st.st_size))
+        except OSError:
+            return
+        entries.sort()
+        with self._lock:
+            for mtime, key, size in entries:
+                self._disk_index[key] = (size, mtime)
+                self._disk_bytes += size
+        self._disk_evict()
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        with self._lock:
+            meta = self._disk_index.get(key)
+        if meta is None:
+            return None
+        if self._expired(meta[1]):
+            self._disk_remove(key)
+            return None
+        try:
+            with open(self._disk_path(key), "rb") as f:
+                return f.read()
+        except OSError:
+            self._disk_remove(key)
+            return None
+
+    def _disk_put(self, key: str, data: bytes) -> None:
+        if not self.disk_dir or self.disk_max_bytes <= 0:
+            return
+        if len(data) > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            old = self._disk_index.pop(key, None)
+            if old is not None:
+                self._disk_bytes -= old[0]
+            self._disk_index[key] = (len(data), time.time())
+            self._disk_bytes += len(data)
+        self._disk_evict()
+
+    def _disk_remove(self, key: str) -> None:
+        with self._lock:
+            meta = self._disk_index.pop(key, None)
+            if meta is not None:
+                self._disk_bytes -= meta[0]
+        try:
+            os.remove(self._disk_path(key))
+        except OSError:
+            pass
+
+    def _disk_evict(self) -> None:
+        victims: list[str] = []
+        with self._lock:
+            total = self._disk_bytes
+            for key, (size, mtime) in self._disk_index.items():
+                if total <= self.disk_max_bytes and not self._expired(mtime):
+                    break
+                victims.append(key)
+                total -= size
+        for key in victims:
+            self._disk_remove(key)
+            with self._lock:
+                self._counters["evictions_disk"] += 1
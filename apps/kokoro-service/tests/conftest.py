@@ -0,0 +1,55 @@
+import asyncio
+import importlib
+import os
+import sys
+import tempfile
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+# app.py opens its rotating log at import; keep it out of the source tree
+os.environ.setdefault(
+    "KOKORO_LOG_FILE", os.path.join(tempfile.gettempdir(), "kokoro-tests.log")
+)
+
+# app.py reads its configuration at import; the in-process service only
+# loads the synthetic provider, so no model is needed
+_SERVICE_ENV = {
+    "KOKORO_PROVIDERS": "synthetic",
+    "KOKORO_WARMUP": "0",
+    "KOKORO_DUMP_SAMPLE_RATE": "0",
+    "KOKORO_WORKERS_SYNTHETIC": "4",
+    "KOKORO_SYNTHETIC_MS_PER_CHAR": "0.5",
+    "KOKORO_SYNTHETIC_SECONDS_PER_CHAR": "0.005",
+    "APP_TOKEN": "",
+    "KOKORO_BEARER": "",
+}
+
+
+@pytest.fixture(scope="session")
+def service():
+    """The app module, imported once and ready to serve "synthetic"."""
+    pytest.importorskip("fastapi")
+    saved = {k: os.environ.get(k) for k in _SERVICE_ENV}
+    os.environ.update(_SERVICE_ENV)
+    try:
+        app = importlib.import_module("app")
+        assert asyncio.run(app._readiness.wait("synthetic", 10))
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    return app
+
+
+@pytest.fixture
+def client(service):
+    from fastapi.testclient import TestClient
+
+    with TestClient(service.app) as c:
+        yield c
@@ -0,0 +1,76 @@
+import io
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from audio import (
+    PcmAssembler,
+    WavStreamEncoder,
+    encode_mp3,
+    mp3_encoder,
+    sndfile_supports,
+)
+
+needs_mp3 = pytest.mark.skipif(
+    not sndfile_supports("MP3", "MPEG_LAYER_III"), reason="libsndfile without MP3"
+)
+
+
+def _speech_like(seconds: float, sr: int) -> np.ndarray:
+    t = np.arange(int(seconds * sr)) / sr
+    rng = np.random.default_rng(0)
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    return (tone + 0.02 * rng.standard_normal(t.size)).astype(np.float32)
+
+
+def _stream(enc, audio: np.ndarray, chunk: int) -> bytes:
+    out = [enc.write(audio[i : i + chunk]) for i in range(0, audio.size, chunk)]
+    return b"".join(out) + enc.close()
+
+
+@needs_mp3
+@pytest.mark.parametrize("sr", [24000, 22050])
+def test_streamed_mp3_decodes_to_the_buffered_audio(sr, capfd):
+    audio = _speech_like(2.0, sr)
+    buffered, _ = sf.read(io.BytesIO(encode_mp3(audio, sr)), dtype="float32")
+    streamed, rate = sf.read(
+        io.BytesIO(_stream(mp3_encoder(sr), audio, sr // 10)), dtype="float32"
+    )
+    assert rate == sr
+    assert buffered.size == audio.size
+    # Without the tag the decoder cannot trim the silent lead frame, encoder
+    # delay and final padding, but it must not stop before the end
+    extra = streamed.size - buffered.size
+    assert 0 <= extra < 3 * 1152
+    offset = min(
+        range(extra + 1),
+        key=lambda o: float(np.abs(streamed[o : o + buffered.size] - buffered).max()),
+    )
+    np.testing.assert_allclose(
+        streamed[offset : offset + buffered.size], buffered, atol=1e-6
+    )
+    assert "error" not in capfd.readouterr().err
+
+
+def test_buffered_and_streamed_wav_quantize_like_libsndfile():
+    audio = np.random.default_rng(1).uniform(-1.2, 1.2, 100_000).astype(np.float32)
+    ref = io.BytesIO()
+    sf.write(ref, audio, 24000, format="WAV", subtype="PCM_16")
+    pcm = PcmAssembler()
+    pcm.append(audio)
+    buffered = bytes(pcm.wav_pcm16(24000))
+    streamed = _stream(WavStreamEncoder(24000), audio, 7000)
+    assert buffered[44:] == ref.getvalue()[-audio.size * 2 :]
+    assert streamed[44:] == buffered[44:]
+
+
+def test_assembler_grows_from_a_small_buffer():
+    pcm = PcmAssembler()
+    assert pcm._buf.nbytes <= 1 << 18
+    for _ in range(40):
+        pcm.append(np.full(24000, 0.25, dtype=np.float32))
+        pcm.append_silence(100)
+    assert pcm.size == 40 * 24100
+    assert pcm._buf.size < 2 * pcm.size
+    assert pcm.peak == 0.25
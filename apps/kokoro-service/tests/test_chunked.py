@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture
+def pieces(service, monkeypatch):
+    """Small piece limit, and a record of how many pieces ran at once."""
+    monkeypatch.setattr(service._providers["synthetic"], "maxCharsPerRequest", 40)
+    state = {"running": 0, "peak": 0, "calls": 0}
+    lock = threading.Lock()
+    render = service._render_piece
+
+    def tracked(*args, **kwargs):
+        with lock:
+            state["running"] += 1
+            state["calls"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+        try:
+            time.sleep(0.05)
+            return render(*args, **kwargs)
+        finally:
+            with lock:
+                state["running"] -= 1
+
+    monkeypatch.setattr(service, "_render_piece", tracked)
+    return state
+
+
+_TEXT = " ".join(f"Sentence number {i} of a long chapter." for i in range(12))
+
+
+def _speak(client, text, **extra):
+    r = client.post(
+        "/v1/audio/speech",
+        json={"input": text, "provider": "synthetic", "voice": "synth_low", **extra},
+    )
+    assert r.status_code == 200, r.text
+    return r
+
+
+def test_pieces_default_to_half_the_workers(client, pieces):
+    _speak(client, _TEXT + " default")
+    assert pieces["calls"] >= 6
+    assert pieces["peak"] == 2
+
+
+def test_parallel_pieces_follow_the_setting(client, pieces, service, monkeypatch):
+    monkeypatch.setattr(service, "CHUNK_PARALLEL", 1)
+    _speak(client, _TEXT + " serial")
+    assert pieces["peak"] == 1
+    monkeypatch.setattr(service, "CHUNK_PARALLEL", 4)
+    _speak(client, _TEXT + " wide")
+    assert pieces["peak"] >= 3
@@ -0,0 +1,35 @@
+import time
+
+from providers.g2p_cache import G2PCache
+
+
+def test_hits_are_fresh_copies():
+    cache = G2PCache()
+    calls = []
+
+    def g2p(text):
+        calls.append(text)
+        return text.lower(), [{"token": text}]
+
+    cached = cache.wrap("a", g2p)
+    first = cached("Hello  world")
+    first[1][0]["token"] = "mutated"
+    assert cached("Hello world") == ("hello  world", [{"token": "Hello  world"}])
+    assert calls == ["Hello  world"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_languages_do_not_share_entries():
+    cache = G2PCache()
+    cache.put("a", "Hello", "en")
+    assert cache.get("b", "Hello") is None
+
+
+def test_results_persist_across_restarts(tmp_path):
+    path = str(tmp_path / "g2p.sqlite")
+    cache = G2PCache(path=path)
+    cache.put("a", "Hello", ("həlˈO", None))
+    deadline = time.monotonic() + 5
+    while cache.stats()["writes"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert G2PCache(path=path).get("a", "Hello") == ("həlˈO", None)
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from inference_queue import InferencePool, QueueFullError
+
+
+@pytest.fixture
+def gate():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+@pytest.fixture
+def small_pool(gate):
+    pool = InferencePool("synthetic", workers=1, max_queue=1)
+    yield pool
+    gate.set()
+    pool.shutdown()
+
+
+def _occupy(pool, gate, queued=0):
+    """Block the pool's only worker and fill ``queued`` queue slots."""
+    running = pool.submit(gate.wait)
+    running.started.result(timeout=5)
+    return [running] + [pool.submit(gate.wait) for _ in range(queued)]
+
+
+def _drain(pool):
+    deadline = time.monotonic() + 5
+    while pool.stats()["queued"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_full_queue_raises_with_an_eta(small_pool, gate):
+    _occupy(small_pool, gate, queued=1)
+    with pytest.raises(QueueFullError) as ex:
+        small_pool.submit(lambda: None)
+    assert ex.value.retry_after > 0
+    assert small_pool.stats()["rejected"] == 1
+
+
+def test_cancelled_job_is_skipped(small_pool, gate):
+    _, queued = _occupy(small_pool, gate, queued=1)
+    assert queued.cancel()
+    gate.set()
+    _drain(small_pool)
+    assert small_pool.submit(lambda: 42).result.result(timeout=5) == 42
+    assert small_pool.stats()["cancelled"] == 1
+
+
+def test_worker_runs_with_the_callers_context():
+    import contextvars
+
+    var = contextvars.ContextVar("var", default="unset")
+    pool = InferencePool("ctx", workers=1, max_queue=4)
+    try:
+        var.set("caller")
+        assert pool.submit(var.get).result.result(timeout=5) == "caller"
+    finally:
+        pool.shutdown()
+
+
+def _speak(client, text):
+    return client.post(
+        "/v1/audio/speech",
+        json={"input": text, "provider": "synthetic", "voice": "synth_low"},
+    )
+
+
+def test_full_queue_is_answered_429(client, service, small_pool, gate, monkeypatch):
+    monkeypatch.setitem(service._pools, "synthetic", small_pool)
+    _occupy(small_pool, gate, queued=1)
+    r = _speak(client, "Rejected because the queue is full.")
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) >= 1
+
+
+def test_queue_deadline_is_answered_503(client, service, small_pool, gate, monkeypatch):
+    monkeypatch.setitem(service._pools, "synthetic", small_pool)
+    monkeypatch.setattr(service, "QUEUE_TIMEOUT_SECONDS", 0.2)
+    _occupy(small_pool, gate)
+    r = _speak(client, "Rejected because no worker became free in time.")
+    assert r.status_code == 503
+    assert "Retry-After" in r.headers
+    # The abandoned job must not run once the worker frees up
+    gate.set()
+    _drain(small_pool)
+    assert small_pool.submit(lambda: None).result.result(timeout=5) is None
+    assert small_pool.stats()["cancelled"] == 1
@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+pytest.importorskip("torch")
+
+import metrics  # noqa: E402
+from providers import kokoro_batching  # noqa: E402
+from providers.kokoro_batching import KokoroBatcher  # noqa: E402
+
+
+@pytest.fixture
+def batcher(monkeypatch):
+    monkeypatch.setattr(
+        kokoro_batching,
+        "forward_batch",
+        lambda model, rows, tol: [(r.phonemes.upper(), len(r.phonemes)) for r in rows],
+    )
+    return KokoroBatcher(
+        None,
+        max_batch=4,
+        max_wait_ms=200,
+        on_batch=metrics.BATCH_SIZE.labels("test").observe,
+    )
+
+
+def test_concurrent_calls_share_a_batch(batcher):
+    out = {}
+    threads = [
+        threading.Thread(target=lambda p=p: out.update({p: batcher(p, None)}))
+        for p in ("a", "bb", "ccc")
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert out == {"a": "A", "bb": "BB", "ccc": "CCC"}
+    stats = batcher.stats()
+    assert stats["rows"] == 3
+    assert sum(size * n for size, n in stats["batch_sizes"].items()) == 3
+
+
+@pytest.mark.skipif(not metrics.AVAILABLE, reason="prometheus_client not installed")
+def test_batch_sizes_are_exported(batcher):
+    def sample(name):
+        return metrics.REGISTRY.get_sample_value(name, {"provider": "test"}) or 0.0
+
+    count, total = sample("tts_batch_size_count"), sample("tts_batch_size_sum")
+    batcher("abc", None)
+    assert sample("tts_batch_size_count") == count + 1
+    assert sample("tts_batch_size_sum") == total + 1
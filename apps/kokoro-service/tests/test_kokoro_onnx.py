@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from onnx import TensorProto, helper  # noqa: E402
+
+from providers.kokoro_onnx import KokoroOnnxProvider  # noqa: E402
+
+
+def _const(name, value):
+    return helper.make_node(
+        "Constant",
+        [],
+        [name],
+        value=helper.make_tensor(name, TensorProto.INT64, [1], [value]),
+    )
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    """A stand-in graph: the style row tiled once per token, times speed."""
+    root = tmp_path_factory.mktemp("kokoro-onnx")
+    graph = helper.make_graph(
+        [
+            helper.make_node("Shape", ["input_ids"], ["shape"]),
+            _const("one", 1),
+            _const("two", 2),
+            helper.make_node("Slice", ["shape", "one", "two"], ["tokens"]),
+            helper.make_node("Concat", ["tokens", "one"], ["reps"], axis=0),
+            helper.make_node("Tile", ["style", "reps"], ["tiled"]),
+            helper.make_node("Mul", ["tiled", "speed"], ["scaled"]),
+            _const("flat", -1),
+            helper.make_node("Reshape", ["scaled", "flat"], ["waveform"]),
+        ],
+        "fake",
+        [
+            helper.make_tensor_value_info("input_ids", TensorProto.INT64, [1, "T"]),
+            helper.make_tensor_value_info("style", TensorProto.FLOAT, [1, 256]),
+            helper.make_tensor_value_info("speed", TensorProto.FLOAT, [1]),
+        ],
+        [helper.make_tensor_value_info("waveform", TensorProto.FLOAT, ["S"])],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 10
+    onnx.save(model, str(root / "model.onnx"))
+    vocab = {c: i + 1 for i, c in enumerate("abcdefghijklmnopqrstuvwxyz ")}
+    (root / "config.json").write_text(json.dumps({"vocab": vocab}))
+    (root / "voices").mkdir()
+    # Each pack is constant so the output identifies the voice
+    for value, voice in enumerate(("af_heart", "bf_emma", "jf_alpha"), start=1):
+        np.save(root / "voices" / f"{voice}.npy", np.full((510, 1, 256), value, "f4"))
+    return root
+
+
+def _voice_of(provider, **kwargs):
+    audio, _ = provider.synthesize(text="", phonemes="abc", speed=1.0, **kwargs)
+    return {1: "af_heart", 2: "bf_emma", 3: "jf_alpha"}[int(round(audio[0]))]
+
+
+def test_requested_voice_is_kept_without_a_language(model_dir):
+    provider = KokoroOnnxProvider(str(model_dir))
+    assert _voice_of(provider, voiceId="bf_emma") == "bf_emma"
+
+
+def test_voice_is_swapped_for_an_explicit_other_language(model_dir):
+    provider = KokoroOnnxProvider(str(model_dir))
+    assert _voice_of(provider, voiceId="bf_emma", languageCode="en-US") == "af_heart"
+    assert _voice_of(provider, voiceId="af_heart", languageCode="ja") == "jf_alpha"
+
+
+def test_missing_voice_falls_back_to_the_default(model_dir):
+    provider = KokoroOnnxProvider(str(model_dir))
+    assert _voice_of(provider, voiceId="am_missing") == "af_heart"
+
+
+def test_phonemes_are_split_at_the_model_limit(model_dir):
+    provider = KokoroOnnxProvider(str(model_dir))
+    audio, sr = provider.synthesize(
+        text="", phonemes=" ".join(["abcd"] * 200), voiceId="af_heart", speed=1.0
+    )
+    assert sr == 24000
+    stats = provider.stats()
+    assert stats["forward_calls"] == 2
+    # One sample row per phoneme plus the two pad tokens of each pass
+    assert audio.size == (stats["phonemes"] + 2 * 2) * 256
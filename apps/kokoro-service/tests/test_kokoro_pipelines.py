@@ -0,0 +1,56 @@
+import pytest
+
+from providers.kokoro_pipelines import KokoroPipelinePool, split_phonemes
+
+
+def _pool(factory=lambda code: f"pipe-{code}"):
+    return KokoroPipelinePool("pipe-a", factory, default_lang="a")
+
+
+@pytest.mark.parametrize(
+    "voice, explicit, expected",
+    [
+        ("af_heart", False, "af_heart"),
+        ("bf_emma", False, "bf_emma"),
+        ("my_custom_voice", False, "my_custom_voice"),
+        ("bf_emma", True, "af_heart"),
+        (None, False, "af_heart"),
+        ("af_heart,af_bella", True, "af_heart,af_bella"),
+    ],
+)
+def test_voice_for_only_swaps_on_explicit_language(voice, explicit, expected):
+    assert _pool().voice_for("a", voice, explicit=explicit) == expected
+
+
+def test_voice_for_uses_the_requested_languages_default():
+    assert _pool().voice_for("j", "af_heart", explicit=True) == "jf_alpha"
+
+
+def test_acquire_falls_back_when_a_pipeline_fails_to_build():
+    def factory(code):
+        raise ImportError("misaki[ja]")
+
+    pool = _pool(factory)
+    assert pool.acquire("ja-JP") == ("a", "pipe-a")
+    assert not pool.supports("ja-JP")
+    assert pool.acquire("ja-JP") == ("a", "pipe-a")
+
+
+def test_acquire_builds_and_caches_pipelines():
+    built = []
+
+    def factory(code):
+        built.append(code)
+        return f"pipe-{code}"
+
+    pool = _pool(factory)
+    assert pool.acquire("fr-FR") == ("f", "pipe-f")
+    assert pool.acquire("fr") == ("f", "pipe-f")
+    assert built == ["f"]
+
+
+def test_split_phonemes_respects_the_limit():
+    ps = " ".join(["ab"] * 400)
+    pieces = split_phonemes(ps, limit=50)
+    assert all(0 < len(p) <= 50 for p in pieces)
+    assert "".join(pieces).replace(" ", "") == ps.replace(" ", "")
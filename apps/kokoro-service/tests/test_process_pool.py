@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from process_pool import ProcessWorkerPool, WorkerUnavailableError
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux"), reason="fork-based pool is Linux only"
+)
+
+
+class _Provider:
+    name = "fake"
+    maxCharsPerRequest = 100
+
+    def stream(self, *, text, **_):
+        if text == "die":
+            os._exit(1)
+        time.sleep(0.05)
+        yield np.full(10, 0.5, dtype=np.float32), 24000
+
+
+@pytest.fixture
+def pool():
+    return ProcessWorkerPool(_Provider(), workers=2, acquire_timeout=0.5)
+
+
+def test_stream_returns_audio(pool):
+    audio, sr = pool.synthesize(text="hello")
+    assert sr == 24000
+    assert audio.tolist() == [0.5] * 10
+
+
+def test_dead_worker_is_respawned(pool):
+    with pytest.raises(WorkerUnavailableError):
+        list(pool.stream(text="die"))
+    stats = pool.stats()
+    assert stats["respawns"] == 1
+    assert stats["alive"] == 2
+    assert stats["idle"] == 2
+    # Both workers still serve, so concurrent callers never block forever
+    assert pool.synthesize(text="again")[0].size == 10
+
+
+def test_killed_worker_is_respawned(pool):
+    victim = pool.stats()["children"][0]["pid"]
+    os.kill(victim, 9)
+    time.sleep(0.1)
+    for _ in range(2):
+        assert pool.synthesize(text="ok")[0].size == 10
+    assert pool.stats()["respawns"] == 1
+    assert victim not in [c["pid"] for c in pool.stats()["children"]]
+
+
+def test_stream_times_out_when_no_worker_is_free(pool):
+    held = [pool.stream(text="ok"), pool.stream(text="ok")]
+    for gen in held:
+        next(gen)
+    t0 = time.perf_counter()
+    with pytest.raises(WorkerUnavailableError):
+        next(pool.stream(text="ok"))
+    assert time.perf_counter() - t0 < 2.0
+    for gen in held:
+        gen.close()
+    assert pool.synthesize(text="ok")[0].size == 10
+
+
+def test_all_workers_killed_are_respawned(pool):
+    for child in pool.stats()["children"]:
+        os.kill(child["pid"], 9)
+    time.sleep(0.1)
+    assert pool.synthesize(text="ok")[0].size == 10
+    assert pool.stats()["alive"] == 2
@@ -0,0 +1,108 @@
+import asyncio
+
+import httpx
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_identical_calls_share_one_run():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "audio"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert runs == [1]
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert {value for value, _ in results} == {"audio"}
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_errors_reach_every_caller():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def main():
+        return await asyncio.gather(
+            flight.do("k", fail), flight.do("k", fail), return_exceptions=True
+        )
+
+    assert [type(r) for r in asyncio.run(main())] == [ValueError, ValueError]
+
+
+def test_one_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "audio"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("k", work))
+        follower = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == ("audio", True)
+
+
+def test_last_cancelled_caller_cancels_the_run():
+    flight = SingleFlight()
+    started = []
+
+    async def work():
+        started.append(1)
+        await asyncio.sleep(10)
+
+    async def main():
+        call = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+
+    asyncio.run(main())
+    assert started == [1]
+    assert flight.stats() == {
+        "in_flight": 0,
+        "leaders": 1,
+        "followers": 0,
+        "abandoned": 1,
+    }
+
+
+def test_concurrent_identical_requests_are_coalesced(service, monkeypatch):
+    # Slow enough that the second request arrives while the first runs
+    monkeypatch.setattr(service._providers["synthetic"], "ms_per_char", 5.0)
+    body = {
+        "input": "Two readers open the same page at once.",
+        "provider": "synthetic",
+        "voice": "synth_mid",
+        "format": "mp3",
+    }
+
+    async def main():
+        transport = httpx.ASGITransport(app=service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            return await asyncio.gather(
+                *(c.post("/v1/audio/speech", json=body) for _ in range(2))
+            )
+
+    first, second = asyncio.run(main())
+    assert first.status_code == second.status_code == 200
+    assert sorted(r.headers["X-Cache"] for r in (first, second)) == [
+        "coalesced",
+        "miss",
+    ]
+    assert first.content == second.content
@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKES = os.path.join(APP_DIR, "tests", "fakes")
+
+# Runs in a fresh interpreter: app.py reads its configuration at import
+_PROBE = textwrap.dedent("""
+    import asyncio
+    import json
+    from fastapi.testclient import TestClient
+    import app
+
+    ready = asyncio.run(app._readiness.wait("kokoro", 20))
+    with TestClient(app.app) as client:
+        r = client.post("/v1/audio/speech", json={"input": "Hello there.", "format": "wav"})
+        health = client.get("/healthz").json()
+    print(json.dumps({
+        "ready": ready,
+        "state": app._readiness.snapshot()["kokoro"],
+        "status": r.status_code,
+        "bytes": len(r.content),
+        "process_pool": health["process_pool"],
+    }))
+    """)
+
+
+def _start(tmp_path, **env):
+    full = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([FAKES, APP_DIR]),
+        KOKORO_LOG_FILE=str(tmp_path / "kokoro.log"),
+        KOKORO_PROVIDERS="kokoro",
+        KOKORO_WARMUP="0",
+        KOKORO_CACHE_MAX_MB="0",
+        KOKORO_DUMP_SAMPLE_RATE="0",
+        **env,
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=tmp_path,
+        env=full,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert out.returncode == 0, out.stderr
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_threaded_startup_serves_kokoro(tmp_path):
+    result = _start(tmp_path)
+    assert result["state"]["state"] == "ready"
+    assert result["status"] == 200
+    assert result["process_pool"] is None
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux only")
+def test_process_mode_startup_serves_kokoro(tmp_path):
+    result = _start(tmp_path, KOKORO_PROCESS_WORKERS="2")
+    assert result["state"]["state"] == "ready", result["state"]
+    assert result["status"] == 200
+    assert result["bytes"] > 44
+    assert result["process_pool"]["alive"] == 2
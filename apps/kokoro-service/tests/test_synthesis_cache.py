@@ -0,0 +1,99 @@
+import os
+import time
+
+import pytest
+
+from synthesis_cache import SynthesisCache, make_cache_key, normalize_text
+
+_BASE = dict(
+    provider="kokoro",
+    voice="af_heart",
+    text="Hello there.",
+    speed=1.0,
+    languageCode="en-US",
+    format="mp3",
+    sample_rate=24000,
+)
+
+
+def test_equivalent_text_shares_a_key():
+    assert (
+        normalize_text(" Hello \t there.\r\nNext  line ") == "Hello there.\nNext line"
+    )
+    assert make_cache_key(**_BASE) == make_cache_key(
+        **{**_BASE, "text": "Hello   there. ", "languageCode": "EN-us"}
+    )
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"provider": "kokoro_onnx"},
+        {"voice": "bf_emma"},
+        {"text": "Hello there!"},
+        {"text": "Hello\n\nthere."},
+        {"speed": 1.1},
+        {"languageCode": "en-GB"},
+        {"format": "wav"},
+        {"sample_rate": 22050},
+        {"phonemes": "həlˈO"},
+        {"encoder": "mp3:compact:sndfile"},
+        {"model_version": "kokoro:0.9.4"},
+    ],
+)
+def test_each_field_changes_the_key(change):
+    assert make_cache_key(**_BASE) != make_cache_key(**{**_BASE, **change})
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = SynthesisCache(max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"
+    cache.put("c", b"cccc")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.stats()["evictions_memory"] == 1
+
+
+def test_disk_tier_survives_a_restart_until_the_ttl(tmp_path):
+    def open_cache():
+        return SynthesisCache(
+            max_bytes=0, disk_dir=str(tmp_path), disk_max_bytes=1 << 20, ttl_seconds=60
+        )
+
+    open_cache().put("ab" * 32, b"audio")
+    assert open_cache().get("ab" * 32) == b"audio"
+    old = time.time() - 120
+    for root, _, files in os.walk(tmp_path):
+        for name in files:
+            os.utime(os.path.join(root, name), (old, old))
+    assert open_cache().get("ab" * 32) is None
+
+
+def _speak(client, **extra):
+    body = {
+        "input": "A sentence that is cached after the first request.",
+        "provider": "synthetic",
+        "voice": "synth_low",
+    }
+    r = client.post("/v1/audio/speech", json={**body, **extra})
+    assert r.status_code == 200, r.text
+    return r
+
+
+def test_repeated_request_is_served_from_cache(client):
+    first = _speak(client, format="wav")
+    again = _speak(client, format="wav")
+    assert first.headers["X-Cache"] == "miss"
+    assert again.headers["X-Cache"] == "hit"
+    assert again.content == first.content
+
+
+def test_encoder_and_cache_version_are_part_of_the_key(client, service, monkeypatch):
+    _speak(client, format="mp3")
+    assert _speak(client, format="mp3").headers["X-Cache"] == "hit"
+    monkeypatch.setattr(service, "MP3_PRESET", "compact")
+    assert _speak(client, format="mp3").headers["X-Cache"] == "miss"
+    monkeypatch.setattr(service, "CACHE_VERSION", "2")
+    assert _speak(client, format="mp3").headers["X-Cache"] == "miss"
@@ -0,0 +1,26 @@
+from text_chunking import split_text
+
+
+def test_short_text_is_one_piece():
+    assert split_text("Hello there.", 100) == ["Hello there."]
+    assert split_text("Hello there.", 0) == ["Hello there."]
+
+
+def test_pieces_end_on_sentence_boundaries():
+    text = "One two three. Four five six. Seven eight nine."
+    assert split_text(text, 30) == [
+        "One two three. Four five six.",
+        "Seven eight nine.",
+    ]
+
+
+def test_paragraphs_and_cjk_stops_are_boundaries():
+    assert split_text("First part\n\nSecond part", 15) == ["First part", "Second part"]
+    assert split_text("今日は晴れ。明日は雨。", 7) == ["今日は晴れ。", "明日は雨。"]
+
+
+def test_long_sentences_are_cut_at_soft_breaks():
+    text = "alpha, beta, gamma, delta, epsilon, zeta"
+    pieces = split_text(text, 15)
+    assert all(len(p) <= 15 for p in pieces)
+    assert " ".join(pieces) == text
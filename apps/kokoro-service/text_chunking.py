@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import re
+from typing import Iterator, List
+
+# Paragraph breaks, Latin sentence ends before whitespace, CJK full stops and
+# Devanagari danda. Separators stay attached to the preceding piece.
+_BOUNDARY = re.compile(r"\n\s*\n|(?<=[.!?…])\s+|(?<=[。！？；])|(?<=[।॥])\s*")
+_SOFT_BREAKS = (", ", "、", "，", "; ", " ")
+
+
+def _pieces(text: str) -> Iterator[str]:
+    start = 0
+    for m in _BOUNDARY.finditer(text):
+        if m.end() > start:
+            yield text[start : m.end()]
+            start = m.end()
+    if start < len(text):
+        yield text[start:]
+
+
+def _hard_split(piece: str, max_chars: int) -> Iterator[str]:
+    """Cut an over-long sentence at the last comma/space before the limit."""
+    while len(piece) > max_chars:
+        cut = max(piece.rfind(sep, 0, max_chars) for sep in _SOFT_BREAKS)
+        cut = cut + 1 if cut > 0 else max_chars
+        yield piece[:cut]
+        piece = piece[cut:]
+    if piece:
+        yield piece
+
+
+def split_text(text: str, max_chars: int) -> List[str]:
+    """Split ``text`` into chunks of at most ``max_chars`` characters.
+
+    Paragraphs and sentences are packed greedily, so chunks end on a sentence
+    or paragraph boundary whenever one fits. Text within the limit (or a
+    non-positive limit) is returned as a single chunk.
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text]
+    chunks: List[str] = []
+    cur = ""
+    for piece in _pieces(text):
+        for part in _hard_split(piece, max_chars):
+            if cur and len(cur) + len(part) > max_chars:
+                chunks.append(cur)
+                cur = ""
+            cur += part
+    if cur:
+        chunks.append(cur)
+    return [c.strip() for c in chunks if c.strip()]
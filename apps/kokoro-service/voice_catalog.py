@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+_log = logging.getLogger("kokoro-service")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches ``etag``."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+class VoiceCatalog:
+    """In-memory voice/config documents, rebuilt only when their inputs change.
+
+    ``build`` returns a dict of document name -> JSON-serializable payload.
+    Each document is serialized once and served with a strong ETag derived
+    from its bytes. A daemon thread polls a cheap fingerprint every
+    ``refresh_seconds``: the mtimes of ``watch_paths`` (a directory's mtime
+    changes when files are added, removed or renamed) plus ``extra()``, e.g.
+    languages captured when a model finishes loading. Requests never touch the
+    filesystem or the models.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[], Dict[str, Any]],
+        *,
+        watch_paths: Iterable[str] = (),
+        extra: Optional[Callable[[], Any]] = None,
+        refresh_seconds: float = 5.0,
+    ) -> None:
+        self._build = build
+        self._watch_paths = [str(p) for p in watch_paths]
+        self._extra = extra
+        self.refresh_seconds = float(refresh_seconds)
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Tuple[bytes, str]] = {}
+        self._fingerprint: Any = None
+        self._builds = 0
+        self.refresh(force=True)
+        if self.refresh_seconds > 0:
+            threading.Thread(
+                target=self._loop, name="voice-catalog", daemon=True
+            ).start()
+
+    def _fingerprint_now(self) -> Any:
+        mtimes = []
+        for p in self._watch_paths:
+            try:
+                mtimes.append(os.stat(p).st_mtime_ns)
+            except OSError:
+                mtimes.append(None)
+        extra = None
+        if self._extra is not None:
+            try:
+                extra = self._extra()
+            except Exception:
+                extra = None
+        return (tuple(mtimes), extra)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuild when the fingerprint changed (or ``force``); True if rebuilt."""
+        fp = self._fingerprint_now()
+        if not force and fp == self._fingerprint:
+            return False
+        docs: Dict[str, Tuple[bytes, str]] = {}
+        for name, payload in self._build().items():
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            docs[name] = (body, etag)
+        with self._lock:
+            self._docs = docs
+            self._fingerprint = fp
+            self._builds += 1
+        return True
+
+    def document(self, name: str) -> Tuple[bytes, str]:
+        """(JSON body, ETag) for ``name``."""
+        with self._lock:
+            return self._docs[name]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "builds": self._builds,
+                "documents": sorted(self._docs),
+                "refresh_seconds": self.refresh_seconds,
+            }
+
+    def _loop(self) -> None:
+        while True:
+            time.sleep(self.refresh_seconds)
+            try:
+                if self.refresh():
+                    _log.info("voice catalog rebuilt")
+            except Exception as ex:
+                _log.warning("voice catalog refresh failed: %s", repr(ex))